@@ -11,7 +11,10 @@ from jinja2 import Template
 from tabulate import tabulate
 
 from decodex.constant import DECODEX_DIR
-from decodex.installer import download_github_file
+from decodex.installer import install_datasets
+from decodex.installer import prune_versions
+from decodex.installer import remove_datasets
+from decodex.installer import update_datasets
 from decodex.translate import Translator
 from decodex.utils import fmt_addr
 from decodex.utils import fmt_blktime
@@ -46,43 +49,29 @@ def cli():
 @click.option("--verify-ssl", is_flag=True, help="Verify SSL", default=False)
 def download(chain: str, verify_ssl: bool):
     chain = chain.lower()
-    parents = DECODEX_DIR.joinpath(chain)
-
-    if chain == "ethereum":
-        download_github_file(
-            save_path=str(parents.joinpath("tags.json")),
-            org="brianleect",
-            repo="etherscan-labels",
-            branch="main",
-            path="data/etherscan/combined/combinedAllLabels.json",
-            is_lfs=False,
-            verify_ssl=verify_ssl,
-            use_tempfile=False,
-        )
-        download_github_file(
-            save_path=str(parents.joinpath("signatures.csv")),
-            org="Solratic",
-            repo="function-signature-registry",
-            branch="main",
-            path="data/ethereum/func_sign.csv.gz",
-            is_lfs=True,
-            verify_ssl=verify_ssl,
-            use_tempfile=True,
-        )
-    else:
-        raise ValueError(f"Chain {chain} is not yet supported.")
+    version_dir = install_datasets(chain, verify_ssl=verify_ssl)
+    if version_dir is not None:
+        print(f"Published {chain} datasets {version_dir.name}")
+
+
+@cli.command(help="apply a signature delta file to the downloaded signatures of a chain")
+@click.argument("chain", default="ethereum", type=click.Choice(["ethereum"]))
+@click.option("--delta", "-d", type=str, required=True, help="Path or URL of the signature delta CSV file")
+@click.option("--verify-ssl", is_flag=True, help="Verify SSL", default=False)
+def update(chain: str, delta: str, verify_ssl: bool):
+    chain = chain.lower()
+    update_datasets(chain, delta=delta, verify_ssl=verify_ssl)
 
 
 @cli.command(help="Remove downloaded tags and signatures for a chain")
 @click.argument("chain", default="ethereum", type=click.Choice(["ethereum"]))
-def clean(chain: str):
+@click.option("--old", is_flag=True, help="Only remove the versions other than the current one", default=False)
+def clean(chain: str, old: bool):
     chain = chain.lower()
-    dir = DECODEX_DIR.joinpath(chain)
-    if dir.exists():
-        for f in dir.iterdir():
-            f.unlink()
-        dir.rmdir()
-    else:
+    if old:
+        for version_dir in prune_versions(str(DECODEX_DIR.joinpath(chain)), keep=1):
+            print(f"Removed {version_dir.name}")
+    elif not remove_datasets(chain):
         print(f"{chain} not found")
 
 
@@ -1,3 +1,4 @@
+from .fs import dataset_dir
 from .fs import DECODEX_DIR
 
 
@@ -8,4 +9,5 @@ __all__ = [
     "NULL_ADDRESS_0x0",
     "NULL_ADDRESS_0xF",
     "DECODEX_DIR",
+    "dataset_dir",
 ]
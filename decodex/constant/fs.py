@@ -4,3 +4,17 @@ from pathlib import Path
 
 HOME = Path(os.getenv("VIRTUAL_ENV", Path.home()))
 DECODEX_DIR = HOME.joinpath(".decodex")
+
+
+def dataset_dir(chain: str) -> Path:
+    """
+    Get the directory of the current dataset version of a chain.
+
+    Datasets are installed in versioned directories `~/.decodex/<chain>/versions/<version>`, and
+    `~/.decodex/<chain>/current` links to the one in use. The link is resolved, so a store keeps reading
+    the version it was opened on when a new one is published. Datasets installed before versioning are
+    read from `~/.decodex/<chain>`.
+    """
+    chain_dir = DECODEX_DIR.joinpath(chain)
+    current = chain_dir.joinpath("current")
+    return current.resolve() if current.exists() else chain_dir
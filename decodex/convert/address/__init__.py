@@ -1,8 +1,36 @@
-from .tagger import AddrTagger, JSONAddrTagger, TaggerFactory
+from .binary import BinaryAddrTagger
+from .binary import CompactAddrTagger
+from .binary import compile_tags
+from .binary import encode_tags
+from .overlay import LayeredAddrTagger
+from .overlay import MemoryAddrTagger
+from .record import RecordCache
+from .record import TaggedRecord
+from .record import TaggedToken
+from .sql import compile_tag_db
+from .sql import SQLAddrTagger
+from .tagger import AddrTagger
+from .tagger import BatchAddrTagger
+from .tagger import JSONAddrTagger
+from .tagger import StoreAddrTagger
+from .tagger import TaggerFactory
 
 
 __all__ = [
     "AddrTagger",
+    "StoreAddrTagger",
     "JSONAddrTagger",
+    "BatchAddrTagger",
+    "BinaryAddrTagger",
+    "CompactAddrTagger",
+    "SQLAddrTagger",
+    "MemoryAddrTagger",
+    "LayeredAddrTagger",
     "TaggerFactory",
+    "TaggedRecord",
+    "TaggedToken",
+    "RecordCache",
+    "compile_tags",
+    "encode_tags",
+    "compile_tag_db",
 ]
@@ -0,0 +1,257 @@
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from pathlib import Path
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from .tagger import StoreAddrTagger
+from decodex.constant import dataset_dir
+
+# File layout (little endian)
+# -------------------------------------------------------------------------------
+# header     : magic (8s) | version (I) | n_addr (I) | n_label (I) | n_set (I) | n_id (I) | padding to 32 bytes
+# keys       : n_addr * 20 bytes sorted addresses
+# entries    : one (name blob offset (I), name length (I), label set (I)) per key
+# label sets : one (first label id index (I), label count (I)) per distinct set of labels
+# label ids  : n_id label ids (I), the labels of each set
+# labels     : one (blob offset (I), length (I)) per distinct label
+# blob       : utf-8 names and labels
+# -------------------------------------------------------------------------------
+# Labels are interned: a label is stored once and an address refers to its set of labels,
+# most addresses sharing a few sets like ("token-contract",) or ().
+MAGIC = b"DXTAGDB\x00"
+VERSION = 2
+
+_HEADER = struct.Struct("<8sIIIII4x")
+_ENTRY = struct.Struct("<III")
+_SET = struct.Struct("<II")
+_LABEL = struct.Struct("<II")
+_ADDRESS = re.compile(r"0x[0-9a-f]{40}")
+
+
+def encode_tags(tags: Dict[str, Dict[str, Any]]) -> bytes:
+    """
+    Encode address tags, as loaded from `tags.json`, into the binary format.
+
+    Keys that are not lowercase 0x-prefixed addresses are skipped, as `JSONAddrTagger` never matches them.
+    A missing or null name is stored as an empty string and missing or null labels as no labels.
+
+    Parameters
+    ----------
+    tags : Dict[str, Dict[str, Any]]
+        The tags, keyed by address, each with a `name` and a list of `labels`.
+
+    Returns
+    -------
+    bytes
+        The encoded tag database.
+    """
+    # Lowercase hex addresses sort like their bytes
+    records = sorted(
+        (addr, tag)
+        for addr, tag in tags.items()
+        if isinstance(addr, str) and _ADDRESS.fullmatch(addr) and isinstance(tag, dict)
+    )
+
+    label_sets: Dict[Tuple[str, ...], int] = {}
+    names = [str(tag.get("name") or "").encode() for _, tag in records]
+    entries = np.zeros((len(records), 3), dtype="<u4")
+    entries[:, 1] = [len(name) for name in names]
+    entries[1:, 0] = np.cumsum(entries[:-1, 1])
+    entries[:, 2] = [
+        label_sets.setdefault(tuple(map(str, tag.get("labels") or ())), len(label_sets)) for _, tag in records
+    ]
+    key_section = bytes.fromhex("".join(addr[2:] for addr, _ in records))
+    entry_section = entries.tobytes()
+    blob = bytearray(b"".join(names))
+
+    label_ids: Dict[str, int] = {}
+    set_section = bytearray()
+    id_section = bytearray()
+    n_id = 0
+    for labels in label_sets:
+        set_section += _SET.pack(n_id, len(labels))
+        ids = [label_ids.setdefault(label, len(label_ids)) for label in labels]
+        id_section += struct.pack(f"<{len(ids)}I", *ids)
+        n_id += len(labels)
+
+    label_section = bytearray()
+    for label in label_ids:
+        label_bytes = label.encode()
+        label_section += _LABEL.pack(len(blob), len(label_bytes))
+        blob += label_bytes
+
+    header = _HEADER.pack(MAGIC, VERSION, len(records), len(label_ids), len(label_sets), n_id)
+    return b"".join((header, key_section, entry_section, set_section, id_section, label_section, blob))
+
+
+def compile_tags(src_path: str, dst_path: str) -> None:
+    """
+    Compile a tag JSON file into the binary format read by `BinaryAddrTagger`.
+
+    The output is written to a temporary file first and then moved into place, so processes that
+    already mapped the previous version keep reading a consistent file.
+
+    Parameters
+    ----------
+    src_path : str
+        The path to the tag JSON file.
+    dst_path : str
+        The path to save the compiled tag database to.
+    """
+    with open(src_path, "r") as file:
+        data = encode_tags(json.load(file))
+    tmp_path = Path(f"{dst_path}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, dst_path)
+
+
+class BinaryAddrTagger(StoreAddrTagger):
+    """
+    Tag addresses from a compiled tag database (see `compile_tags`).
+
+    The file is memory-mapped and binary-searched in place: the sorted addresses are searched, then the
+    entry at the same index in the parallel entry table points to the name and labels. Nothing is parsed
+    at startup, so it takes the same time whatever the size of the dataset, and the pages are shared by
+    every process mapping the same file. Tags are the same as `JSONAddrTagger` on the source file.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path to the compiled tag database. Defaults to `~/.decodex/<chain>/tags.bin`
+    chain : str, optional
+        The chain of the default tag database, by default "ethereum".
+
+    Raises
+    ------
+    ValueError
+        If the file does not exist or is not a compiled tag database of a supported version.
+    """
+
+    def __init__(self, path: str = None, chain: str = "ethereum") -> None:
+        if path is None:
+            path = str(dataset_dir(chain).joinpath("tags.bin"))
+        if not os.path.isfile(path):
+            raise ValueError(f"Tag file {path} does not exist")
+
+        super().__init__()
+        with open(path, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_RANDOM"):
+            # Lookups are binary searches, reading ahead would only load pages that are not needed
+            self._buf.madvise(mmap.MADV_RANDOM)
+        self.__validate__()
+
+    def __validate__(self):
+        if len(self._buf) < _HEADER.size:
+            raise ValueError("Tag file is not a compiled tag database")
+        magic, version, n_addr, n_label, n_set, n_id = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Tag file is not a compiled tag database")
+        if version != VERSION:
+            raise ValueError(f"Tag file version {version} is not supported, expected {VERSION}")
+
+        # Searched with NumPy, which compares fixed-width bytes like memcmp
+        self._keys = np.frombuffer(self._buf, dtype="S20", count=n_addr, offset=_HEADER.size)
+        self._entry_offset = _HEADER.size + n_addr * 20
+        self._set_offset = self._entry_offset + n_addr * _ENTRY.size
+        self._id_offset = self._set_offset + n_set * _SET.size
+        self._label_offset = self._id_offset + n_id * 4
+        self._blob_offset = self._label_offset + n_label * _LABEL.size
+        # Label sets are decoded once, on first use
+        self._label_sets: Dict[int, Tuple[str, ...]] = {}
+
+    def _labels(self, set_id: int) -> Tuple[str, ...]:
+        labels = self._label_sets.get(set_id)
+        if labels is None:
+            start, count = _SET.unpack_from(self._buf, self._set_offset + set_id * _SET.size)
+            label_ids = struct.unpack_from(f"<{count}I", self._buf, self._id_offset + start * 4)
+            labels = tuple(self._label(label_id) for label_id in label_ids)
+            self._label_sets[set_id] = labels
+        return labels
+
+    def _label(self, label_id: int) -> str:
+        offset, length = _LABEL.unpack_from(self._buf, self._label_offset + label_id * _LABEL.size)
+        return sys.intern(self._text(offset, length))
+
+    def _text(self, offset: int, length: int) -> str:
+        start = self._blob_offset + offset
+        return self._buf[start : start + length].decode()
+
+    def get_tag(self, address: str) -> Dict[str, Any]:
+        if len(address) != 42 or not address.startswith("0x"):
+            return {}
+        try:
+            key = bytes.fromhex(address[2:])
+        except ValueError:
+            return {}
+
+        idx = int(self._keys.searchsorted(key))
+        start = _HEADER.size + idx * 20
+        if idx == len(self._keys) or self._buf[start : start + 20] != key:
+            return {}
+        name_offset, name_len, set_id = _ENTRY.unpack_from(self._buf, self._entry_offset + idx * _ENTRY.size)
+        return {"name": self._text(name_offset, name_len), "labels": self._labels(set_id)}
+
+    def get_tags(self, addresses: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        tags: Dict[str, Dict[str, Any]] = {}
+        queried: List[str] = []
+        keys: List[bytes] = []
+        for addr in set(addresses):
+            tags[addr] = {}
+            if len(addr) == 42 and addr.startswith("0x"):
+                try:
+                    keys.append(bytes.fromhex(addr[2:]))
+                    queried.append(addr)
+                except ValueError:
+                    pass
+        if not keys or len(self._keys) == 0:
+            return tags
+
+        # One vectorized search for all the addresses, then only the matches are read
+        keys = np.array(keys, dtype="S20")
+        idx = np.minimum(self._keys.searchsorted(keys), len(self._keys) - 1)
+        entries = np.frombuffer(self._buf, dtype="<u4", count=len(self._keys) * 3, offset=self._entry_offset)
+        entries = entries.reshape(-1, 3)
+        for i in np.flatnonzero(self._keys[idx] == keys):
+            name_offset, name_len, set_id = entries[idx[i]].tolist()
+            tags[queried[i]] = {"name": self._text(name_offset, name_len), "labels": self._labels(set_id)}
+        return tags
+
+
+class CompactAddrTagger(BinaryAddrTagger):
+    """
+    Tag addresses from a tag JSON file packed in memory (see `encode_tags`).
+
+    Instead of a dict per address, with its own name string and label list, the tags are held in
+    a single bytes buffer: sorted 20-byte addresses, fixed-size entries, a string table of names and
+    interned labels, each address referring to its set of labels by id. Tags are only materialized
+    as dicts when looked up. Use `BinaryAddrTagger` on the compiled file to also skip parsing the JSON file.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path to the tag JSON file. Defaults to `~/.decodex/<chain>/tags.json`
+    chain : str, optional
+        The chain of the default tag file, by default "ethereum".
+    """
+
+    def __init__(self, path: str = None, chain: str = "ethereum") -> None:
+        if path is None:
+            path = str(dataset_dir(chain).joinpath("tags.json"))
+        if not os.path.isfile(path):
+            raise ValueError(f"Tag file {path} does not exist")
+
+        StoreAddrTagger.__init__(self)
+        with open(path, "r") as file:
+            self._buf = encode_tags(json.load(file))
+        self.__validate__()
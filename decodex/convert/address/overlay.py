@@ -0,0 +1,118 @@
+from threading import Lock
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Sequence
+
+from .tagger import StoreAddrTagger
+
+
+class MemoryAddrTagger(StoreAddrTagger):
+    """
+    Tag addresses from tags held in memory, which can be changed at runtime, e.g. private labels
+    to stack over the shared dataset with `LayeredAddrTagger`.
+
+    Parameters
+    ----------
+    tags : Dict[str, Dict[str, Any]], optional
+        The initial tags, keyed by address, each with a `name` and a list of `labels`, like `tags.json`.
+
+    Example
+    -------
+    >>> overlay = MemoryAddrTagger({"0x22ff777ef6fe0690f1f74c6758126909653ad56a": {"name": "Our Hot Wallet"}})
+    >>> overlay.set_tag("0x6b175474e89094c44da98b954eedeac495271d0f", "Market Maker", ["mm"])
+    """
+
+    def __init__(self, tags: Dict[str, Dict[str, Any]] = None) -> None:
+        super().__init__()
+        self._tags: Dict[str, Dict[str, Any]] = {}
+        self._lock = Lock()
+        self._generation = 0
+        if tags:
+            self.update(tags)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get_tag(self, address: str) -> Dict[str, Any]:
+        return self._tags.get(address, {})
+
+    def set_tag(self, address: str, name: str = "", labels: Sequence[str] = ()) -> None:
+        """
+        Tag an address, replacing its previous tag.
+        """
+        self.update({address: {"name": name, "labels": labels}})
+
+    def update(self, tags: Dict[str, Dict[str, Any]]) -> None:
+        """
+        Tag several addresses at once, replacing their previous tags.
+        """
+        normalized = {
+            addr.lower(): {"name": tag.get("name") or "", "labels": tuple(tag.get("labels") or ())}
+            for addr, tag in tags.items()
+        }
+        with self._lock:
+            # Copy on write, readers never see a dict being modified
+            self._tags = {**self._tags, **normalized}
+            self._generation += 1
+
+    def remove_tag(self, address: str) -> None:
+        """
+        Remove the tag of an address, it is then tagged by the layers below.
+        """
+        with self._lock:
+            self._tags = {addr: tag for addr, tag in self._tags.items() if addr != address.lower()}
+            self._generation += 1
+
+
+class LayeredAddrTagger(StoreAddrTagger):
+    """
+    Tag addresses from an ordered stack of tag stores, the first store tagging an address wins.
+
+    Small overlays, e.g. a `MemoryAddrTagger` of private labels, are stacked over the large shared
+    dataset without copying or merging it. Lookups go through the layers from the top, and the
+    overlays can be updated at runtime: results cached over the stack are dropped when any layer changes.
+
+    Parameters
+    ----------
+    layers : Sequence[StoreAddrTagger]
+        The tag stores, from the top to the base.
+
+    Example
+    -------
+    >>> tagger = LayeredAddrTagger([MemoryAddrTagger(private_tags), BinaryAddrTagger()])
+    """
+
+    def __init__(self, layers: Sequence[StoreAddrTagger]) -> None:
+        super().__init__()
+        if len(layers) == 0:
+            raise ValueError("At least one tag store is required")
+        self._layers = list(layers)
+
+    @property
+    def layers(self) -> Sequence[StoreAddrTagger]:
+        return tuple(self._layers)
+
+    @property
+    def generation(self) -> int:
+        return sum(layer.generation for layer in self._layers)
+
+    def get_tag(self, address: str) -> Dict[str, Any]:
+        for layer in self._layers:
+            tag = layer.get_tag(address)
+            if tag:
+                return tag
+        return {}
+
+    def get_tags(self, addresses: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        # One batch per layer, with only the addresses the layers above did not tag
+        remaining = set(addresses)
+        tags: Dict[str, Dict[str, Any]] = dict.fromkeys(remaining, {})
+        for layer in self._layers:
+            if not remaining:
+                break
+            found = {addr: tag for addr, tag in layer.get_tags(remaining).items() if tag}
+            tags.update(found)
+            remaining.difference_update(found)
+        return tags
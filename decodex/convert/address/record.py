@@ -0,0 +1,148 @@
+from threading import Lock
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+from cachetools import LRUCache
+
+
+class TaggedRecord(dict):
+    """
+    An immutable tagged address, a `TaggedAddr` dict whose labels are a tuple.
+
+    Records are interned by the taggers (see `RecordCache`), so a hot address resolves to the same object
+    every time, which is safe to share across threads without copies. They stay dicts, so they compare
+    equal to and serialize like the dicts taggers used to return. Use `dict(record)` for a mutable copy.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, *args, **kwargs) -> None:
+        # Constructed like a dict, e.g. by `dataclasses.asdict` from the pairs of a record
+        dict.__init__(self, *args, **kwargs)
+        if "labels" in self:
+            dict.__setitem__(self, "labels", tuple(self["labels"]))
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError(f"{type(self).__name__} is immutable")
+
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self) -> int:
+        return hash(tuple(self.values()))
+
+    def __reduce__(self):
+        return type(self), (dict(self),)
+
+
+class TaggedToken(TaggedRecord):
+    """
+    An immutable tagged ERC20 token, an `ERC20Compatible` dict whose labels are a tuple.
+    """
+
+    __slots__ = ()
+
+
+class RecordCache:
+    """
+    Build and intern the records of a tagger, so that the same address, or the same token, gets the same record.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of interned records, by default 65536.
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        self._records: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = Lock()
+        self._generation = 0
+
+    def tag(
+        self, address: Optional[Union[str, Dict]], get_tag: Callable[[str], Dict[str, Any]]
+    ) -> Optional[TaggedRecord]:
+        """
+        Tag an address, or a token dict, with the tag that `get_tag` gives for its lowercase address.
+
+        The name of a token is kept if it has one, otherwise it is the name of the tag. The token dict
+        itself is left untouched. Records are returned as they are.
+        """
+        if address is None:
+            return None
+        if isinstance(address, TaggedRecord):
+            return address
+
+        key = self._key(address)
+        if key is None:
+            return None
+        _relying_addr: str = address["address"] if isinstance(address, dict) else address
+
+        with self._lock:
+            record = self._records.get(key)
+        if record is not None:
+            return record
+
+        if isinstance(address, dict):
+            tag = get_tag(_relying_addr.lower())
+            record = TaggedToken(
+                address=_relying_addr,
+                name=address.get("name") or tag.get("name", ""),
+                labels=tag.get("labels", ()),
+                contract_name=address.get("contract_name"),
+                decimals=address.get("decimals"),
+                symbol=address.get("symbol"),
+            )
+        else:
+            tag = get_tag(address.lower())
+            record = TaggedRecord(address=address, name=tag.get("name", ""), labels=tag.get("labels", ()))
+        with self._lock:
+            return self._records.setdefault(key, record)
+
+    def tag_many(
+        self,
+        addresses: Sequence[Optional[Union[str, Dict]]],
+        get_tags: Callable[[Iterable[str]], Dict[str, Dict[str, Any]]],
+    ) -> List[Optional[TaggedRecord]]:
+        """
+        Tag addresses, or token dicts, like `tag`, resolving the tags of those without a record in one `get_tags` call.
+        """
+        addresses = list(addresses)
+        missing = set()
+        with self._lock:
+            for addr in addresses:
+                if addr is None or isinstance(addr, TaggedRecord):
+                    continue
+                key = self._key(addr)
+                if key is not None and key not in self._records:
+                    missing.add((addr["address"] if isinstance(addr, dict) else addr).lower())
+        tags = get_tags(missing) if missing else {}
+        # A record evicted since is resolved again on its own
+        return [self.tag(addr, lambda key: tags[key] if key in tags else get_tags([key])[key]) for addr in addresses]
+
+    @staticmethod
+    def _key(address: Union[str, Dict]) -> Optional[Hashable]:
+        # A token is keyed by all its fields, as its record keeps them
+        if isinstance(address, dict):
+            if not isinstance(address.get("address", None), str):
+                return None
+            return tuple(address.get(field) for field in ("address", "name", "contract_name", "decimals", "symbol"))
+        return address
+
+    def clear(self) -> None:
+        with self._lock:
+            self._records.clear()
+
+    def sync(self, generation: int) -> None:
+        """
+        Drop the records if the tags changed since the last call, i.e. the `generation` of the store changed.
+        """
+        if generation != self._generation:
+            with self._lock:
+                self._records.clear()
+                self._generation = generation
@@ -0,0 +1,145 @@
+import json
+import os
+import sqlite3
+import sys
+from pathlib import Path
+from threading import Lock
+from typing import Any
+from typing import Dict
+from typing import Generator
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+from .tagger import StoreAddrTagger
+from decodex.constant import dataset_dir
+from decodex.type import ERC20Compatible
+from decodex.type import TaggedAddr
+
+VERSION = 1
+
+# The address is the primary key of a table without rowid, so a lookup is a single index seek
+# and the tags of an address are stored next to it. Labels are a JSON array.
+_SCHEMA = """
+CREATE TABLE tags (
+    address TEXT NOT NULL PRIMARY KEY,
+    name TEXT NOT NULL,
+    labels TEXT NOT NULL
+) WITHOUT ROWID
+"""
+
+_QUERY = "SELECT address, name, labels FROM tags WHERE address IN ({})"
+
+# Lookups are batched by this many addresses, below the default limit of SQLite on bound parameters
+_BATCH_SIZE = 500
+
+
+def compile_tag_db(src_path: str, dst_path: str) -> None:
+    """
+    Compile a tag JSON file into the SQLite database read by `SQLAddrTagger`.
+
+    The database is built in a temporary file first and then moved into place, so processes that
+    already opened the previous version keep reading a consistent file.
+
+    Parameters
+    ----------
+    src_path : str
+        The path to the tag JSON file.
+    dst_path : str
+        The path to save the SQLite database to.
+    """
+    with open(src_path, "r") as file:
+        tags: Dict[str, Any] = json.load(file)
+
+    tmp_path = Path(f"{dst_path}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            conn.execute(_SCHEMA)
+            conn.executemany(
+                "INSERT INTO tags (address, name, labels) VALUES (?, ?, ?)",
+                (
+                    (addr, str(tag.get("name") or ""), json.dumps([str(label) for label in tag.get("labels") or ()]))
+                    for addr, tag in tags.items()
+                    if isinstance(addr, str) and isinstance(tag, dict)
+                ),
+            )
+    finally:
+        conn.close()
+    os.replace(tmp_path, dst_path)
+
+
+class SQLAddrTagger(StoreAddrTagger):
+    """
+    Tag addresses from an indexed SQLite database (see `compile_tag_db`).
+
+    Nothing is loaded into memory at startup, and every process can share the same database file.
+    The database is opened read-only when the tagger is created, and its connection is shared by the threads,
+    one query at a time, so the tagger keeps reading the file once its dataset version is pruned. Addresses are looked up in batches of `IN (...)` queries,
+    and only the addresses without an interned record are looked up. Wrap it in a `BatchAddrTagger`,
+    as the `Translator` does, to also cache the tags of the addresses looked up recently.
+
+    Parameters
+    ----------
+    path : str, optional
+        The path to the SQLite database. Defaults to `~/.decodex/<chain>/tags.db`, which is compiled
+        from `tags.json` into a new dataset version if it does not exist yet (see `ensure_artifacts`).
+    chain : str, optional
+        The chain of the default tag database, by default "ethereum".
+    cache_size : int, optional
+        The number of interned records, by default 65536.
+
+    Raises
+    ------
+    ValueError
+        If the file does not exist or is not a tag database.
+    """
+
+    def __init__(self, path: str = None, chain: str = "ethereum", cache_size: int = 65536) -> None:
+        if path is None:
+            path = str(dataset_dir(chain).joinpath("tags.db"))
+            if not os.path.isfile(path):
+                # Published versions are never modified, the database is compiled into a new one
+                from decodex.installer import ensure_artifacts
+
+                path = str(ensure_artifacts(chain, ["tags.db"]).joinpath("tags.db"))
+        if not os.path.isfile(path):
+            raise ValueError(f"Tag file {path} does not exist")
+
+        super().__init__(cache_size=cache_size)
+        self._conn = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        self._conn_lock = Lock()
+        self.__validate__()
+
+    def __validate__(self):
+        try:
+            self._query([""])
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Tag file is not valid: {e}")
+
+    def _query(self, addresses: List[str]) -> List[Tuple[str, str, str]]:
+        query = _QUERY.format(", ".join("?" * len(addresses)))
+        with self._conn_lock:
+            return self._conn.execute(query, addresses).fetchall()
+
+    def get_tag(self, address: str) -> Dict[str, Any]:
+        return self.get_tags([address])[address.lower()]
+
+    def get_tags(self, addresses: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        keys = list({addr.lower() for addr in addresses})
+        tags: Dict[str, Dict[str, Any]] = {key: {} for key in keys}
+        for i in range(0, len(keys), _BATCH_SIZE):
+            for addr, name, labels in self._query(keys[i : i + _BATCH_SIZE]):
+                tags[addr] = {"name": name, "labels": tuple(sys.intern(label) for label in json.loads(labels))}
+        return tags
+
+    def lazy_tag(
+        self,
+        address: Sequence[Optional[Union[str, Dict]]],
+    ) -> Generator[Optional[Union[TaggedAddr, ERC20Compatible]], None, None]:
+        self._records.sync(self.generation)
+        yield from self._records.tag_many(address, self.get_tags)
@@ -3,15 +3,21 @@ import os
 from abc import ABC
 from abc import abstractmethod
 from pathlib import Path
+from threading import Lock
 from typing import Any
 from typing import Dict
 from typing import Generator
+from typing import Iterable
+from typing import List
 from typing import Literal
 from typing import Optional
 from typing import Sequence
 from typing import Union
 
-from decodex.constant import DECODEX_DIR
+from cachetools import LRUCache
+
+from .record import RecordCache
+from decodex.constant import dataset_dir
 from decodex.type import ERC20Compatible
 from decodex.type import TaggedAddr
 
@@ -51,7 +57,53 @@ class SyncAddrTagger(AddrTagger):
         return list(self.lazy_tag(address))
 
 
-class JSONAddrTagger(SyncAddrTagger):
+class StoreAddrTagger(SyncAddrTagger):
+    """
+    Tag addresses from a store mapping each lowercase address to its tag, a dict with a name and labels.
+
+    Results are immutable records interned per address (see `RecordCache`), token dicts are not modified.
+
+    Parameters
+    ----------
+    cache_size : int, optional
+        The number of interned records, by default 65536.
+    """
+
+    def __init__(self, cache_size: int = 65536) -> None:
+        super().__init__()
+        self._records = RecordCache(maxsize=cache_size)
+
+    @abstractmethod
+    def get_tag(self, address: str) -> Dict[str, Any]:
+        """
+        Get the tag of a lowercase address, an empty dict if the address is not tagged.
+        """
+        raise NotImplementedError
+
+    def get_tags(self, addresses: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the tags of lowercase addresses, keyed by address, an empty dict for the addresses that are not tagged.
+        """
+        return {addr: self.get_tag(addr) for addr in set(addresses)}
+
+    @property
+    def generation(self) -> int:
+        """
+        A counter that changes whenever the tags of the store change, so that caches know to drop their results.
+        It never changes for read-only stores.
+        """
+        return 0
+
+    def lazy_tag(
+        self,
+        address: Sequence[Optional[Union[str, Dict]]],
+    ) -> Generator[Optional[Union[TaggedAddr, ERC20Compatible]], None, None]:
+        self._records.sync(self.generation)
+        for addr in address:
+            yield self._records.tag(addr, self.get_tag)
+
+
+class JSONAddrTagger(StoreAddrTagger):
     """
     A class for tagging addresses using data from a JSON file.
 
@@ -83,57 +135,154 @@ class JSONAddrTagger(SyncAddrTagger):
 
     def __init__(self, path: str = None, chain: str = "ethereum") -> None:
         if path is None:
-            path = str(DECODEX_DIR.joinpath(chain, "tags.json"))
+            path = str(dataset_dir(chain).joinpath("tags.json"))
         assert os.path.isfile(path), f"Path {path} is not a file."
         assert path.endswith(".json"), f"Path {path} is not a JSON file."
 
+        super().__init__()
         with open(path, "r") as file:
             self._addr_tags: Dict[str, Any] = json.load(file)
 
+    def get_tag(self, address: str) -> Dict[str, Any]:
+        return self._addr_tags.get(address, {})
+
+
+class BatchAddrTagger(AddrTagger):
+    """
+    Tag many addresses per call against a tag store, e.g. all the addresses of a transaction or a block.
+
+    The addresses of a call are normalized and deduplicated once, then the ones not seen recently are
+    resolved in a single `get_tags` pass against the store, which `BinaryAddrTagger` vectorizes. Resolved tags
+    are kept in an LRU cache, so the small calls of the event handlers following a batch call are cache hits.
+    Results are immutable records interned per address, shared by every call (see `RecordCache`).
+
+    Parameters
+    ----------
+    store : StoreAddrTagger
+        The tag store, e.g. a `BinaryAddrTagger`.
+    cache_size : int, optional
+        The number of addresses whose tags are cached, by default 65536.
+
+    Example
+    -------
+    >>> tagger = BatchAddrTagger(BinaryAddrTagger())
+    >>> tagger.get_tags(addresses_of_block)
+    >>> tagged = tagger([sender, receiver])
+    """
+
+    def __init__(self, store: StoreAddrTagger, cache_size: int = 65536) -> None:
+        super().__init__()
+        self._store = store
+        self._cache: LRUCache = LRUCache(maxsize=cache_size)
+        self._lock = Lock()
+        self._records = RecordCache(maxsize=cache_size)
+        self._generation = store.generation
+
+    def get_tags(self, addresses: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Resolve the tags of addresses in one pass, keyed by lowercase address.
+        """
+        generation = self._store.generation
+        if generation != self._generation:
+            # The tags of the store changed, e.g. an overlay was updated
+            with self._lock:
+                self._cache.clear()
+                self._generation = generation
+            self._records.sync(generation)
+        keys = {addr.lower() for addr in addresses if isinstance(addr, str)}
+        with self._lock:
+            tags = {key: self._cache[key] for key in keys if key in self._cache}
+        missing = keys.difference(tags)
+        if missing:
+            resolved = self._store.get_tags(missing)
+            with self._lock:
+                self._cache.update(resolved)
+            tags.update(resolved)
+        return tags
+
     def lazy_tag(
         self,
         address: Sequence[Optional[Union[str, Dict]]],
     ) -> Generator[Optional[Union[TaggedAddr, ERC20Compatible]], None, None]:
+        address = list(address)
+        tags = self.get_tags(addr.get("address") if isinstance(addr, dict) else addr for addr in address if addr)
         for addr in address:
-            if addr is None:
-                yield None
-                continue
-            if isinstance(addr, dict):
-                _relying_addr: Optional[str] = addr.get("address", None)
-                if _relying_addr is None or not isinstance(_relying_addr, str):
-                    yield None
-                    continue
-                tag: Dict[str, Any] = self._addr_tags.get(_relying_addr.lower(), {})
-                addr["name"] = addr["name"] or tag.get("name", "")
-                addr["labels"] = tag.get("labels", [])
-                yield addr
-            else:
-                tag: Dict[str, Any] = self._addr_tags.get(addr.lower(), {})
-                yield {
-                    "address": addr,
-                    "name": tag.get("name", ""),
-                    "labels": tag.get("labels", []),
-                }
-
-
-class BatchAddrTagger(AddrTagger):
-    def __init__(self) -> None:
-        super().__init__()
+            yield self._records.tag(addr, lambda key: tags.get(key, {}))
 
     def __call__(
-        self, address: Sequence[Optional[str]] | Optional[str]
-    ) -> Sequence[Union[TaggedAddr, ERC20Compatible]]:
-        raise NotImplementedError
+        self, address: Union[Sequence[Optional[Union[str, Dict]]], Optional[str]]
+    ) -> Sequence[Optional[Union[TaggedAddr, ERC20Compatible]]]:
+        if address is None:
+            return [None]
+        if isinstance(address, str):
+            address = [address]
+        return list(self.lazy_tag(address))
 
 
 class TaggerFactory:
     @staticmethod
     def create(
-        tagger_type: Literal["json", "sql"],
+        tagger_type: Literal["json", "bin", "compact", "sql"],
         uri: str = None,
         chain: str = "ethereum",
+        overlays: Sequence[Union[StoreAddrTagger, Dict[str, Dict[str, Any]], str]] = (),
     ) -> AddrTagger:
+        """
+        Create an address tagger.
+
+        Parameters
+        ----------
+        tagger_type : Literal["json", "bin", "compact", "sql"]
+            - "json": JSONAddrTagger, the raw tag file loaded in memory.
+            - "bin": BinaryAddrTagger, the compiled tag database memory-mapped from disk.
+            - "compact": CompactAddrTagger, the raw tag file packed into a single buffer in memory.
+            - "sql": SQLAddrTagger, an indexed SQLite database fronted by an LRU cache.
+        uri : str, optional
+            The path of the tag file, by default the one of the chain in `~/.decodex`.
+        chain : str, optional
+            The chain of the default tag file, by default "ethereum".
+        overlays : Sequence[Union[StoreAddrTagger, Dict[str, Dict[str, Any]], str]], optional
+            Tag stores stacked over the created one, from the top, see `LayeredAddrTagger`. Each is a tag store,
+            tags like `tags.json` loaded into a `MemoryAddrTagger` that can be updated at runtime, or the path
+            of a tag JSON file. By default none.
+
+        Example
+        -------
+        >>> private = MemoryAddrTagger({"0x22ff777ef6fe0690f1f74c6758126909653ad56a": {"name": "Our Hot Wallet"}})
+        >>> tagger = TaggerFactory.create("bin", overlays=[private])
+        >>> private.set_tag("0x6b175474e89094c44da98b954eedeac495271d0f", "Market Maker", ["mm"])
+        """
         if tagger_type == "json":
-            return JSONAddrTagger(path=uri, chain=chain)
+            tagger = JSONAddrTagger(path=uri, chain=chain)
+        elif tagger_type == "bin":
+            from .binary import BinaryAddrTagger
+
+            tagger = BinaryAddrTagger(path=uri, chain=chain)
+        elif tagger_type == "compact":
+            from .binary import CompactAddrTagger
+
+            tagger = CompactAddrTagger(path=uri, chain=chain)
+        elif tagger_type == "sql":
+            from .sql import SQLAddrTagger
+
+            tagger = SQLAddrTagger(path=uri, chain=chain)
         else:
             raise ValueError(f"Unknown tagger type: {tagger_type}")
+
+        if not overlays:
+            return tagger
+
+        from .overlay import LayeredAddrTagger
+        from .overlay import MemoryAddrTagger
+
+        layers: List[StoreAddrTagger] = []
+        for overlay in overlays:
+            if isinstance(overlay, StoreAddrTagger):
+                layers.append(overlay)
+            elif isinstance(overlay, dict):
+                layers.append(MemoryAddrTagger(overlay))
+            elif isinstance(overlay, str):
+                layers.append(JSONAddrTagger(path=overlay))
+            else:
+                raise ValueError(f"Unknown tag overlay: {overlay!r}")
+        return LayeredAddrTagger(layers + [tagger])
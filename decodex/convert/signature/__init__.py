@@ -1,3 +1,27 @@
-from .signature import SignatureLookUp, SignatureFactory
+from .binary import BinarySignatureLookUp
+from .binary import CompactSignatureLookUp
+from .binary import compile_signatures
+from .signature import CSVSignatureLookUp
+from .signature import SignatureFactory
+from .signature import SignatureLookUp
+from .sql import compile_signature_db
+from .sql import SQLSignatureLookUp
+from .sql import update_signature_db
+from .update import apply_signature_delta
+from .update import merge_signatures
+from .update import read_signature_delta
 
-__all__ = ["SignatureLookUp", "SignatureFactory"]
+__all__ = [
+    "SignatureLookUp",
+    "CSVSignatureLookUp",
+    "BinarySignatureLookUp",
+    "CompactSignatureLookUp",
+    "SQLSignatureLookUp",
+    "SignatureFactory",
+    "compile_signatures",
+    "compile_signature_db",
+    "update_signature_db",
+    "apply_signature_delta",
+    "merge_signatures",
+    "read_signature_delta",
+]
@@ -0,0 +1,203 @@
+import mmap
+import os
+import struct
+from bisect import bisect_left
+from bisect import bisect_right
+from pathlib import Path
+from typing import Dict
+from typing import Generator
+from typing import Tuple
+
+import pandas as pd
+
+from .signature import SignatureLookUp
+from decodex.constant import dataset_dir
+from decodex.utils.keyview import KeyView
+
+# File layout (little endian)
+# -------------------------------------------------------------------------------
+# header   : magic (8s) | version (I) | n_sel (I) | n_topic (I) | padding to 32 bytes
+# keys     : n_sel * 4 bytes sorted selectors, then n_topic * 32 bytes sorted topics
+# entries  : one (blob offset (Q), abi length (I), text_sign length (I)) per key
+# blob     : utf-8 abi immediately followed by its utf-8 text_sign
+# -------------------------------------------------------------------------------
+# Keys are stored once per candidate, so a selector with several candidates occupies
+# a contiguous run of equal keys whose entries are ordered by descending score.
+MAGIC = b"DXSIGDB\x00"
+VERSION = 1
+
+_HEADER = struct.Struct("<8sIII12x")
+_ENTRY = struct.Struct("<QII")
+
+
+def encode_signatures(df: pd.DataFrame) -> bytes:
+    """
+    Encode a signature table with the columns `byte_sign`, `abi`, `text_sign` and `score` into the binary format.
+
+    Rows whose `byte_sign` is neither a 4-byte function selector nor a 32-byte event topic are skipped.
+
+    Parameters
+    ----------
+    df : pd.DataFrame
+        The signature table, as stored in `signatures.csv`.
+
+    Returns
+    -------
+    bytes
+        The encoded signature database.
+    """
+    keys = df["byte_sign"].astype(str).str.lower()
+    df = df.assign(_key=keys, _width=(keys.str.len() - 2) // 2)
+    df = df[keys.str.startswith("0x") & df["_width"].isin((4, 32))]
+    # Order by (width, key, -score), stable so that ties keep the file order
+    df = df.sort_values(by="score", ascending=False, kind="stable")
+    df = df.sort_values(by=["_width", "_key"], kind="stable")
+
+    n_sel = int((df["_width"] == 4).sum())
+    n_topic = len(df) - n_sel
+
+    key_section = bytearray()
+    entry_section = bytearray()
+    blob = bytearray()
+    blob_start = _HEADER.size + n_sel * 4 + n_topic * 32 + len(df) * _ENTRY.size
+    for key, abi, text_sign in zip(df["_key"], df["abi"], df["text_sign"]):
+        abi_bytes, text_bytes = str(abi).encode(), str(text_sign).encode()
+        key_section += bytes.fromhex(key[2:])
+        entry_section += _ENTRY.pack(blob_start + len(blob), len(abi_bytes), len(text_bytes))
+        blob += abi_bytes
+        blob += text_bytes
+
+    return _HEADER.pack(MAGIC, VERSION, n_sel, n_topic) + bytes(key_section) + bytes(entry_section) + bytes(blob)
+
+
+def compile_signatures(src_path: str, dst_path: str) -> None:
+    """
+    Compile a signature CSV file into the binary format read by `BinarySignatureLookUp`.
+
+    The output is written to a temporary file first and then moved into place, so processes that
+    already mapped the previous version keep reading a consistent file.
+
+    Parameters
+    ----------
+    src_path : str
+        The path to the signature CSV file.
+    dst_path : str
+        The path to save the compiled signature database to.
+    """
+    save_signatures(pd.read_csv(src_path), dst_path)
+
+
+def save_signatures(df: pd.DataFrame, dst_path: str) -> None:
+    """
+    Encode a signature table (see `encode_signatures`) and atomically replace the file at `dst_path` with it.
+    """
+    data = encode_signatures(df)
+    tmp_path = Path(f"{dst_path}.{os.getpid()}.tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, dst_path)
+
+
+class BinarySignatureLookUp(SignatureLookUp):
+    """
+    Look up signatures from a compiled signature database (see `compile_signatures`).
+
+    The file is memory-mapped and binary-searched in place, nothing is parsed at startup and the pages
+    are shared by every process mapping the same file.
+
+    Parameters
+    ----------
+    uri : str, optional
+        The path to the compiled signature database. Defaults to `~/.decodex/<chain>/signatures.bin`
+    chain : str, optional
+        The chain of the default signature database, by default "ethereum".
+    """
+
+    exact_contains = True
+
+    def __init__(self, uri: str = None, chain: str = "ethereum") -> None:
+        super().__init__()
+        if uri is None:
+            uri = dataset_dir(chain).joinpath("signatures.bin")
+        if not os.path.isfile(uri):
+            raise ValueError(f"Signature lookup file {uri} does not exist")
+
+        with open(uri, "rb") as f:
+            self._buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__validate__()
+
+    def __validate__(self):
+        if len(self._buf) < _HEADER.size:
+            raise ValueError("Signature lookup file is not a compiled signature database")
+        magic, version, n_sel, n_topic = _HEADER.unpack_from(self._buf, 0)
+        if magic != MAGIC:
+            raise ValueError("Signature lookup file is not a compiled signature database")
+        if version != VERSION:
+            raise ValueError(f"Signature lookup file version {version} is not supported, expected {VERSION}")
+
+        key_offset = _HEADER.size
+        self._entry_offset = key_offset + n_sel * 4 + n_topic * 32
+        self._keys: Dict[int, Tuple[KeyView, int]] = {
+            4: (KeyView(self._buf, key_offset, 4, n_sel), 0),
+            32: (KeyView(self._buf, key_offset + n_sel * 4, 32, n_topic), n_sel),
+        }
+
+    def _range(self, byte_sign: str) -> range:
+        """
+        Get the range of entries whose key is the given signature.
+        """
+        try:
+            key = bytes.fromhex(byte_sign[2:])
+        except ValueError:
+            return range(0)
+        if len(key) not in self._keys:
+            return range(0)
+
+        keys, base = self._keys[len(key)]
+        lo = bisect_left(keys, key)
+        if lo == len(keys) or keys[lo] != key:
+            return range(0)
+        hi = bisect_right(keys, key, lo)
+        return range(base + lo, base + hi)
+
+    def __contains__(self, byte_sign: str) -> bool:
+        return len(self._range(byte_sign)) > 0
+
+    def __call__(self, byte_sign: str) -> Generator[Tuple[str, str], None, None]:
+        for idx in self._range(byte_sign):
+            offset, abi_len, text_len = _ENTRY.unpack_from(self._buf, self._entry_offset + idx * _ENTRY.size)
+            abi = self._buf[offset : offset + abi_len]
+            text_sign = self._buf[offset + abi_len : offset + abi_len + text_len]
+            yield abi.decode(), text_sign.decode()
+
+
+class CompactSignatureLookUp(BinarySignatureLookUp):
+    """
+    Look up signatures from a signature CSV file packed in memory (see `encode_signatures`).
+
+    Instead of a Python string per selector, ABI and text signature, the whole registry is held in
+    a single bytes buffer: fixed-width sorted selectors and topics, fixed-size offset entries and one
+    blob of UTF-8 text. Lookups are binary searches and only the matching candidates are decoded to `str`.
+
+    Parameters
+    ----------
+    uri : str, optional
+        The path to the signature CSV file. Defaults to `~/.decodex/<chain>/signatures.csv`
+    chain : str, optional
+        The chain of the default signature file, by default "ethereum".
+    """
+
+    def __init__(self, uri: str = None, chain: str = "ethereum") -> None:
+        SignatureLookUp.__init__(self)
+        if uri is None:
+            uri = dataset_dir(chain).joinpath("signatures.csv")
+        if not os.path.isfile(uri):
+            raise ValueError(f"Signature lookup file {uri} does not exist")
+
+        try:
+            df = pd.read_csv(uri, usecols=["byte_sign", "abi", "text_sign", "score"])
+        except ValueError as e:
+            raise ValueError(f"Signature lookup file is not valid: {e}")
+        if df.empty:
+            raise ValueError("Signature lookup file is empty")
+        self._buf = encode_signatures(df)
+        self.__validate__()
@@ -1,17 +1,26 @@
 import json
 import os
+from functools import cached_property
+from threading import Lock
+from typing import BinaryIO
 from typing import Callable
 from typing import Dict
 from typing import Generator
+from typing import List
 from typing import Literal
+from typing import Optional
 from typing import Tuple
 
 import pandas as pd
 
-from decodex.constant import DECODEX_DIR
+from decodex.constant import dataset_dir
 
 
 class SignatureLookUp:
+    # Whether `__contains__` is exact and as cheap as probing a cache, e.g. a dictionary lookup.
+    # Callers then check it directly instead of remembering the absent signatures.
+    exact_contains: bool = False
+
     def __init__(self) -> None:
         pass
 
@@ -32,39 +41,87 @@ class SignatureLookUp:
         """
         raise NotImplementedError
 
+    def __contains__(self, byte_sign: str) -> bool:
+        """
+        Check whether the signature may have candidates in the database.
+
+        This is a cheap pre-check before `__call__`: implementations may return True for signatures that
+        are absent (e.g. false positives of a Bloom filter), but never return False for present ones.
+        """
+        return next(iter(self(byte_sign)), None) is not None
+
 
 class CSVSignatureLookUp(SignatureLookUp):
+    """
+    Look up signatures from a CSV file with the columns `byte_sign`, `abi`, `text_sign` and `score`.
+
+    The file is indexed once at load time into a mapping of `byte_sign` to the list of (abi, text_sign)
+    candidates, pre-sorted by descending score, so each lookup is a single dictionary access. The table
+    itself is not kept in memory, `df` reads it again the first time it is accessed. A local file is kept
+    open for that, so `df` is still available once its dataset version is pruned.
+    """
+
+    exact_contains = True
+
     def __init__(self, uri: str = None, chain: str = "ethereum") -> None:
         super().__init__()
         if uri is None:
-            uri = DECODEX_DIR.joinpath(chain, "signatures.csv")
+            uri = dataset_dir(chain).joinpath("signatures.csv")
             if not os.path.isfile(uri):
                 raise ValueError(f"Signature lookup file {uri} does not exist")
-        self.df = pd.read_csv(uri)
-        self.__validate__()
+        self._uri = uri
+        self._file: Optional[BinaryIO] = open(uri, "rb") if os.path.isfile(uri) else None
+        self._file_lock = Lock()
+        df = self._read()
+        self.__validate__(df)
+        self._index = self.__build_index__(df)
+
+    @cached_property
+    def df(self) -> pd.DataFrame:
+        """
+        The signature table, with the columns `byte_sign`, `abi`, `text_sign` and `score`.
+        """
+        return self._read()
+
+    def _read(self) -> pd.DataFrame:
+        if self._file is None:
+            return pd.read_csv(self._uri)
+        with self._file_lock:
+            self._file.seek(0)
+            return pd.read_csv(self._file)
 
-    def __validate__(self):
-        if self.df.empty:
+    def __validate__(self, df: pd.DataFrame):
+        if df.empty:
             raise ValueError("Signature lookup file is empty")
 
-        cols = set(self.df.columns)
+        cols = set(df.columns)
         expected_cols = {"byte_sign", "abi", "text_sign", "score"}
         if cols != expected_cols:
             raise ValueError(
                 f"Signature lookup file is not valid, expected columns: {', '.join(expected_cols)}, but got: {', '.join(cols)}"
             )
 
-    def __call__(self, byte_sign: str) -> Generator[Tuple[str, str], None, None]:
-        rows = self.df[self.df["byte_sign"] == byte_sign]
-        if rows.empty:
-            return {}, ""
-
-        # If there are multiple rows, return the one with the highest score
-        rows = rows.sort_values(by="score", ascending=False)
+    @staticmethod
+    def __build_index__(df: pd.DataFrame) -> Dict[str, List[Tuple[str, str]]]:
+        # Sort once so that every candidate list is already ordered by the highest score,
+        # a stable sort keeps the file order for candidates with the same score.
+        df = df.sort_values(by="score", ascending=False, kind="stable")
+
+        index: Dict[str, List[Tuple[str, str]]] = {}
+        for byte_sign, abi, text_sign in zip(df["byte_sign"], df["abi"], df["text_sign"]):
+            candidates = index.get(byte_sign)
+            if candidates is None:
+                index[byte_sign] = [(abi, text_sign)]
+            else:
+                candidates.append((abi, text_sign))
+        return index
+
+    def __contains__(self, byte_sign: str) -> bool:
+        return byte_sign in self._index
 
-        # Return all rows
-        for _, row in rows.iterrows():
-            yield row["abi"], row["text_sign"]
+    def __call__(self, byte_sign: str) -> Generator[Tuple[str, str], None, None]:
+        # Return all candidates, the one with the highest score comes first
+        yield from self._index.get(byte_sign, ())
 
 
 class SignatureFactory:
@@ -73,7 +130,7 @@ class SignatureFactory:
 
     Methods
     -------
-    create(fmt: Literal["csv"], uri: str = None) -> SignatureLookUp:
+    create(fmt: Literal["csv", "bin", "compact", "sql"], uri: str = None, **kwargs) -> SignatureLookUp:
         Creates and returns an instance of a SignatureLookUp subclass based on the specified format.
 
     Example
@@ -83,11 +140,17 @@ class SignatureFactory:
 
     Parameters for static methods
     ------------------------------
-    fmt : Literal["csv"]
-        The format of the SignatureLookUp to instantiate. Currently, only "csv" is supported.
+    fmt : Literal["csv", "bin", "compact", "sql"]
+        The format of the SignatureLookUp to instantiate.
+        - "csv": CSVSignatureLookUp, the raw signature file indexed in memory.
+        - "bin": BinarySignatureLookUp, the compiled signature database memory-mapped from disk.
+        - "compact": CompactSignatureLookUp, the raw signature file packed into a single buffer in memory.
+        - "sql": SQLSignatureLookUp, an indexed SQLite database, optionally fronted by an LRU cache.
     uri : str, optional
         The URI where the signature lookup file can be found. Defaults to None, which may use a defaul value in their constructor.
         For example, CSVSignatureLookUp uses "~/.decodex/signatures.csv" as the default value.
+    kwargs : Dict
+        Extra arguments passed to the constructor, e.g. `cache_size` of SQLSignatureLookUp.
 
     Returns
     -------
@@ -102,11 +165,24 @@ class SignatureFactory:
 
     @staticmethod
     def create(
-        fmt: Literal["csv"],
+        fmt: Literal["csv", "bin", "compact", "sql"],
         uri: str = None,
         chain: str = "ethereum",
+        **kwargs,
     ) -> SignatureLookUp:
         if fmt == "csv":
-            return CSVSignatureLookUp(uri=uri, chain=chain)
+            return CSVSignatureLookUp(uri=uri, chain=chain, **kwargs)
+        elif fmt == "bin":
+            from .binary import BinarySignatureLookUp
+
+            return BinarySignatureLookUp(uri=uri, chain=chain, **kwargs)
+        elif fmt == "compact":
+            from .binary import CompactSignatureLookUp
+
+            return CompactSignatureLookUp(uri=uri, chain=chain, **kwargs)
+        elif fmt == "sql":
+            from .sql import SQLSignatureLookUp
+
+            return SQLSignatureLookUp(uri=uri, chain=chain, **kwargs)
         else:
             raise ValueError(f"Signature lookup format {fmt} is not supported")
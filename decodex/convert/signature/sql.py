@@ -0,0 +1,207 @@
+import os
+import sqlite3
+from pathlib import Path
+from threading import Lock
+from typing import Generator
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import pandas as pd
+from cachetools import LRUCache
+
+from .signature import SignatureLookUp
+from decodex.constant import dataset_dir
+from decodex.utils.bloom import BloomFilter
+
+VERSION = 1
+
+# Rows are clustered by (byte_sign, rank) and rank is the position of the candidate by descending score,
+# so a lookup is a single range scan on the primary key that returns the candidates already ordered.
+_SCHEMA = """
+CREATE TABLE signatures (
+    byte_sign TEXT NOT NULL,
+    rank INTEGER NOT NULL,
+    abi TEXT NOT NULL,
+    text_sign TEXT NOT NULL,
+    score INTEGER NOT NULL,
+    PRIMARY KEY (byte_sign, rank)
+) WITHOUT ROWID
+"""
+
+_QUERY = "SELECT abi, text_sign FROM signatures WHERE byte_sign = ? ORDER BY rank"
+
+# A Bloom filter of every byte_sign, to reject unknown signatures without a query
+_BLOOM_SCHEMA = "CREATE TABLE bloom (data BLOB NOT NULL)"
+
+
+def compile_signature_db(src_path: str, dst_path: str) -> None:
+    """
+    Compile a signature CSV file into the SQLite database read by `SQLSignatureLookUp`.
+
+    The database is built in a temporary file first and then moved into place, so processes that
+    already opened the previous version keep reading a consistent file.
+
+    Parameters
+    ----------
+    src_path : str
+        The path to the signature CSV file.
+    dst_path : str
+        The path to save the SQLite database to.
+    """
+    df = pd.read_csv(src_path)
+    df = df.sort_values(by="score", ascending=False, kind="stable")
+    df = df.assign(rank=df.groupby("byte_sign", sort=False).cumcount())
+
+    tmp_path = Path(f"{dst_path}.{os.getpid()}.tmp")
+    tmp_path.unlink(missing_ok=True)
+    conn = sqlite3.connect(tmp_path)
+    try:
+        with conn:
+            conn.execute(_SCHEMA)
+            conn.executemany(
+                "INSERT INTO signatures (byte_sign, rank, abi, text_sign, score) VALUES (?, ?, ?, ?, ?)",
+                zip(
+                    df["byte_sign"].astype(str),
+                    df["rank"].astype(int).tolist(),
+                    df["abi"].astype(str),
+                    df["text_sign"].astype(str),
+                    df["score"].astype(int).tolist(),
+                ),
+            )
+            conn.execute(_BLOOM_SCHEMA)
+            bloom = BloomFilter.from_keys(df["byte_sign"].astype(str).unique())
+            conn.execute("INSERT INTO bloom (data) VALUES (?)", (bloom.to_bytes(),))
+    finally:
+        conn.close()
+    os.replace(tmp_path, dst_path)
+
+
+def update_signature_db(db_path: str, delta: pd.DataFrame) -> None:
+    """
+    Upsert the rows of a signature delta (see `read_signature_delta`) into a SQLite database in place.
+
+    Only the signatures of the delta are rewritten, their candidates are re-ranked by descending score
+    and the Bloom filter is extended with the new signatures, all in a single transaction so readers
+    never see a partial update.
+
+    Parameters
+    ----------
+    db_path : str
+        The path to the SQLite database.
+    delta : pd.DataFrame
+        The rows to upsert, with the columns `byte_sign`, `abi`, `text_sign` and `score`.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        with conn:
+            new_signs = []
+            for byte_sign, rows in delta.groupby(delta["byte_sign"].astype(str), sort=False):
+                existing = conn.execute(
+                    "SELECT abi, text_sign, score FROM signatures WHERE byte_sign = ? ORDER BY rank", (byte_sign,)
+                ).fetchall()
+                if not existing:
+                    new_signs.append(byte_sign)
+                # Upsert on the ABI, updated candidates move after the others like in `merge_signatures`
+                candidates = {abi: (abi, text_sign, score) for abi, text_sign, score in existing}
+                for abi, text_sign, score in zip(rows["abi"].astype(str), rows["text_sign"].astype(str), rows["score"]):
+                    candidates.pop(abi, None)
+                    candidates[abi] = (abi, text_sign, int(score))
+                ranked = sorted(candidates.values(), key=lambda candidate: -candidate[2])
+
+                conn.execute("DELETE FROM signatures WHERE byte_sign = ?", (byte_sign,))
+                conn.executemany(
+                    "INSERT INTO signatures (byte_sign, rank, abi, text_sign, score) VALUES (?, ?, ?, ?, ?)",
+                    [(byte_sign, rank, *candidate) for rank, candidate in enumerate(ranked)],
+                )
+
+            try:
+                row = conn.execute("SELECT data FROM bloom LIMIT 1").fetchone()
+            except sqlite3.OperationalError:
+                row = None
+            if row is not None and new_signs:
+                bloom = BloomFilter.from_bytes(row[0])
+                for byte_sign in new_signs:
+                    bloom.add(byte_sign)
+                conn.execute("UPDATE bloom SET data = ?", (bloom.to_bytes(),))
+    finally:
+        conn.close()
+
+
+class SQLSignatureLookUp(SignatureLookUp):
+    """
+    Look up signatures from an indexed SQLite database (see `compile_signature_db`).
+
+    Nothing is loaded into memory at startup, and every process can share the same database file.
+    The database is opened read-only when the lookup is created, and its connection is shared by the
+    threads, one query at a time. The lookup keeps reading the file once its dataset version is pruned.
+
+    Parameters
+    ----------
+    uri : str, optional
+        The path to the SQLite database. Defaults to `~/.decodex/<chain>/signatures.db`, which is compiled
+        from `signatures.csv` into a new dataset version if it does not exist yet (see `ensure_artifacts`).
+    chain : str, optional
+        The chain of the default signature database, by default "ethereum".
+    cache_size : int, optional
+        The number of selectors whose candidates are kept in an in-process LRU cache, by default 0 (no cache).
+        Only the selectors that are actually looked up are loaded, so the cache holds the hot subset.
+    """
+
+    def __init__(self, uri: str = None, chain: str = "ethereum", cache_size: int = 0) -> None:
+        super().__init__()
+        if uri is None:
+            uri = dataset_dir(chain).joinpath("signatures.db")
+            if not os.path.isfile(uri):
+                # Published versions are never modified, the database is compiled into a new one
+                from decodex.installer import ensure_artifacts
+
+                uri = ensure_artifacts(chain, ["signatures.db"]).joinpath("signatures.db")
+        if not os.path.isfile(uri):
+            raise ValueError(f"Signature lookup file {uri} does not exist")
+
+        self._conn = sqlite3.connect(f"{Path(uri).resolve().as_uri()}?mode=ro", uri=True, check_same_thread=False)
+        self._conn_lock = Lock()
+        self._cache: Optional[LRUCache] = LRUCache(maxsize=cache_size) if cache_size > 0 else None
+        self._cache_lock = Lock()
+        self.__validate__()
+
+    def __validate__(self):
+        try:
+            self._query("")
+        except sqlite3.DatabaseError as e:
+            raise ValueError(f"Signature lookup file is not valid: {e}")
+
+        # Databases compiled without a Bloom filter are still valid, every lookup then hits the index
+        self._bloom: Optional[BloomFilter] = None
+        try:
+            with self._conn_lock:
+                row = self._conn.execute("SELECT data FROM bloom LIMIT 1").fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row is not None:
+            self._bloom = BloomFilter.from_bytes(row[0])
+
+    def _query(self, byte_sign: str) -> List[Tuple[str, str]]:
+        with self._conn_lock:
+            return self._conn.execute(_QUERY, (byte_sign,)).fetchall()
+
+    def __contains__(self, byte_sign: str) -> bool:
+        if self._bloom is not None:
+            return byte_sign in self._bloom
+        return super().__contains__(byte_sign)
+
+    def __call__(self, byte_sign: str) -> Generator[Tuple[str, str], None, None]:
+        if self._bloom is not None and byte_sign not in self._bloom:
+            return
+        if self._cache is None:
+            yield from self._query(byte_sign)
+            return
+
+        with self._cache_lock:
+            rows = self._cache.get(byte_sign)
+        if rows is None:
+            rows = self._query(byte_sign)
+            with self._cache_lock:
+                self._cache[byte_sign] = rows
+        yield from rows
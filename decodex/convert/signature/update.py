@@ -0,0 +1,87 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+import pandas as pd
+
+from .binary import save_signatures
+from .sql import update_signature_db
+
+_COLUMNS = ["byte_sign", "abi", "text_sign", "score"]
+
+
+def read_signature_delta(delta_path: str) -> pd.DataFrame:
+    """
+    Read a signature delta file, a CSV file with the columns of `signatures.csv`.
+
+    Each row is upserted on (`byte_sign`, `abi`): it replaces the row with the same ABI for the
+    signature, e.g. to change its score, or adds a new candidate.
+
+    Raises
+    ------
+    ValueError
+        If the delta file does not have the expected columns.
+    """
+    delta = pd.read_csv(delta_path)
+    if set(delta.columns) != set(_COLUMNS):
+        raise ValueError(
+            f"Signature delta file is not valid, expected columns: {', '.join(_COLUMNS)}, "
+            f"but got: {', '.join(delta.columns)}"
+        )
+    return delta[_COLUMNS]
+
+
+def merge_signatures(df: pd.DataFrame, delta: pd.DataFrame) -> pd.DataFrame:
+    """
+    Upsert the rows of a signature delta into a signature table, see `read_signature_delta`.
+    Updated rows move to the end of the table, after the rows with the same score.
+    """
+    merged = pd.concat([df[_COLUMNS], delta[_COLUMNS]], ignore_index=True)
+    return merged.drop_duplicates(subset=["byte_sign", "abi"], keep="last").reset_index(drop=True)
+
+
+def apply_signature_delta(
+    delta_path: str,
+    csv_path: str,
+    bin_path: Optional[str] = None,
+    db_path: Optional[str] = None,
+) -> int:
+    """
+    Apply a signature delta file to the installed signature stores, instead of downloading the whole registry again.
+
+    Only the SQLite database is updated incrementally, in place and in a single transaction touching only
+    the signatures of the delta. The CSV file and the binary database cannot be updated in place, so they
+    are fully rewritten: the CSV file is merged with the delta and replaced atomically,
+    and the binary database is re-encoded from the merged table. Both take time proportional to the whole
+    registry, not to the delta. Stores that do not exist are skipped.
+
+    Parameters
+    ----------
+    delta_path : str
+        The path to the signature delta file.
+    csv_path : str
+        The path to the installed signature CSV file.
+    bin_path : str, optional
+        The path to the compiled signature database, by default None.
+    db_path : str, optional
+        The path to the SQLite signature database, by default None.
+
+    Returns
+    -------
+    int
+        The number of rows in the delta.
+    """
+    delta = read_signature_delta(delta_path)
+    if delta.empty:
+        return 0
+
+    merged = merge_signatures(pd.read_csv(csv_path), delta)
+    tmp_path = Path(f"{csv_path}.tmp")
+    merged.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, csv_path)
+
+    if db_path is not None and os.path.isfile(db_path):
+        update_signature_db(db_path, delta)
+    if bin_path is not None and os.path.isfile(bin_path):
+        save_signatures(merged, bin_path)
+    return len(delta)
@@ -4,11 +4,13 @@ from typing import Dict
 from typing import List
 from typing import Literal
 from typing import Optional
+from typing import Tuple
 from typing import Union
 
 import diskcache
 from cachetools import cached
 from cachetools import LRUCache
+from cachetools.keys import hashkey
 from multicall import Call
 from multicall import Multicall
 
@@ -18,11 +20,25 @@ from decodex.constant import NULL_ADDRESS_0xF
 from decodex.type import ERC20Compatible
 
 
+def _erc20_key(
+    self, address: str, block_number: Union[int, Literal["latest"]] = "latest", *, strict: bool = True
+) -> Tuple:
+    # The service is a singleton, and `batch_get_erc20` fills the entries `get_erc20` reads
+    return hashkey(address, block_number, strict)
+
+
 class ERC20TokenService:
     _instance = None
     _initialize = False
     _singleton_lock = Lock()
 
+    # Tokens already resolved in this process, shared by `get_erc20` and `batch_get_erc20`
+    _lru: LRUCache = LRUCache(maxsize=131072)
+    _lru_lock = Lock()
+
+    # Calls per JSON-RPC batch request of `batch_get_erc20`
+    BATCH_SIZE = 100
+
     # Singleton pattern
     def __new__(cls, *args, **kwargs):
         if cls._instance is None:
@@ -36,7 +52,7 @@ class ERC20TokenService:
                 self._cache = diskcache.Cache(cache_path or DECODEX_DIR.joinpath("erc20"))
                 self._initialize = True
 
-    @cached(cache=LRUCache(maxsize=131072), lock=Lock())
+    @cached(cache=_lru, key=_erc20_key, lock=_lru_lock)
     def get_erc20(
         self,
         address: str,
@@ -61,38 +77,108 @@ class ERC20TokenService:
             return token
 
         if address in {NULL_ADDRESS_0x0, NULL_ADDRESS_0xF}:
-            suffix = "ETH Transfer" if address == NULL_ADDRESS_0x0 else "Gas Fee"
-            return {
-                "name": f"Platform Token ({suffix})",
-                "address": address,
-                "contract_name": None,
-                "symbol": "ETH",
-                "decimals": 18,
-                "labels": [],
-            }
-
-        response: Dict[str, Any] = self._mc.agg(
-            [
-                Call(
-                    target=address,
-                    function="name()(string)",
-                    request_id=f"{address}-name",
-                ),
-                Call(
-                    target=address,
-                    function="symbol()(string)",
-                    request_id=f"{address}-symbol",
-                ),
-                Call(
-                    target=address,
-                    function="decimals()(uint8)",
-                    request_id=f"{address}-decimals",
-                ),
-            ],
-            block_id=block_number,
-            as_dict=True,
-        )
+            return self._platform_token(address)
+
+        response: Dict[str, Any] = self._mc.agg(self._calls(address), block_id=block_number, as_dict=True)
+        return self._parse(address, response, strict=strict)
+
+    def batch_get_erc20(
+        self,
+        addresses: List[str],
+        block_number: Union[int, Literal["latest"]] = "latest",
+        *,
+        strict: bool = True,
+        max_workers: int = 10,
+    ) -> List[Optional[ERC20Compatible]]:
+        """
+        Get ERC20 token information from addresses, in the same order.
+
+        Tokens found in the in-process cache or in the disk cache are returned as they are. The `name()`,
+        `symbol()` and `decimals()` calls of all the other tokens are sent together, split into JSON-RPC
+        batches of `BATCH_SIZE` calls sent concurrently, and the results fill both caches. A token whose
+        calls fail is not ERC20 compatible: it does not fail the other tokens of the batch. It is not cached
+        either, as the failure may be transient, so the next call looks it up again.
 
+        Parameters
+        ----------
+        addresses : List[str]
+            Token addresses.
+        block_number : int or "latest", optional
+            Block number to query, by default "latest".
+        strict : bool, optional
+            if True, return None for tokens that are not found or not ERC20 compatible, by default True.
+        max_workers : int, optional
+            The maximum number of JSON-RPC batches sent concurrently, by default 10.
+        """
+        tokens: Dict[str, Optional[ERC20Compatible]] = {}
+        misses: List[str] = []
+        for address in dict.fromkeys(addresses):
+            key = _erc20_key(self, address, block_number, strict=strict)
+            with self._lru_lock:
+                if key in self._lru:
+                    tokens[address] = self._lru[key]
+                    continue
+            token = self._cache.get(address)
+            if token is None and address in {NULL_ADDRESS_0x0, NULL_ADDRESS_0xF}:
+                token = self._platform_token(address)
+            if token is None:
+                misses.append(address)
+            else:
+                tokens[address] = token
+
+        if misses:
+            calls = [call for address in misses for call in self._calls(address)]
+            response: Dict[str, Any] = self._mc.agg(
+                calls,
+                block_id=block_number,
+                as_dict=True,
+                ignore_error=True,
+                batch_size=self.BATCH_SIZE,
+                max_workers=max(1, min(max_workers, -(-len(calls) // self.BATCH_SIZE))),
+            )
+            for address in misses:
+                tokens[address] = self._parse(address, response, strict=strict)
+
+        with self._lru_lock:
+            for address, token in tokens.items():
+                # Like the disk cache, only the tokens that were resolved
+                if token is not None:
+                    self._lru[_erc20_key(self, address, block_number, strict=strict)] = token
+        return [tokens[address] for address in addresses]
+
+    @staticmethod
+    def _platform_token(address: str) -> ERC20Compatible:
+        suffix = "ETH Transfer" if address == NULL_ADDRESS_0x0 else "Gas Fee"
+        return {
+            "name": f"Platform Token ({suffix})",
+            "address": address,
+            "contract_name": None,
+            "symbol": "ETH",
+            "decimals": 18,
+            "labels": [],
+        }
+
+    @staticmethod
+    def _calls(address: str) -> List[Call]:
+        return [
+            Call(
+                target=address,
+                function="name()(string)",
+                request_id=f"{address}-name",
+            ),
+            Call(
+                target=address,
+                function="symbol()(string)",
+                request_id=f"{address}-symbol",
+            ),
+            Call(
+                target=address,
+                function="decimals()(uint8)",
+                request_id=f"{address}-decimals",
+            ),
+        ]
+
+    def _parse(self, address: str, response: Dict[str, Any], *, strict: bool) -> Optional[ERC20Compatible]:
         name = response.get(f"{address}-name", None)
         symbol = response.get(f"{address}-symbol", None)
         decimals = response.get(f"{address}-decimals", None)
@@ -112,10 +198,3 @@ class ERC20TokenService:
         self._cache.set(address, rtn)
 
         return rtn
-
-    def batch_get_erc20(
-        self,
-        addresses: List[str],
-        block_number: Union[int, Literal["latest"]] = "latest",
-    ) -> List[Optional[ERC20Compatible]]:
-        return [self.get_erc20(address, block_number=block_number) for address in addresses]
@@ -1,8 +1,20 @@
+from .batch import eth_decode_logs
+from .cache import DecoderCache
+from .decode import CompiledEvent
+from .decode import CompiledFunction
 from .decode import eth_decode_input
 from .decode import eth_decode_log
+from .decode import LazyParams
+from .decode import parse_event_signature
 
 
 __all__ = [
     "eth_decode_log",
+    "eth_decode_logs",
     "eth_decode_input",
+    "parse_event_signature",
+    "CompiledEvent",
+    "CompiledFunction",
+    "LazyParams",
+    "DecoderCache",
 ]
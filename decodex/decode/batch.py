@@ -0,0 +1,156 @@
+from typing import Dict
+from typing import List
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+from eth_abi.exceptions import NonEmptyPaddingBytes
+from eth_abi.grammar import parse as parse_abi_type
+
+from .decode import _as_buffer
+from .decode import CompiledEvent
+from .decode import HexOrBytes
+
+# "00" ... "ff", indexed by byte value, to hex encode whole columns at once
+_HEX_TABLE = np.array([f"{i:02x}".encode() for i in range(256)], dtype="S2")
+
+
+def eth_decode_logs(
+    event_abi: Dict,
+    topics: Sequence[Sequence[HexOrBytes]],
+    data: Sequence[HexOrBytes],
+    limbs: bool = False,
+) -> Tuple[str, Dict[str, np.ndarray]]:
+    """
+    Decode many logs of the same event column-wise with NumPy.
+
+    Only events made of elementary static types (`uint<M>`, `int<M>`, `address`, `bool` and `bytes<M>`)
+    are supported, which covers Transfer, Swap, Mint, Burn and most other high-volume events. Use
+    `eth_decode_log` for the others.
+
+    Parameters
+    ----------
+    event_abi : Dict
+        The ABI of the event.
+    topics : Sequence[Sequence[HexOrBytes]]
+        The topics of each log, as 0x-prefixed hex strings or raw bytes.
+    data : Sequence[HexOrBytes]
+        The data of each log, as a 0x-prefixed hex string or raw bytes.
+    limbs : bool, optional
+        How to return integers wider than 64 bits. By default (False) they are an object array of Python ints.
+        If True, they are a uint64 array of shape (n_logs, 4) holding the 256-bit two's complement value as
+        big-endian limbs, the most significant limb first.
+
+    Returns
+    -------
+    Tuple[str, Dict[str, np.ndarray]]
+        The event signature and one column per parameter, keyed by its name and by `__idx_N` like `eth_decode_log`.
+        Addresses are 0x-prefixed lowercase strings, `bytes<M>` are hex strings, integers of at most 64 bits are
+        int64 or uint64 arrays and booleans are bool arrays.
+
+    Raises
+    ------
+    ValueError
+        If the ABI is not an event of elementary static types, or a log does not have the shape of the event.
+    NonEmptyPaddingBytes
+        If a value is not properly padded, as eth_abi would raise.
+
+    Example
+    -------
+    >>> _, columns = eth_decode_logs(transfer_abi, [log["topics"] for log in logs], [log["data"] for log in logs])
+    >>> columns["from"], columns["value"]
+    """
+    event = CompiledEvent(event_abi)
+    if event._word_decoders is None:
+        raise ValueError(f"Event {event.text_signature} has dynamic or nested types, use eth_decode_log instead")
+    if len(topics) != len(data):
+        raise ValueError(f"Got {len(topics)} topics for {len(data)} data")
+
+    n_logs, n_indexed, n_data_words = len(topics), len(event.indexed_idx), len(event.non_indexed_idx)
+
+    # Gather the words of every log into a single (n_logs, n_words, 32) matrix, indexed inputs first
+    chunks: List[Union[bytes, memoryview]] = []
+    for i, (log_topics, log_data) in enumerate(zip(topics, data)):
+        if len(log_topics) <= n_indexed:
+            raise ValueError(f"Log {i} does not have the shape of {event.text_signature}")
+        for topic in log_topics[1 : n_indexed + 1]:
+            word = _as_buffer(topic)
+            if len(word) != 32:
+                raise ValueError(f"Log {i} does not have the shape of {event.text_signature}")
+            chunks.append(word)
+        buf = _as_buffer(log_data)
+        if len(buf) < 32 * n_data_words:
+            raise ValueError(f"Log {i} does not have the shape of {event.text_signature}")
+        chunks.append(buf[: 32 * n_data_words])
+    words = np.frombuffer(b"".join(chunks), dtype=np.uint8).reshape(n_logs, n_indexed + n_data_words, 32)
+
+    types = [inp["type"] for inp in event.inputs]
+    positions = {idx: pos for pos, idx in enumerate(event.indexed_idx + event.non_indexed_idx)}
+    columns: Dict[str, np.ndarray] = {}
+    for idx, inp in enumerate(event.inputs):
+        column = _decode_column(types[idx], words[:, positions[idx], :], limbs)
+        columns[inp["name"]] = column
+        columns[f"__idx_{idx}"] = column
+    return event.text_signature, columns
+
+
+def _check_padding(padding: np.ndarray, expected: np.ndarray) -> None:
+    bad = np.flatnonzero((padding != expected).any(axis=1))
+    if len(bad) > 0:
+        raise NonEmptyPaddingBytes(f"Padding bytes were not empty in log {bad[0]}: {bytes(padding[bad[0]])!r}")
+
+
+def _hex_column(values: np.ndarray) -> np.ndarray:
+    """
+    Hex encode every row of a (n, size) uint8 matrix into an array of strings.
+    """
+    n, size = values.shape
+    if size == 0:
+        return np.full(n, "", dtype="U1")
+    return np.ascontiguousarray(_HEX_TABLE[values]).view(f"S{2 * size}").reshape(n).astype(f"U{2 * size}")
+
+
+def _decode_column(type_str: str, words: np.ndarray, limbs: bool) -> np.ndarray:
+    """
+    Decode a (n_logs, 32) uint8 matrix of words of an elementary static type.
+    """
+    abi_type = parse_abi_type(type_str)
+
+    if abi_type.base == "address":
+        _check_padding(words[:, :12], np.zeros(12, dtype=np.uint8))
+        return np.char.add("0x", _hex_column(words[:, 12:]))
+
+    if abi_type.base == "bool":
+        _check_padding(words[:, :31], np.zeros(31, dtype=np.uint8))
+        _check_padding(words[:, 31:] > 1, np.zeros(1, dtype=bool))
+        return words[:, 31] == 1
+
+    if abi_type.base == "bytes":
+        size = abi_type.sub
+        _check_padding(words[:, size:], np.zeros(32 - size, dtype=np.uint8))
+        return _hex_column(words[:, :size])
+
+    # uint<M> and int<M>
+    bits, signed = abi_type.sub, abi_type.base == "int"
+    n_pad = 32 - bits // 8
+    if signed:
+        negative = words[:, n_pad] >= 0x80
+        expected = np.where(negative[:, None], np.uint8(0xFF), np.uint8(0))
+        _check_padding(words[:, :n_pad], np.broadcast_to(expected, (len(words), n_pad)))
+    else:
+        _check_padding(words[:, :n_pad], np.zeros(n_pad, dtype=np.uint8))
+
+    # Four big-endian 64-bit limbs, the padding already makes them the two's complement value
+    be_limbs = np.ascontiguousarray(words).view(">u8").astype(np.uint64)
+    if bits <= 64:
+        return be_limbs[:, 3].view(np.int64) if signed else be_limbs[:, 3]
+    if limbs:
+        return be_limbs
+
+    values = np.zeros(len(words), dtype=object)
+    for limb in range(4):
+        values = (values << 64) + be_limbs[:, limb].astype(object)
+    if signed:
+        values = np.where(values >= 1 << 255, values - (1 << 256), values)
+    return values
@@ -0,0 +1,91 @@
+import json
+from threading import Lock
+from typing import Any
+from typing import Dict
+from typing import Union
+
+from cachetools import LRUCache
+
+from .decode import CompiledEvent
+from .decode import CompiledFunction
+
+
+class DecoderCache:
+    """
+    A bounded LRU cache of compiled decoders keyed by (selector, abi), so the ABI of a selector
+    is parsed and compiled only once no matter how many logs or inputs it decodes.
+
+    ABIs given as dicts are first looked up by identity, so decoding with the same dict again costs no
+    serialization: a dict ABI must not be modified in place once it was used.
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of compiled decoders to keep, by default 4096.
+
+    Example
+    -------
+    >>> cache = DecoderCache()
+    >>> for abi, _ in sig_lookup(topics[0]):
+    ...     text_sig, params = cache.event(topics[0], abi).decode(topics, data)
+    """
+
+    def __init__(self, maxsize: int = 4096) -> None:
+        self._cache: LRUCache = LRUCache(maxsize=maxsize)
+        # (kind, id(abi)) -> (abi, compiled), the ABI is kept so that its id is not reused while cached
+        self._by_id: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = Lock()
+
+    def _get(self, kind: type, selector: str, abi: Union[str, Dict]) -> Any:
+        if isinstance(abi, str):
+            return self._compile(kind, selector, abi)
+        with self._lock:
+            entry = self._by_id.get((kind, id(abi)))
+        if entry is None or entry[0] is not abi:
+            try:
+                compiled = self._compile(kind, selector, abi)
+            except ValueError as e:
+                compiled = e
+            entry = (abi, compiled)
+            with self._lock:
+                self._by_id[(kind, id(abi))] = entry
+        if isinstance(entry[1], ValueError):
+            raise ValueError(*entry[1].args)
+        return entry[1]
+
+    def _compile(self, kind: type, selector: str, abi: Union[str, Dict]) -> Any:
+        key = (kind, selector, abi if isinstance(abi, str) else json.dumps(abi, sort_keys=True))
+        with self._lock:
+            compiled = self._cache.get(key)
+        if compiled is None:
+            try:
+                compiled = kind(json.loads(abi) if isinstance(abi, str) else abi)
+            except Exception as e:
+                # Remember invalid ABIs as well, so they are not parsed again
+                compiled = ValueError(f"Cannot compile ABI of {selector}: {e}")
+            with self._lock:
+                self._cache[key] = compiled
+        if isinstance(compiled, ValueError):
+            raise ValueError(*compiled.args)
+        return compiled
+
+    def event(self, selector: str, abi: Union[str, Dict]) -> CompiledEvent:
+        """
+        Get the compiled event of the given selector and ABI (a JSON string or a dict).
+        """
+        return self._get(CompiledEvent, selector, abi)
+
+    def function(self, selector: str, abi: Union[str, Dict]) -> CompiledFunction:
+        """
+        Get the compiled function of the given selector and ABI (a JSON string or a dict).
+        """
+        return self._get(CompiledFunction, selector, abi)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+            self._by_id.clear()
+
+
+# The decoders compiled by `eth_decode_log` and `eth_decode_input`, shared by all their callers
+_shared_cache = DecoderCache()
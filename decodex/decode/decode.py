@@ -1,14 +1,38 @@
+import re
 from typing import Any
+from typing import Callable
 from typing import Dict
+from typing import Iterator
 from typing import List
+from typing import Mapping
+from typing import Optional
 from typing import Tuple
 from typing import Union
 
-from eth_abi import decode as decode_abi
+from eth_abi.decoding import ContextFramesBytesIO
+from eth_abi.decoding import TupleDecoder
+from eth_abi.exceptions import InsufficientDataBytes
+from eth_abi.exceptions import NonEmptyPaddingBytes
+from eth_abi.grammar import ABIType
+from eth_abi.grammar import parse as parse_abi_type
+from eth_abi.grammar import TupleType
+from eth_abi.registry import registry as abi_registry
 from eth_utils.abi import collapse_if_tuple
 
+# Topics, data and inputs are either 0x-prefixed hex strings or raw bytes (bytes, HexBytes, memoryview...)
+HexOrBytes = Union[str, bytes, memoryview]
 
-def eth_decode_input(abi: Dict, data: str) -> Tuple[str, Dict]:
+
+def _as_buffer(value: HexOrBytes) -> Union[bytes, memoryview]:
+    """
+    The raw bytes of a 0x-prefixed hex string, or a zero-copy view of a bytes-like value.
+    """
+    if isinstance(value, str):
+        return bytes.fromhex(value[2:])
+    return memoryview(value)
+
+
+def eth_decode_input(abi: Dict, data: HexOrBytes) -> Tuple[str, Dict]:
     """
     Decodes Ethereum input given the ABI and data.
 
@@ -16,35 +40,25 @@ def eth_decode_input(abi: Dict, data: str) -> Tuple[str, Dict]:
     ----------
     abi : Dict
         The ABI of the function.
-    data : str
-        The data associated with the function.
+    data : HexOrBytes
+        The data associated with the function, as a 0x-prefixed hex string or raw bytes.
 
     Returns
     -------
     Tuple[str, Dict]
         The function signature and the parameters decoded from the input.
 
+    Notes
+    -----
+    The ABI is compiled once and kept in a bounded cache shared by every caller, see `DecoderCache`.
     """
+    from .cache import _shared_cache
 
     # Ensure ABI is a valid function
     if "name" not in abi or abi.get("type") != "function":
         return "{}", {}
 
-    # Separate inputs into indexed and non-indexed
-    inputs = abi.get("inputs", [])
-
-    func_signature = [collapse_if_tuple(inp) for inp in inputs]
-    text_signature = "{}({})".format(abi.get("name", ""), ",".join(func_signature))
-
-    # Decode values from data
-    values = decode_abi(func_signature, bytes(bytearray.fromhex(data[10:])))
-
-    # Fill parameters with values
-    params = {}
-    for idx, val in enumerate(values):
-        params.update(_process_abi_tuple(inputs[idx], val))
-
-    return text_signature, params
+    return _shared_cache.function(abi["name"], abi).decode(data)
 
 
 def _process_abi_tuple(abi: Dict, value: Any) -> Dict:
@@ -132,42 +146,452 @@ def _divide_into_chunks(data: str, chunk_size: int) -> list:
     return chunks
 
 
-def eth_decode_log(event_abi: Dict, topics: List[str], data: str) -> Tuple[str, Dict]:
+def eth_decode_log(event_abi: Dict, topics: List[HexOrBytes], data: HexOrBytes) -> Tuple[str, Dict]:
     """
     Decodes Ethereum log given the event ABI, topics, and data.
+    Topics and data are either 0x-prefixed hex strings or raw bytes.
+    The ABI is compiled once and kept in a bounded cache shared by every caller, see `DecoderCache`.
     """
+    from .cache import _shared_cache
 
     # Ensure ABI is a valid event
     if "name" not in event_abi or event_abi.get("type") != "event":
         return "{}", {}
 
-    inputs: List = event_abi.get("inputs", [])
+    return _shared_cache.event(event_abi["name"], event_abi).decode(topics, data)
+
+
+def parse_event_signature(signature: str) -> Dict:
+    """
+    Parse a human-readable event signature into an event ABI.
+
+    Parameters
+    ----------
+    signature : str
+        The event signature with optional `indexed` flags and parameter names,
+        e.g. "Transfer(address indexed from, address indexed to, uint256 value)".
+
+    Returns
+    -------
+    Dict
+        The event ABI. Parameters without a name get an empty name.
+
+    Raises
+    ------
+    ValueError
+        If the signature is malformed.
+    """
+    name, sep, params = signature.strip().partition("(")
+    if not sep or not params.endswith(")") or not name.strip():
+        raise ValueError(f"Invalid event signature: {signature}")
+    return {
+        "name": name.strip(),
+        "type": "event",
+        "anonymous": False,
+        "inputs": [_parse_param(param) for param in _split_params(params[:-1])],
+    }
+
+
+def _split_params(params: str) -> List[str]:
+    """
+    Split parameters on top-level commas, commas inside tuple components are kept.
+    """
+    parts, depth, start = [], 0, 0
+    for idx, char in enumerate(params):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        elif char == "," and depth == 0:
+            parts.append(params[start:idx])
+            start = idx + 1
+    parts.append(params[start:])
+    if depth != 0:
+        raise ValueError(f"Unbalanced parentheses in parameters: {params}")
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _parse_param(param: str) -> Dict:
+    components = None
+    if param.startswith("("):
+        close = _matching_paren(param)
+        components = [_parse_param(p) for p in _split_params(param[1:close])]
+        suffix = re.match(r"(\[\d*\])*", param[close + 1 :]).group(0)
+        abi_type, words = "tuple" + suffix, param[close + 1 + len(suffix) :].split()
+    else:
+        abi_type, *words = param.split()
+        # Expand the aliases, e.g. uint -> uint256
+        abi_type = re.sub(r"^(u?int)(?=\[|$)", r"\g<1>256", abi_type)
+
+    names = [word for word in words if word != "indexed"]
+    abi: Dict[str, Any] = {"name": names[0] if names else "", "type": abi_type, "indexed": "indexed" in words}
+    if components is not None:
+        abi["components"] = components
+    return abi
+
+
+def _matching_paren(param: str) -> int:
+    depth = 0
+    for idx, char in enumerate(param):
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth == 0:
+                return idx
+    raise ValueError(f"Unbalanced parentheses in parameter: {param}")
+
+
+def _tuple_decoder(types: List[str]) -> TupleDecoder:
+    return TupleDecoder(decoders=[abi_registry.get_decoder(t) for t in types])
+
+
+def _check_padding(padding: bytes, expected: bytes) -> None:
+    if padding != expected:
+        raise NonEmptyPaddingBytes(f"Padding bytes were not empty: {bytes(padding)!r}")
+
+
+def _word_decoder(type_str: str) -> Optional[Callable[[bytes], Any]]:
+    """
+    A decoder of a single 32-byte word for the elementary static types (`uint<M>`, `int<M>`, `address`,
+    `bool` and `bytes<M>`), or None for any other type.
+
+    The decoded values are those of eth_abi after `_process_abi_tuple`, and the padding is validated
+    as strictly as eth_abi does, raising `NonEmptyPaddingBytes`.
+    """
+    abi_type = parse_abi_type(type_str)
+    if isinstance(abi_type, TupleType) or abi_type.arrlist:
+        return None
+
+    if abi_type.base == "uint" and abi_type.sub is not None:
+        n_pad = 32 - abi_type.sub // 8
+        zeros = bytes(n_pad)
+
+        def decode_uint(word: bytes) -> int:
+            _check_padding(word[:n_pad], zeros)
+            return int.from_bytes(word, "big")
+
+        return decode_uint
+
+    if abi_type.base == "int" and abi_type.sub is not None:
+        n_pad = 32 - abi_type.sub // 8
+        zeros, ones = bytes(n_pad), b"\xff" * n_pad
+
+        def decode_int(word: bytes) -> int:
+            value = int.from_bytes(word[n_pad:], "big", signed=True)
+            _check_padding(word[:n_pad], ones if value < 0 else zeros)
+            return value
+
+        return decode_int
+
+    if abi_type.base == "address":
+        zeros = bytes(12)
+
+        def decode_address(word: bytes) -> str:
+            _check_padding(word[:12], zeros)
+            return "0x" + word[12:].hex()
+
+        return decode_address
+
+    if abi_type.base == "bool":
+        zeros = bytes(31)
+
+        def decode_bool(word: bytes) -> bool:
+            _check_padding(word[:31], zeros)
+            if word[31] > 1:
+                raise NonEmptyPaddingBytes(f"Boolean must be either 0x0 or 0x1.  Got: {bytes(word[31:])!r}")
+            return word[31] == 1
+
+        return decode_bool
+
+    if abi_type.base == "bytes" and abi_type.sub is not None:
+        size = abi_type.sub
+        zeros = bytes(32 - size)
+
+        def decode_bytes(word: bytes) -> str:
+            _check_padding(word[size:], zeros)
+            return word[:size].hex()
+
+        return decode_bytes
+
+    return None
+
 
-    # Separate indexed and non-indexed inputs
-    indexed_types, non_indexed_types = [], []
-    indexed_idx, non_indexed_idx = [], []
-    for idx, inp in enumerate(inputs):
-        if inp.get("indexed"):
-            indexed_types.append(collapse_if_tuple(inp))
-            indexed_idx.append(idx)
+def _encoded_size(abi_type: ABIType) -> int:
+    """
+    The size in bytes of the encoding of a static ABI type.
+    """
+    if abi_type.arrlist:
+        return abi_type.arrlist[-1][0] * _encoded_size(abi_type.item_type)
+    if isinstance(abi_type, TupleType):
+        return sum(_encoded_size(component) for component in abi_type.components)
+    return 32
+
+
+def _head_size(types: List[str]) -> Tuple[int, bool]:
+    """
+    The size in bytes of the head of a tuple of ABI types, and whether the tuple is static.
+    Dynamic types take a 32-byte offset in the head.
+    """
+    size, is_static = 0, True
+    for abi_type in map(parse_abi_type, types):
+        if abi_type.is_dynamic:
+            size, is_static = size + 32, False
+        else:
+            size += _encoded_size(abi_type)
+    return size, is_static
+
+
+class CompiledEvent:
+    """
+    An event ABI with everything needed to decode its logs computed once: the parsed ABI,
+    the text signature, the split between indexed and non-indexed inputs and the eth_abi decoders.
+
+    Parameters
+    ----------
+    abi : Dict
+        The ABI of the event.
+
+    Raises
+    ------
+    ValueError
+        If the ABI is not an event.
+    """
+
+    __slots__ = (
+        "abi",
+        "inputs",
+        "text_signature",
+        "indexed_idx",
+        "non_indexed_idx",
+        "n_topics",
+        "data_size",
+        "is_static",
+        "_indexed_decoder",
+        "_non_indexed_decoder",
+        "_word_decoders",
+        "_field_decoders",
+        "_locations",
+        "_keys",
+    )
+
+    def __init__(self, abi: Dict) -> None:
+        if "name" not in abi or abi.get("type") != "event":
+            raise ValueError(f"ABI {abi.get('name', '')} is not an event")
+
+        self.abi = abi
+        self.inputs: List[Dict] = abi.get("inputs", [])
+
+        types = [collapse_if_tuple(inp) for inp in self.inputs]
+        self.text_signature = "{}({})".format(abi.get("name", ""), ",".join(types))
+
+        # Separate indexed and non-indexed inputs
+        self.indexed_idx = [idx for idx, inp in enumerate(self.inputs) if inp.get("indexed")]
+        self.non_indexed_idx = [idx for idx, inp in enumerate(self.inputs) if not inp.get("indexed")]
+        self._indexed_decoder = _tuple_decoder([types[idx] for idx in self.indexed_idx])
+        self._non_indexed_decoder = _tuple_decoder([types[idx] for idx in self.non_indexed_idx])
+
+        # The shape of the logs of this event: the number of topics (with the event topic) and the
+        # size of the data, which is exact if every non-indexed input is static and a minimum otherwise
+        self.n_topics = len(self.indexed_idx) + 1
+        self.data_size, self.is_static = _head_size([types[idx] for idx in self.non_indexed_idx])
+
+        # Events made only of elementary static types, the vast majority, are decoded word by word
+        # without eth_abi. The others keep the generic decoders.
+        word_decoders = [_word_decoder(t) for t in types]
+        self._word_decoders: Optional[List[Callable[[bytes], Any]]] = (
+            word_decoders if all(decoder is not None for decoder in word_decoders) else None
+        )
+
+        # Where each input lives for `decode_lazy`: its topic, or its offset in the head of the data
+        self._field_decoders: Optional[List[TupleDecoder]] = None
+        self._locations: List[Tuple[bool, int, bool]] = [(True, 0, False)] * len(self.inputs)
+        for pos, idx in enumerate(self.indexed_idx):
+            self._locations[idx] = (True, pos + 1, False)
+        offset = 0
+        for idx in self.non_indexed_idx:
+            abi_type = parse_abi_type(types[idx])
+            self._locations[idx] = (False, offset, abi_type.is_dynamic)
+            offset += 32 if abi_type.is_dynamic else _encoded_size(abi_type)
+
+        # The keys of the params, in the order of `decode`, and the input they refer to.
+        # A name repeated by several inputs refers to the last one, as in `decode`.
+        self._keys: Dict[str, int] = {}
+        for idx in self.indexed_idx + self.non_indexed_idx:
+            self._keys[self.inputs[idx]["name"]] = idx
+            self._keys[f"__idx_{idx}"] = idx
+
+    def accepts(self, n_topics: int, data_size: int) -> bool:
+        """
+        Check whether a log with the given number of topics and data size in bytes has the shape of this event.
+        """
+        if n_topics != self.n_topics:
+            return False
+        return data_size == self.data_size if self.is_static else data_size >= self.data_size
+
+    def decode(self, topics: List[HexOrBytes], data: HexOrBytes) -> Tuple[str, Dict]:
+        """
+        Decode a log emitted by this event, see `eth_decode_log`.
+        """
+        data = _as_buffer(data)
+        if self._word_decoders is not None:
+            params = self._decode_words(topics, data)
+            if params is not None:
+                return self.text_signature, params
+
+        indexed_values = self._indexed_decoder(ContextFramesBytesIO(b"".join(_as_buffer(t) for t in topics[1:])))
+        non_indexed_values = self._non_indexed_decoder(ContextFramesBytesIO(data))
+
+        params = {}
+        for idx, value in zip(self.indexed_idx, indexed_values):
+            single_param = _process_abi_tuple(self.inputs[idx], value)
+            params.update(single_param)
+            params.update({f"__idx_{idx}": list(single_param.values())[0]})
+        for idx, value in zip(self.non_indexed_idx, non_indexed_values):
+            single_param = _process_abi_tuple(self.inputs[idx], value)
+            params.update(single_param)
+            params.update({f"__idx_{idx}": list(single_param.values())[0]})
+
+        return self.text_signature, params
+
+    def decode_lazy(self, topics: List[HexOrBytes], data: HexOrBytes) -> "LazyParams":
+        """
+        Get a read-only view of the params of a log emitted by this event, whose fields are only decoded
+        when they are accessed, by name or by `__idx_N`. Decoding errors are raised on access.
+        """
+        return LazyParams(self, topics, data)
+
+    def _decode_field(self, idx: int, topics: List[HexOrBytes], buf: Union[bytes, memoryview]) -> Any:
+        """
+        Decode the input at `idx` alone from the topics and the raw data.
+        """
+        in_topic, offset, is_dynamic = self._locations[idx]
+        if in_topic:
+            if offset >= len(topics):
+                raise InsufficientDataBytes(f"Missing topic {offset} of {self.text_signature}")
+            word = _as_buffer(topics[offset])
+        elif self._word_decoders is not None:
+            word = buf[offset : offset + 32]
+        elif not is_dynamic:
+            word = buf[offset:]
         else:
-            non_indexed_types.append(collapse_if_tuple(inp))
-            non_indexed_idx.append(idx)
-
-    indexed_values = decode_abi(indexed_types, bytes(bytearray.fromhex("".join(t[2:] for t in topics[1:]))))
-    non_indexed_values = decode_abi(non_indexed_types, bytes(bytearray.fromhex(data[2:])))
-
-    params = {}
-    for idx, value in zip(indexed_idx, indexed_values):
-        single_param = _process_abi_tuple(inputs[idx], value)
-        params.update(single_param)
-        params.update({f"__idx_{idx}": list(single_param.values())[0]})
-    for idx, value in zip(non_indexed_idx, non_indexed_values):
-        single_param = _process_abi_tuple(inputs[idx], value)
-        params.update(single_param)
-        params.update({f"__idx_{idx}": list(single_param.values())[0]})
-
-    func_signature = [collapse_if_tuple(inp) for inp in inputs]
-    text_signature = "{}({})".format(event_abi.get("name", ""), ",".join(func_signature))
-
-    return text_signature, params
+            # Rebase the tail of a dynamic input as the encoding of a tuple with this input only
+            if len(buf) < offset + 32:
+                raise InsufficientDataBytes(f"Tried to read 32 bytes at {offset}, only got {len(buf) - offset} bytes")
+            word = _DYNAMIC_HEAD + buf[int.from_bytes(buf[offset : offset + 32], "big") :]
+
+        if self._word_decoders is not None:
+            if len(word) != 32:
+                raise InsufficientDataBytes(f"Tried to read 32 bytes, only got {len(word)} bytes")
+            return self._word_decoders[idx](word)
+        if self._field_decoders is None:
+            self._field_decoders = [_tuple_decoder([collapse_if_tuple(inp)]) for inp in self.inputs]
+        (value,) = self._field_decoders[idx](ContextFramesBytesIO(word))
+        return next(iter(_process_abi_tuple(self.inputs[idx], value).values()))
+
+    def _decode_words(self, topics: List[HexOrBytes], buf: Union[bytes, memoryview]) -> Optional[Dict]:
+        """
+        Decode a log of an event made only of elementary static types by slicing its 32-byte words.
+        Returns None for malformed logs (missing topics or data), which are left to the generic decoders.
+        """
+        if len(topics) <= len(self.indexed_idx) or len(buf) < 32 * len(self.non_indexed_idx):
+            return None
+
+        params = {}
+        decoders = self._word_decoders
+        for pos, idx in enumerate(self.indexed_idx):
+            word = _as_buffer(topics[pos + 1])
+            if len(word) != 32:
+                return None
+            value = decoders[idx](word)
+            params[self.inputs[idx]["name"]] = value
+            params[f"__idx_{idx}"] = value
+
+        for pos, idx in enumerate(self.non_indexed_idx):
+            value = decoders[idx](buf[pos * 32 : pos * 32 + 32])
+            params[self.inputs[idx]["name"]] = value
+            params[f"__idx_{idx}"] = value
+        return params
+
+
+# The head of the encoding of a tuple with a single dynamic value, pointing right after itself
+_DYNAMIC_HEAD = (32).to_bytes(32, "big")
+
+
+class LazyParams(Mapping):
+    """
+    A read-only mapping of the params of a log, see `CompiledEvent.decode_lazy`.
+
+    It has the keys of `CompiledEvent.decode`, every input by name and by `__idx_N`, but a field
+    is only decoded the first time it is accessed and both keys share the same decoded value.
+    """
+
+    __slots__ = ("_event", "_topics", "_data", "_buf", "_values")
+
+    def __init__(self, event: CompiledEvent, topics: List[HexOrBytes], data: HexOrBytes) -> None:
+        self._event = event
+        self._topics = topics
+        self._data = data
+        self._buf: Optional[Union[bytes, memoryview]] = None
+        self._values: Dict[int, Any] = {}
+
+    def __getitem__(self, key: str) -> Any:
+        idx = self._event._keys[key]
+        if idx not in self._values:
+            if self._buf is None:
+                self._buf = _as_buffer(self._data)
+            self._values[idx] = self._event._decode_field(idx, self._topics, self._buf)
+        return self._values[idx]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._event._keys)
+
+    def __len__(self) -> int:
+        return len(self._event._keys)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._event._keys
+
+    def __repr__(self) -> str:
+        return f"LazyParams({self._event.text_signature})"
+
+
+class CompiledFunction:
+    """
+    A function ABI with its text signature and eth_abi decoder computed once.
+
+    Parameters
+    ----------
+    abi : Dict
+        The ABI of the function.
+
+    Raises
+    ------
+    ValueError
+        If the ABI is not a function.
+    """
+
+    __slots__ = ("abi", "inputs", "text_signature", "_decoder")
+
+    def __init__(self, abi: Dict) -> None:
+        if "name" not in abi or abi.get("type") != "function":
+            raise ValueError(f"ABI {abi.get('name', '')} is not a function")
+
+        self.abi = abi
+        self.inputs: List[Dict] = abi.get("inputs", [])
+
+        types = [collapse_if_tuple(inp) for inp in self.inputs]
+        self.text_signature = "{}({})".format(abi.get("name", ""), ",".join(types))
+        self._decoder = _tuple_decoder(types)
+
+    def decode(self, data: HexOrBytes) -> Tuple[str, Dict]:
+        """
+        Decode the input of a call to this function, see `eth_decode_input`.
+        """
+        values = self._decoder(ContextFramesBytesIO(_as_buffer(data)[4:]))
+
+        params = {}
+        for idx, val in enumerate(values):
+            params.update(_process_abi_tuple(self.inputs[idx], val))
+
+        return self.text_signature, params
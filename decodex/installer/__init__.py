@@ -1,8 +1,36 @@
+from .dataset import current_version
+from .dataset import DATASETS
+from .dataset import ensure_artifacts
+from .dataset import install_datasets
+from .dataset import prune_versions
+from .dataset import publish_version
+from .dataset import remove_datasets
+from .dataset import stage_version
+from .dataset import update_datasets
+from .installer import compile_datasets
 from .installer import download_from_url
 from .installer import download_github_file
+from .installer import download_ranged
+from .installer import read_manifest
+from .installer import stale_artifacts
+from .installer import update_signature_files
 
 
 __all__ = [
     "download_github_file",
     "download_from_url",
+    "download_ranged",
+    "compile_datasets",
+    "read_manifest",
+    "stale_artifacts",
+    "update_signature_files",
+    "DATASETS",
+    "install_datasets",
+    "ensure_artifacts",
+    "update_datasets",
+    "remove_datasets",
+    "current_version",
+    "stage_version",
+    "publish_version",
+    "prune_versions",
 ]
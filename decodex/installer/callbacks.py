@@ -1,8 +1,7 @@
-import gzip
-import hashlib
+import base64
 import json
+import re
 from abc import abstractstaticmethod
-from io import BytesIO
 from pathlib import Path
 
 import requests
@@ -16,12 +15,6 @@ class BaseBeforeCallback:
         pass
 
 
-class BasePostCallback:
-    @abstractstaticmethod
-    def post_download(src_path: str, save_path: str, **kwargs):
-        pass
-
-
 class GithubRawBeforeCallback(BaseBeforeCallback):
     """
     kwargs : Dict
@@ -36,9 +29,25 @@ class GithubRawBeforeCallback(BaseBeforeCallback):
             The path to the file in the repository.
     """
 
+    @staticmethod
     def before_download(save_path: str, **kwargs) -> str:
-        url = get_github_url(use_api=False, **kwargs)
-        return url
+        """
+        Get the sha of the file from Github API, the raw file is only downloaded if it changed.
+
+        Returns
+        -------
+        str
+            The URL of the raw file.
+
+        Raises
+        ------
+        FileExistsError
+            If the file already exists and is up to date.
+        """
+        spec = requests.request(method="GET", url=get_github_url(use_api=True, **kwargs))
+        spec.raise_for_status()
+        _check_and_record(save_path, json.loads(spec.text)["sha"])
+        return get_github_url(use_api=False, **kwargs)
 
 
 class GithubLFSBeforeCallback(BaseBeforeCallback):
@@ -79,66 +88,26 @@ class GithubLFSBeforeCallback(BaseBeforeCallback):
         spec = json.loads(spec.text)
         download_url = spec["download_url"]
         checksum = spec["sha"]
-
-        # Check if the file already exists
-        path = Path(save_path)
-        if path.exists() and path.with_suffix(".checksum").exists():
-            # Check if the checksum is the same
-            with path.with_suffix(".checksum").open("r") as cf:
-                if cf.read() == checksum:
-                    raise FileExistsError("File already exists and is up to date")
-        # Save the checksum
-        path.with_suffix(".checksum").write_text(checksum)
+        # The blob of an LFS file is its pointer, whose oid is the sha256 of the file itself.
+        # Recording the oid lets the download be verified, not only detected as changed.
+        if spec.get("encoding") == "base64":
+            match = re.search(r"oid sha256:([0-9a-f]{64})", base64.b64decode(spec.get("content", "")).decode())
+            if match:
+                checksum = match.group(1)
+
+        _check_and_record(save_path, checksum)
         return download_url
 
 
-class GzipPostCallback(BasePostCallback):
-    @staticmethod
-    def post_download(src_path: str, save_path: str, **config):
-        """
-        Decompress a gzip file.
-
-        Parameters
-        ----------
-        src_path : str
-            The path to the file to decompress.
-        save_path : str
-            The path to save the decompressed file to.
-        """
-        in_path = Path(src_path)
-        out_path = Path(save_path)
-        with in_path.open("rb") as f, out_path.open("wb") as g:
-            compressed_data = BytesIO(f.read())
-            decompressed_file = gzip.GzipFile(fileobj=compressed_data)
-            g.write(decompressed_file.read())
-
-
-class ChecksumPostCallback(BasePostCallback):
-    @staticmethod
-    def post_download(src_path: str, save_path: str, **config):
-        """
-        Calculate the checksum of a file and save it to {save_path}.checksum.
-
-        Parameters
-        ----------
-        src_path : str
-            The path to the file to check.
-        save_path : str
-            The path to save the file to.
-        """
-        # Define the path objects
-        checksum_path = Path(save_path).with_suffix(".checksum")
-
-        # Calculate the checksum of the file
-        hash_algorithm = config.get("hash_algorithm", config.get("algorithm", "sha256"))
-        hash_object = hashlib.new(hash_algorithm)
-
-        with Path(src_path).open("rb") as f:
-            for chunk in iter(lambda: f.read(4096), b""):
-                hash_object.update(chunk)
-
-        checksum = hash_object.hexdigest()
-
-        # Save the checksum to the specified path
-        with checksum_path.open("w") as g:
-            g.write(checksum)
+def _check_and_record(save_path: str, checksum: str) -> None:
+    """
+    Record the checksum of the file to download next to it, raise FileExistsError if it is already downloaded.
+    """
+    path = Path(save_path)
+    if path.exists() and path.with_suffix(".checksum").exists():
+        # Check if the checksum is the same
+        with path.with_suffix(".checksum").open("r") as cf:
+            if cf.read() == checksum:
+                raise FileExistsError("File already exists and is up to date")
+    # Save the checksum
+    path.with_suffix(".checksum").write_text(checksum)
@@ -0,0 +1,348 @@
+import os
+import pathlib
+import shutil
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from datetime import timezone
+from typing import Dict
+from typing import Generator
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import TextIO
+
+from .installer import ARTIFACTS
+from .installer import compile_datasets
+from .installer import download_github_file
+from .installer import stale_artifacts
+from .installer import update_signature_files
+from decodex.constant import dataset_dir
+from decodex.constant import DECODEX_DIR
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    import msvcrt
+
+    fcntl = None
+
+# The datasets downloaded for each chain: file name -> arguments of `download_github_file`
+DATASETS: Dict[str, Dict[str, Dict]] = {
+    "ethereum": {
+        "tags.json": dict(
+            org="brianleect",
+            repo="etherscan-labels",
+            branch="main",
+            path="data/etherscan/combined/combinedAllLabels.json",
+            is_lfs=False,
+            use_tempfile=False,
+        ),
+        "signatures.csv": dict(
+            org="Solratic",
+            repo="function-signature-registry",
+            branch="main",
+            path="data/ethereum/func_sign.csv.gz",
+            is_lfs=True,
+            use_tempfile=True,
+        ),
+    },
+}
+
+# Layout of a chain directory
+# -------------------------------------------------------------------------------
+# versions/<version>/ : the published dataset versions, never modified once published
+# current             : symlink to the version in use, swapped atomically
+# staging/            : the next version being downloaded, kept to resume interrupted downloads
+# install.lock        : serializes the processes installing datasets of the chain
+# -------------------------------------------------------------------------------
+VERSIONS = "versions"
+CURRENT = "current"
+STAGING = "staging"
+LOCK = "install.lock"
+
+# Files that are only ever replaced atomically, so a new version can share them with the previous one
+_SHARED = {name for datasets in DATASETS.values() for name in datasets} | set(ARTIFACTS)
+# Files of interrupted downloads and compilations
+_PARTIAL_SUFFIXES = (".part", ".part.json", ".tmp")
+
+
+def _lock_file(f: TextIO) -> None:
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        return
+    # msvcrt.LK_LOCK gives up after 10 attempts, wait until the lock is released
+    f.seek(0)
+    while True:
+        try:
+            msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            return
+        except OSError:
+            time.sleep(0.1)
+
+
+def _unlock_file(f: TextIO) -> None:
+    if fcntl is not None:
+        fcntl.flock(f, fcntl.LOCK_UN)
+        return
+    f.seek(0)
+    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def _locked(chain_dir: pathlib.Path) -> Generator[None, None, None]:
+    chain_dir.mkdir(parents=True, exist_ok=True)
+    with chain_dir.joinpath(LOCK).open("w") as f:
+        _lock_file(f)
+        try:
+            yield
+        finally:
+            _unlock_file(f)
+
+
+def _is_partial(path: pathlib.Path) -> bool:
+    return path.name.endswith(_PARTIAL_SUFFIXES)
+
+
+def _dataset_files(directory: pathlib.Path) -> List[pathlib.Path]:
+    return [f for f in directory.iterdir() if f.is_file() and f.name != LOCK and not _is_partial(f)]
+
+
+def current_version(chain_dir: str) -> Optional[pathlib.Path]:
+    """
+    Get the directory of the current dataset version of a chain, None if no version was published.
+    """
+    current = pathlib.Path(chain_dir).joinpath(CURRENT)
+    return current.resolve() if current.exists() else None
+
+
+def stage_version(chain_dir: str) -> pathlib.Path:
+    """
+    Prepare the staging directory of the next dataset version, starting from the current one.
+
+    The files of the current version are hard-linked, as downloads and compilations replace them atomically,
+    except the other files (checksums, manifest...) which are copied. `update_signature_files` copies the
+    SQLite database it updates in place before updating it. Partial
+    downloads left in the staging directory by an interrupted run are kept, so they are resumed.
+    Datasets installed before versioning, directly in the chain directory, are migrated this way.
+
+    Parameters
+    ----------
+    chain_dir : str
+        The directory of the chain, e.g. `~/.decodex/ethereum`.
+
+    Returns
+    -------
+    pathlib.Path
+        The staging directory.
+    """
+    chain_dir = pathlib.Path(chain_dir)
+    staging = chain_dir.joinpath(STAGING)
+    staging.mkdir(parents=True, exist_ok=True)
+    for f in _dataset_files(staging):
+        f.unlink()
+
+    source = current_version(str(chain_dir)) or chain_dir
+    for f in _dataset_files(source):
+        if f.name in _SHARED:
+            try:
+                os.link(f, staging.joinpath(f.name))
+                continue
+            except OSError:
+                pass
+        shutil.copy2(f, staging.joinpath(f.name))
+    return staging
+
+
+def publish_version(chain_dir: str, names: List[str] = ()) -> Optional[pathlib.Path]:
+    """
+    Publish the staging directory as a new dataset version and atomically point `current` to it.
+
+    Nothing is published if a download of the staging directory is incomplete or one of `names` is missing,
+    nor if the staging directory still shares every dataset file with the current version, i.e. nothing changed.
+
+    Parameters
+    ----------
+    chain_dir : str
+        The directory of the chain, e.g. `~/.decodex/ethereum`.
+    names : List[str], optional
+        The names of the files a version must have, by default none.
+
+    Returns
+    -------
+    Optional[pathlib.Path]
+        The directory of the published version, or None if nothing was published.
+    """
+    chain_dir = pathlib.Path(chain_dir)
+    staging = chain_dir.joinpath(STAGING)
+    if any(_is_partial(f) for f in staging.iterdir()):
+        print(f"Skip Publishing: {staging} has incomplete downloads, run the download again to resume them")
+        return None
+    missing = [name for name in names if not staging.joinpath(name).exists()]
+    if missing:
+        print(f"Skip Publishing: {', '.join(missing)} missing in {staging}")
+        return None
+
+    current = current_version(str(chain_dir))
+    if current is not None:
+        staged = {f.name: f for f in _dataset_files(staging) if f.name in _SHARED}
+        published = {f.name: f for f in _dataset_files(current) if f.name in _SHARED}
+        if staged.keys() == published.keys() and all(staged[n].samefile(published[n]) for n in staged):
+            shutil.rmtree(staging)
+            return None
+
+    version_dir = chain_dir.joinpath(VERSIONS, f"{datetime.now(timezone.utc):%Y%m%dT%H%M%S%fZ}-{os.getpid()}")
+    version_dir.parent.mkdir(parents=True, exist_ok=True)
+    os.rename(staging, version_dir)
+
+    tmp_link = chain_dir.joinpath(f"{CURRENT}.{os.getpid()}.tmp")
+    tmp_link.unlink(missing_ok=True)
+    tmp_link.symlink_to(pathlib.Path(VERSIONS, version_dir.name), target_is_directory=True)
+    os.replace(tmp_link, chain_dir.joinpath(CURRENT))
+
+    # Datasets installed before versioning were migrated into the version
+    for f in _dataset_files(chain_dir):
+        f.unlink()
+    return version_dir
+
+
+def prune_versions(chain_dir: str, keep: int = 2) -> List[pathlib.Path]:
+    """
+    Remove old dataset versions, keeping the current one and the most recent others up to `keep` versions.
+
+    Versions are never pruned when a version is published, only by `decodex clean --old`, as running
+    processes may still use them: the stores open their files when they are created and keep reading them
+    once removed, but a store created from a removed version fails to open.
+
+    Returns
+    -------
+    List[pathlib.Path]
+        The removed version directories.
+    """
+    versions_dir = pathlib.Path(chain_dir).joinpath(VERSIONS)
+    if not versions_dir.exists():
+        return []
+    current = current_version(chain_dir)
+    others = sorted((d for d in versions_dir.iterdir() if d.is_dir() and d.resolve() != current), reverse=True)
+    removed = others[max(keep - (current is not None), 0) :]
+    for d in removed:
+        shutil.rmtree(d, ignore_errors=True)
+    return removed
+
+
+def install_datasets(chain: str, verify_ssl: bool = False) -> Optional[pathlib.Path]:
+    """
+    Download and compile the datasets of a chain into a new dataset version and make it current.
+
+    Files whose checksum did not change are not downloaded again and, if nothing changed, no version is published.
+    Processes using the previous version are not affected, they pick the new one up when they reload. The
+    previous versions are kept, see `prune_versions`.
+
+    Parameters
+    ----------
+    chain : str
+        The chain, e.g. "ethereum".
+    verify_ssl : bool, optional
+        Whether to verify SSL, by default False.
+
+    Returns
+    -------
+    Optional[pathlib.Path]
+        The directory of the published version, or None if nothing was published.
+
+    Raises
+    ------
+    ValueError
+        If the chain is not supported.
+    """
+    datasets = DATASETS.get(chain)
+    if datasets is None:
+        raise ValueError(f"Chain {chain} is not yet supported.")
+
+    chain_dir = DECODEX_DIR.joinpath(chain)
+    with _locked(chain_dir):
+        staging = stage_version(str(chain_dir))
+        for name, spec in datasets.items():
+            download_github_file(save_path=str(staging.joinpath(name)), verify_ssl=verify_ssl, **spec)
+        compile_datasets(str(staging))
+        version_dir = publish_version(str(chain_dir), list(datasets))
+    return version_dir
+
+
+def ensure_artifacts(chain: str, artifacts: Iterable[str] = ()) -> pathlib.Path:
+    """
+    Make sure the current dataset version of a chain has its compiled artifacts, e.g. before opening a store.
+
+    Nothing is done if they are up to date. Otherwise the missing or stale artifacts, and the optional
+    `artifacts` requested, are compiled into a new dataset version which is made current, under the same
+    lock as `install_datasets`: the published version is not modified, and when several processes start
+    together only the first one compiles.
+
+    Parameters
+    ----------
+    chain : str
+        The chain, e.g. "ethereum".
+    artifacts : Iterable[str], optional
+        The optional artifacts to compile as well, e.g. "signatures.db", by default none.
+
+    Returns
+    -------
+    pathlib.Path
+        The directory of the current dataset version.
+    """
+    artifacts = list(artifacts)
+    if not stale_artifacts(str(dataset_dir(chain)), artifacts):
+        return dataset_dir(chain)
+
+    chain_dir = DECODEX_DIR.joinpath(chain)
+    with _locked(chain_dir):
+        # Another process may have compiled them while this one waited for the lock
+        if stale_artifacts(str(dataset_dir(chain)), artifacts):
+            staging = stage_version(str(chain_dir))
+            compile_datasets(str(staging), artifacts=artifacts)
+            publish_version(str(chain_dir))
+    return dataset_dir(chain)
+
+
+def update_datasets(chain: str, delta: str, verify_ssl: bool = False) -> Optional[pathlib.Path]:
+    """
+    Apply a signature delta (see `update_signature_files`) to a new dataset version and make it current.
+
+    Returns
+    -------
+    Optional[pathlib.Path]
+        The directory of the published version, or None if nothing was published.
+    """
+    chain_dir = DECODEX_DIR.joinpath(chain)
+    with _locked(chain_dir):
+        staging = stage_version(str(chain_dir))
+        update_signature_files(delta=delta, save_dir=str(staging), verify_ssl=verify_ssl)
+        version_dir = publish_version(str(chain_dir))
+    return version_dir
+
+
+def remove_datasets(chain: str) -> bool:
+    """
+    Remove the datasets of a chain.
+
+    The `current` pointer is removed first, so no process starts reading a version being deleted, and
+    processes that already opened the files of a version keep reading them until they close them.
+
+    Returns
+    -------
+    bool
+        Whether there was anything to remove.
+    """
+    chain_dir = DECODEX_DIR.joinpath(chain)
+    if not chain_dir.exists():
+        return False
+    with _locked(chain_dir):
+        chain_dir.joinpath(CURRENT).unlink(missing_ok=True)
+        for d in (chain_dir.joinpath(VERSIONS), chain_dir.joinpath(STAGING)):
+            shutil.rmtree(d, ignore_errors=True)
+        for f in chain_dir.iterdir():
+            if (f.is_file() or f.is_symlink()) and f.name != LOCK:
+                f.unlink()
+    # Anything else left over, e.g. the temporary link of a crashed publish, goes with the lock file
+    shutil.rmtree(chain_dir, ignore_errors=True)
+    return True
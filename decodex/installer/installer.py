@@ -1,19 +1,57 @@
+import hashlib
+import json
 import os
 import pathlib
+import re
+import shutil
 import tempfile
+import threading
+import time
 import warnings
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO
+from typing import Callable
 from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
 
 import requests
 from tqdm import tqdm
 
-from .callbacks import ChecksumPostCallback
 from .callbacks import GithubLFSBeforeCallback
 from .callbacks import GithubRawBeforeCallback
-from .callbacks import GzipPostCallback
+from decodex.convert.address import compile_tag_db
+from decodex.convert.address import compile_tags
+from decodex.convert.address.binary import VERSION as TAG_VERSION
+from decodex.convert.address.sql import VERSION as TAG_DB_VERSION
+from decodex.convert.signature import apply_signature_delta
+from decodex.convert.signature import compile_signature_db
+from decodex.convert.signature import compile_signatures
+from decodex.convert.signature.binary import VERSION as SIGNATURE_VERSION
+from decodex.convert.signature.sql import VERSION as SIGNATURE_DB_VERSION
 
 warnings.filterwarnings("ignore")
 
+# Downloads are streamed, hashed and decompressed by chunks of this size, so memory stays bounded
+CHUNK_SIZE = 1 << 20
+# Ranged downloads split files into segments of this size, fetched concurrently
+SEGMENT_SIZE = 8 << 20
+
+# The artifacts compiled after download: artifact -> (source file, compile function, artifact format version)
+ARTIFACTS: Dict[str, Tuple[str, Callable[[str, str], None], int]] = {
+    "signatures.bin": ("signatures.csv", compile_signatures, SIGNATURE_VERSION),
+    "tags.bin": ("tags.json", compile_tags, TAG_VERSION),
+    "tags.db": ("tags.json", compile_tag_db, TAG_DB_VERSION),
+    "signatures.db": ("signatures.csv", compile_signature_db, SIGNATURE_DB_VERSION),
+}
+# The artifacts only compiled on demand, for the stores that read them, and then kept up to date
+OPTIONAL_ARTIFACTS = {"signatures.db", "tags.db"}
+# The versions of the compiled artifacts, next to them in the dataset directory
+MANIFEST = "manifest.json"
+
 
 def _get_github_url(save_path: str, org: str, repo: str, branch: str, path: str, is_lfs: bool) -> str:
     if is_lfs:
@@ -30,22 +68,287 @@ def _get_github_url(save_path: str, org: str, repo: str, branch: str, path: str,
     )
 
 
-def download_from_url(url: str, save_path: str, verify_ssl: bool, retry_with_proxy: bool = True) -> None:
+class _GunzipWriter:
+    """
+    Decompress gzip data written by chunks into a file, without holding more than a chunk in memory.
+    Concatenated gzip members are decompressed one after the other, like `gzip.GzipFile` does.
+    """
+
+    def __init__(self, f: BinaryIO) -> None:
+        self._f = f
+        self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def write(self, chunk: bytes) -> None:
+        while chunk:
+            self._f.write(self._decompressor.decompress(chunk, CHUNK_SIZE))
+            chunk = self._decompressor.unconsumed_tail
+            if not chunk and self._decompressor.eof and self._decompressor.unused_data:
+                chunk = self._decompressor.unused_data
+                self._decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+
+    def flush(self) -> None:
+        self._f.write(self._decompressor.flush())
+
+
+def download_from_url(
+    url: str,
+    save_path: str,
+    verify_ssl: bool,
+    retry_with_proxy: bool = True,
+    gunzip: bool = False,
+    hash_algorithm: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Download a file in a single streaming pass, optionally hashing and decompressing it on the fly.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the file.
+    save_path : str
+        The path to save the file to.
+    verify_ssl : bool
+        Whether to verify SSL.
+    retry_with_proxy : bool, optional
+        Retry once if the download fails and `PROXY_URL` is set, by default True.
+    gunzip : bool, optional
+        Decompress the downloaded gzip data before writing it, by default False.
+    hash_algorithm : str, optional
+        The hashlib algorithm to hash the downloaded (compressed) bytes with, by default None (no hash).
+
+    Returns
+    -------
+    Optional[str]
+        The hex digest of the downloaded bytes if `hash_algorithm` is given, None if the download failed
+        and was not retried.
+    """
     try:
         response = requests.get(url=url, verify=verify_ssl, stream=True)
+        response.raise_for_status()
         file_size = int(response.headers.get("content-length", 0))
+        hash_object = hashlib.new(hash_algorithm) if hash_algorithm else None
         with tqdm(total=file_size, unit="iB", unit_scale=True) as pbar:
             with open(save_path, "wb") as f:
-                for chunk in response.iter_content(chunk_size=1024):
+                sink = _GunzipWriter(f) if gunzip else f
+                for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
                     if chunk:
-                        f.write(chunk)
+                        if hash_object is not None:
+                            hash_object.update(chunk)
+                        sink.write(chunk)
                         pbar.update(len(chunk))
+                sink.flush()
+        return hash_object.hexdigest() if hash_object is not None else None
     except Exception as e:
         if not retry_with_proxy:
             raise e
         proxy = os.getenv("PROXY_URL", None)
         if proxy:
-            download_from_url(url, save_path, verify_ssl, retry_with_proxy=False)
+            return download_from_url(url, save_path, verify_ssl, False, gunzip, hash_algorithm)
+
+
+def _probe_ranges(url: str, verify_ssl: bool) -> Tuple[int, str]:
+    """
+    Get the size of a remote file and a validator of its version (ETag or Last-Modified),
+    or a size of 0 if the server does not support range requests.
+    """
+    response = requests.get(url=url, verify=verify_ssl, stream=True, headers={"Range": "bytes=0-0"})
+    response.close()
+    if response.status_code != 206:
+        return 0, ""
+    total = response.headers.get("Content-Range", "").rpartition("/")[2]
+    if not total.isdigit():
+        return 0, ""
+    return int(total), response.headers.get("ETag", response.headers.get("Last-Modified", ""))
+
+
+class _RangeProgress:
+    """
+    The number of bytes of each segment of a ranged download that are on disk, persisted next to the
+    partial file so that an interrupted download resumes where each segment stopped.
+
+    Segments are written concurrently by several threads, each through its own handle. A segment only
+    records its progress once its handle was flushed to disk and closed, so the persisted progress never
+    covers bytes still buffered by another thread, and a crash loses at most the bytes in flight.
+    """
+
+    def __init__(self, path: pathlib.Path, identity: Dict) -> None:
+        self._path = path
+        self._lock = threading.Lock()
+        self.identity = identity
+        self.done: Dict[str, int] = {}
+        self.resumed = False
+        if path.exists():
+            try:
+                state = json.loads(path.read_text())
+            except ValueError:
+                state = {}
+            # Only resume the download of the same version of the same file
+            if state.get("identity") == identity:
+                self.done = state.get("done", {})
+                self.resumed = True
+
+    def reset(self) -> None:
+        with self._lock:
+            self.done = {}
+            self.resumed = False
+
+    def get(self, start: int) -> int:
+        with self._lock:
+            return self.done.get(str(start), 0)
+
+    def commit(self, start: int, size: int) -> None:
+        """
+        Record that the first `size` bytes of the segment at `start` are on disk, and persist the progress.
+        """
+        with self._lock:
+            self.done[str(start)] = size
+            tmp_path = self._path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"identity": self.identity, "done": self.done}))
+            os.replace(tmp_path, self._path)
+
+    def total(self) -> int:
+        with self._lock:
+            return sum(self.done.values())
+
+
+def download_ranged(
+    url: str,
+    save_path: str,
+    verify_ssl: bool,
+    max_workers: int = 4,
+    segment_size: int = SEGMENT_SIZE,
+    gunzip: bool = False,
+    expected_sha256: Optional[str] = None,
+    max_retries: int = 3,
+) -> str:
+    """
+    Download a file as concurrent HTTP Range segments, resuming the segments of an interrupted download.
+
+    The segments are written into `<save_path>.part` and their progress is recorded in `<save_path>.part.json`.
+    Once complete, the file is hashed, checked against `expected_sha256`, decompressed if needed and moved
+    to `save_path`. Servers without range support fall back to a sequential `download_from_url`.
+
+    Parameters
+    ----------
+    url : str
+        The URL of the file.
+    save_path : str
+        The path to save the file to.
+    verify_ssl : bool
+        Whether to verify SSL.
+    max_workers : int, optional
+        The number of segments downloaded concurrently, by default 4.
+    segment_size : int, optional
+        The size of a segment in bytes, by default 8 MiB.
+    gunzip : bool, optional
+        Decompress the downloaded gzip data into `save_path`, by default False.
+    expected_sha256 : str, optional
+        The expected sha256 of the downloaded (compressed) bytes, by default None (not verified).
+    max_retries : int, optional
+        The number of attempts for each segment, by default 3.
+
+    Returns
+    -------
+    str
+        The sha256 of the downloaded bytes.
+
+    Raises
+    ------
+    ValueError
+        If a segment cannot be downloaded, the downloaded file does not have the size announced by the server
+        or its sha256 is not `expected_sha256`.
+    """
+    size, validator = _probe_ranges(url, verify_ssl)
+    if size == 0:
+        tmp_path = f"{save_path}.tmp"
+        checksum = download_from_url(url, tmp_path, verify_ssl, gunzip=gunzip, hash_algorithm="sha256")
+        if checksum is None:
+            # The download failed and was not retried, the partial file must not be published
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise ValueError(f"Download of {url} failed")
+        if expected_sha256 is not None and checksum != expected_sha256:
+            pathlib.Path(tmp_path).unlink(missing_ok=True)
+            raise ValueError(f"Checksum mismatch, expected {expected_sha256} but got {checksum}")
+        os.replace(tmp_path, save_path)
+        return checksum
+
+    part_path = pathlib.Path(f"{save_path}.part")
+    identity = {"size": size, "validator": validator, "sha256": expected_sha256}
+    progress = _RangeProgress(pathlib.Path(f"{save_path}.part.json"), identity)
+    if not progress.resumed or not part_path.exists() or part_path.stat().st_size != size:
+        progress.reset()
+        with part_path.open("wb") as f:
+            f.truncate(size)
+
+    segments = [(start, min(start + segment_size, size) - 1) for start in range(0, size, segment_size)]
+    with tqdm(total=size, initial=progress.total(), unit="iB", unit_scale=True) as pbar:
+
+        def fetch(segment: Tuple[int, int]) -> None:
+            start, end = segment
+            error = None
+            for _ in range(max_retries):
+                offset = start + progress.get(start)
+                if offset > end:
+                    return
+                try:
+                    response = requests.get(
+                        url=url, verify=verify_ssl, stream=True, headers={"Range": f"bytes={offset}-{end}"}
+                    )
+                    if response.status_code != 206:
+                        raise ValueError(f"Range request failed with status {response.status_code}")
+                    with part_path.open("r+b") as f:
+                        f.seek(offset)
+                        try:
+                            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                                if chunk:
+                                    chunk = chunk[: end + 1 - offset]
+                                    f.write(chunk)
+                                    offset += len(chunk)
+                                    pbar.update(len(chunk))
+                        finally:
+                            f.flush()
+                            os.fsync(f.fileno())
+                except (requests.RequestException, ValueError) as e:
+                    error = e
+                # The bytes written so far are on disk, only this segment's progress is recorded
+                progress.commit(start, offset - start)
+                if offset > end:
+                    return
+            raise error or ValueError(f"Segment {start}-{end} is incomplete")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(fetch, segments))
+
+    # Files without a known checksum, e.g. raw GitHub files, are at least checked to be complete
+    incomplete = [start for start, end in segments if progress.get(start) != end + 1 - start]
+    if incomplete or part_path.stat().st_size != size:
+        part_path.unlink(missing_ok=True)
+        pathlib.Path(f"{save_path}.part.json").unlink(missing_ok=True)
+        raise ValueError(f"Download of {url} is incomplete, {len(incomplete)} segments are missing bytes")
+
+    hash_object = hashlib.sha256()
+    with part_path.open("rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hash_object.update(chunk)
+    checksum = hash_object.hexdigest()
+    if expected_sha256 is not None and checksum != expected_sha256:
+        part_path.unlink(missing_ok=True)
+        pathlib.Path(f"{save_path}.part.json").unlink(missing_ok=True)
+        raise ValueError(f"Checksum mismatch, expected {expected_sha256} but got {checksum}")
+
+    if gunzip:
+        tmp_path = pathlib.Path(f"{save_path}.tmp")
+        with part_path.open("rb") as f, tmp_path.open("wb") as g:
+            sink = _GunzipWriter(g)
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                sink.write(chunk)
+            sink.flush()
+        os.replace(tmp_path, save_path)
+        part_path.unlink()
+    else:
+        os.replace(part_path, save_path)
+    pathlib.Path(f"{save_path}.part.json").unlink(missing_ok=True)
+    return checksum
 
 
 def download_github_file(
@@ -57,6 +360,7 @@ def download_github_file(
     is_lfs: bool = False,
     verify_ssl: bool = False,
     use_tempfile: bool = False,
+    max_workers: int = 4,
 ) -> None:
     # Create parent directory if not exist
     pathlib.Path(save_path).parent.mkdir(parents=True, exist_ok=True)
@@ -70,16 +374,220 @@ def download_github_file(
         print(f"Error getting download URL: {e}")
         return
 
+    # The callbacks recorded the checksum of the file, so that an unchanged file is not downloaded again:
+    # the git blob sha of raw files, and for LFS files, which are gzip compressed, the sha256 verified here.
+    # Downloads always go through a partial file, so `use_tempfile` is kept for compatibility only.
+    checksum_path = pathlib.Path(save_path).with_suffix(".checksum")
+    expected_sha256 = None
+    if is_lfs and checksum_path.exists():
+        recorded = checksum_path.read_text().strip()
+        expected_sha256 = recorded if re.fullmatch(r"[0-9a-f]{64}", recorded) else None
     try:
-        src_path = tempfile.mktemp() if use_tempfile else save_path
-        download_from_url(url, src_path, verify_ssl)
+        download_ranged(
+            url, save_path, verify_ssl, max_workers=max_workers, gunzip=is_lfs, expected_sha256=expected_sha256
+        )
     except Exception as e:
+        # Forget the checksum so that the next run downloads again, resuming the completed segments
+        checksum_path.unlink(missing_ok=True)
         print(f"Error downloading file: {e}")
         return
 
-    post_cls = GzipPostCallback if is_lfs else ChecksumPostCallback
+
+def _source_version(src: pathlib.Path) -> Dict:
+    """
+    Identify the version of a downloaded file by its size, modification time and recorded checksum.
+    """
+    stat = src.stat()
+    checksum_path = src.with_suffix(".checksum")
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "checksum": checksum_path.read_text().strip() if checksum_path.exists() else None,
+    }
+
+
+def read_manifest(save_dir: str) -> Dict[str, Dict]:
+    """
+    Read the versions of the compiled artifacts in a dataset directory, empty if nothing was compiled yet.
+    """
     try:
-        post_cls.post_download(src_path, save_path)
-    except Exception as e:
-        print(f"Error in post-download steps: {e}")
+        return json.loads(pathlib.Path(save_dir).joinpath(MANIFEST).read_text())
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _write_manifest(save_dir: pathlib.Path, manifest: Dict[str, Dict]) -> None:
+    tmp_path = save_dir.joinpath(f"{MANIFEST}.{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(tmp_path, save_dir.joinpath(MANIFEST))
+
+
+def _artifact_entry(save_dir: pathlib.Path, artifact: str) -> Dict:
+    source, _, version = ARTIFACTS[artifact]
+    return {"source": source, "version": version, "source_version": _source_version(save_dir.joinpath(source))}
+
+
+def _selected_artifacts(save_dir: pathlib.Path, artifacts: Iterable[str]) -> List[str]:
+    # The artifacts whose source was downloaded, optional ones only if requested or compiled before
+    requested = set(artifacts)
+    return [
+        artifact
+        for artifact, (source, _, _) in ARTIFACTS.items()
+        if save_dir.joinpath(source).exists()
+        and (artifact not in OPTIONAL_ARTIFACTS or artifact in requested or save_dir.joinpath(artifact).exists())
+    ]
+
+
+def stale_artifacts(save_dir: str, artifacts: Iterable[str] = ()) -> List[str]:
+    """
+    List the artifacts of a dataset directory that are missing or out of date with their source.
+
+    The optional artifacts (see `OPTIONAL_ARTIFACTS`) are only listed if they were compiled before or are
+    in `artifacts`. Artifacts whose source was not downloaded are never listed.
+
+    Parameters
+    ----------
+    save_dir : str
+        The directory of the downloaded datasets, e.g. `~/.decodex/ethereum`.
+    artifacts : Iterable[str], optional
+        The optional artifacts to compile as well, by default none.
+
+    Returns
+    -------
+    List[str]
+        The artifacts to compile.
+    """
+    save_dir = pathlib.Path(save_dir)
+    manifest = read_manifest(str(save_dir))
+    stale = []
+    for artifact in _selected_artifacts(save_dir, artifacts):
+        recorded = manifest.get(artifact, {})
+        entry = _artifact_entry(save_dir, artifact)
+        if not save_dir.joinpath(artifact).exists() or any(recorded.get(k) != v for k, v in entry.items()):
+            stale.append(artifact)
+    return stale
+
+
+def compile_datasets(save_dir: str, force: bool = False, artifacts: Iterable[str] = ()) -> Dict[str, Dict]:
+    """
+    Compile the downloaded datasets of a chain into the indexed artifacts of `ARTIFACTS`.
+
+    `signatures.csv` is compiled into `signatures.bin`, read by `BinarySignatureLookUp`, and `tags.json`
+    into `tags.bin`, read by `BinaryAddrTagger`. Both are memory-mapped, so parsing the raw files is paid
+    once per dataset version instead of once per process. The optional artifacts, the SQLite databases
+    `signatures.db` and `tags.db` read by `SQLSignatureLookUp` and `SQLAddrTagger`, are only compiled when
+    requested, or to keep them up to date once compiled.
+
+    The version of every artifact, i.e. its format version and the size, modification time and checksum
+    of its source, is recorded in `manifest.json`. Artifacts whose recorded version is current are skipped.
+
+    Datasets are compiled in the staging directory of a new version, see `install_datasets` and
+    `ensure_artifacts`, as published versions are never modified.
+
+    Parameters
+    ----------
+    save_dir : str
+        The directory of the downloaded datasets, e.g. `~/.decodex/ethereum/staging`.
+    force : bool, optional
+        Compile even if the artifacts are up to date, by default False.
+    artifacts : Iterable[str], optional
+        The optional artifacts to compile as well, by default none.
+
+    Returns
+    -------
+    Dict[str, Dict]
+        The manifest, the version of each compiled artifact.
+    """
+    save_dir = pathlib.Path(save_dir)
+    manifest = read_manifest(str(save_dir))
+    stale = _selected_artifacts(save_dir, artifacts) if force else stale_artifacts(str(save_dir), artifacts)
+    for artifact in stale:
+        source, compile_func, _ = ARTIFACTS[artifact]
+        entry = _artifact_entry(save_dir, artifact)
+        try:
+            compile_func(str(save_dir.joinpath(source)), str(save_dir.joinpath(artifact)))
+        except Exception as e:
+            print(f"Error compiling {artifact}: {e}")
+            manifest.pop(artifact, None)
+            continue
+        manifest[artifact] = {**entry, "compiled_at": int(time.time())}
+
+    if stale and save_dir.exists():
+        _write_manifest(save_dir, manifest)
+    return manifest
+
+
+def update_signature_files(delta: str, save_dir: str, verify_ssl: bool = False) -> None:
+    """
+    Apply a signature delta to the installed signature files instead of downloading the whole registry again.
+
+    The delta is a CSV file with the columns of `signatures.csv`, whose rows are upserted into the signature
+    stores in `save_dir` (see `apply_signature_delta`). Only `signatures.db` is updated incrementally, the
+    signatures of the delta being upserted in a single transaction. `signatures.csv` and `signatures.bin`
+    are fully rewritten, in time proportional to the whole registry, but only once: the manifest records
+    both stores as current, so `compile_datasets` does not compile them again.
+
+    `save_dir` is the staging directory of a new version (see `update_datasets`), whose files are hard-linked
+    to the published version. `signatures.db` is copied before being updated, so the published version
+    is not modified.
+
+    Parameters
+    ----------
+    delta : str
+        The path or the URL of the signature delta file.
+    save_dir : str
+        The directory of the installed signature files, e.g. `~/.decodex/ethereum/staging`.
+    verify_ssl : bool, optional
+        Verify SSL when downloading the delta file, by default False.
+    """
+    save_dir = pathlib.Path(save_dir)
+    csv_path = save_dir.joinpath("signatures.csv")
+    if not csv_path.exists():
+        print(f"Skip Updating: {csv_path} does not exist, download the signatures first")
         return
+
+    delta_path = delta
+    if delta.startswith("http://") or delta.startswith("https://"):
+        fd, delta_path = tempfile.mkstemp(suffix=".csv")
+        os.close(fd)
+
+    try:
+        if delta_path != delta:
+            try:
+                checksum = download_from_url(delta, delta_path, verify_ssl, hash_algorithm="sha256")
+            except Exception as e:
+                print(f"Error downloading signature delta: {e}")
+                return
+            if checksum is None:
+                print(f"Error downloading signature delta: download of {delta} failed")
+                return
+
+        db_path = save_dir.joinpath("signatures.db")
+        if db_path.exists() and db_path.stat().st_nlink > 1:
+            # Shared with the published version, the upsert goes into a copy
+            tmp_path = save_dir.joinpath(f"signatures.db.{os.getpid()}.tmp")
+            shutil.copy2(db_path, tmp_path)
+            os.replace(tmp_path, db_path)
+
+        try:
+            n_rows = apply_signature_delta(
+                delta_path=delta_path,
+                csv_path=str(csv_path),
+                bin_path=str(save_dir.joinpath("signatures.bin")),
+                db_path=str(db_path),
+            )
+        except Exception as e:
+            print(f"Error updating signatures: {e}")
+            return
+    finally:
+        if delta_path != delta:
+            pathlib.Path(delta_path).unlink(missing_ok=True)
+
+    # The stores updated by the delta are current with the merged signatures.csv
+    manifest = read_manifest(str(save_dir))
+    for artifact in ("signatures.bin", "signatures.db"):
+        if save_dir.joinpath(artifact).exists():
+            manifest[artifact] = {**_artifact_entry(save_dir, artifact), "compiled_at": int(time.time())}
+    _write_manifest(save_dir, manifest)
+    compile_datasets(str(save_dir))
+    print(f"Updated {n_rows} signatures")
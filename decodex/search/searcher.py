@@ -89,6 +89,12 @@ class Web3Searcher(BaseSearcher):
             raise TypeError("provider must be a Web3 http provider URI")
 
     def get_tx(self, txhash: str, *, max_workers: int = 2, show_revert_reason: bool = True) -> Tx:
+        """
+        Search a transaction by its hash.
+
+        The topics and data of the logs and the input of the transaction are the raw HexBytes returned by web3,
+        not hex strings: use `decodex.utils.to_hex` to get the 0x-prefixed hex strings.
+        """
         assert max_workers > 0, "max_workers must be positive"
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             tx = executor.submit(self.web3.eth.get_transaction, txhash)
@@ -96,11 +102,12 @@ class Web3Searcher(BaseSearcher):
             tx, tx_receipt = tx.result(), tx_receipt.result()
 
         blk = self.web3.eth.get_block(tx_receipt["blockNumber"])
+        # Topics, data and input are kept as raw bytes, they are decoded without going through hex strings
         logs: list[Log] = [
             {
                 "address": log["address"],
-                "topics": [t.hex() for t in log["topics"]],
-                "data": log["data"].hex(),
+                "topics": list(log["topics"]),
+                "data": log["data"],
             }
             for log in tx_receipt["logs"]
         ]
@@ -149,7 +156,7 @@ class Web3Searcher(BaseSearcher):
             "value": value,
             "gas_used": gas_used,
             "gas_price": gas_price,
-            "input": tx["input"].hex(),
+            "input": tx["input"],
             "status": status,
             "reason": reason,
             "logs": logs,
@@ -0,0 +1,107 @@
+from typing import Dict
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+
+from decodex.decode import CompiledEvent
+from decodex.type import EventHandleFunc
+
+
+class Route(NamedTuple):
+    """
+    Where a log goes once its shape is known.
+
+    Attributes
+    ----------
+    handler : EventHandleFunc
+        The handler of the event.
+    event : Optional[CompiledEvent]
+        The built-in ABI that decodes this shape of log, or None to decode with the signature lookup candidates.
+    expected : Optional[CompiledEvent]
+        The built-in ABI that signature lookup candidates must be compatible with, or None to accept any candidate.
+    """
+
+    handler: EventHandleFunc
+    event: Optional[CompiledEvent]
+    expected: Optional[CompiledEvent]
+
+
+class DispatchTable:
+    """
+    Route logs to their handler by (topic0, number of topics, data size), built once at registration time.
+
+    Events sharing a topic hash can differ in shape, e.g. an ERC721 `Transfer` has the topic of the ERC20
+    `Transfer` but 4 topics and no data. A log whose shape matches the built-in ABI of its handler is decoded
+    with it directly. Any other shape is sent to the signature lookup, restricted to the candidates that have
+    the shape of the log and the inputs the handler expects, so mismatched logs are skipped without trial decoding.
+
+    Example
+    -------
+    >>> table = DispatchTable()
+    >>> table.register(topic0, handler, CompiledEvent(parse_event_signature(text_sig)))
+    >>> route = table.route(topic0, len(topics), data_size)
+    """
+
+    def __init__(self) -> None:
+        self._handlers: Dict[str, EventHandleFunc] = {}
+        self._events: Dict[str, CompiledEvent] = {}
+        self._shapes: Dict[Tuple[str, int], CompiledEvent] = {}
+
+    def register(self, topic0: str, handler: EventHandleFunc, event: CompiledEvent = None) -> None:
+        """
+        Register the handler of an event.
+
+        Parameters
+        ----------
+        topic0 : str
+            The topic hash of the event.
+        handler : EventHandleFunc
+            The handler of the event.
+        event : CompiledEvent, optional
+            The built-in ABI of the event, None if the handler relies on the signature lookup.
+        """
+        previous = self._events.pop(topic0, None)
+        if previous is not None:
+            self._shapes.pop((topic0, previous.n_topics), None)
+
+        self._handlers[topic0] = handler
+        if event is not None:
+            self._events[topic0] = event
+            self._shapes[(topic0, event.n_topics)] = event
+
+    def __contains__(self, topic0: str) -> bool:
+        return topic0 in self._handlers
+
+    def handlers(self) -> Dict[str, EventHandleFunc]:
+        return dict(self._handlers)
+
+    def route(self, topic0: str, n_topics: int, data_size: int) -> Optional[Route]:
+        """
+        Route a log by its topic hash, number of topics and data size in bytes.
+
+        Returns
+        -------
+        Optional[Route]
+            The route of the log, or None if no handler is registered for the topic.
+        """
+        handler = self._handlers.get(topic0)
+        if handler is None:
+            return None
+        event = self._shapes.get((topic0, n_topics))
+        if event is not None and event.accepts(n_topics, data_size):
+            return Route(handler, event, event)
+        return Route(handler, None, self._events.get(topic0))
+
+    @staticmethod
+    def accepts(route: Route, candidate: CompiledEvent, n_topics: int, data_size: int) -> bool:
+        """
+        Check whether a signature lookup candidate can decode a log of the given shape for the route,
+        i.e. it has the shape of the log and, if the handler has a built-in ABI, the same input names and types.
+        """
+        if not candidate.accepts(n_topics, data_size):
+            return False
+        if route.expected is None:
+            return True
+        if candidate.text_signature != route.expected.text_signature:
+            return False
+        return [inp.get("name") for inp in candidate.inputs] == [inp.get("name") for inp in route.expected.inputs]
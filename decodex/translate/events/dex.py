@@ -63,7 +63,7 @@ class UniswapV2Events(UniswapEvents):
 
     def swap(self) -> Tuple[str, EventHandleFunc]:
         # Swap(address indexed sender,uint amount0In, uint amount1In, uint amount0Out, uint amount1Out, address indexed to);
-        text_sig = "Swap(address,uint256,uint256,uint256,uint256,address)"
+        text_sig = "Swap(address indexed sender,uint256 amount0In,uint256 amount1In,uint256 amount0Out,uint256 amount1Out,address indexed to)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token0_addr, token1_addr = self._get_token_pair(payload["address"])
@@ -100,7 +100,7 @@ class UniswapV2Events(UniswapEvents):
 
     def mint(self) -> Tuple[str, EventHandleFunc]:
         # Mint(address indexed sender, uint amount0, uint amount1);
-        text_sig = "Mint(address,uint256,uint256)"
+        text_sig = "Mint(address indexed sender,uint256 amount0,uint256 amount1)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token0_addr, token1_addr = self._get_token_pair(payload["address"])
@@ -121,7 +121,7 @@ class UniswapV2Events(UniswapEvents):
 
     def burn(self) -> Tuple[str, EventHandleFunc]:
         # Burn(address indexed sender, uint amount0, uint amount1, address indexed to);
-        text_sig = "Burn(address,uint256,uint256,address)"
+        text_sig = "Burn(address indexed sender,uint256 amount0,uint256 amount1,address indexed to)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token0_addr, token1_addr = self._get_token_pair(payload["address"])
@@ -142,7 +142,7 @@ class UniswapV2Events(UniswapEvents):
 
     def pair_created(self) -> Tuple[str, EventHandleFunc]:
         # PairCreated(address indexed token0, address indexed token1, address pair, uint);
-        text_sig = "PairCreated(address,address,address,uint256)"
+        text_sig = "PairCreated(address indexed token0,address indexed token1,address pair,uint256)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
@@ -187,7 +187,7 @@ class UniswapV3Events(UniswapEvents):
 
     def pool_created(self) -> Tuple[str, EventHandleFunc]:
         # PoolCreated(address token0,address token1,uint24 fee,int24 tickSpacing,address pool)
-        text_sig = "PoolCreated(address,address,uint24,int24,address)"
+        text_sig = "PoolCreated(address indexed token0,address indexed token1,uint24 indexed fee,int24 tickSpacing,address pool)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
@@ -205,7 +205,7 @@ class UniswapV3Events(UniswapEvents):
 
     def increase_liquidity(self) -> Tuple[str, EventHandleFunc]:
         # IncreaseLiquidity(uint256 indexed tokenId, uint128 liquidity, uint256 amount0, uint256 amount1);
-        text_sig = "IncreaseLiquidity(uint256,uint128,uint256,uint256)"
+        text_sig = "IncreaseLiquidity(uint256 indexed tokenId,uint128 liquidity,uint256 amount0,uint256 amount1)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
@@ -226,7 +226,7 @@ class UniswapV3Events(UniswapEvents):
 
     def decrease_liquidity(self) -> Tuple[str, EventHandleFunc]:
         # DecreaseLiquidity(uint256 indexed tokenId, uint128 liquidity, uint256 amount0, uint256 amount1);
-        text_sig = "DecreaseLiquidity(uint256,uint128,uint256,uint256)"
+        text_sig = "DecreaseLiquidity(uint256 indexed tokenId,uint128 liquidity,uint256 amount0,uint256 amount1)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
@@ -247,7 +247,7 @@ class UniswapV3Events(UniswapEvents):
 
     def swap(self) -> Tuple[str, EventHandleFunc]:
         # Swap(address sender,address recipient,int256 amount0,int256 amount1,uint160 sqrtPriceX96,uint128 liquidity,int24 tick)
-        text_sig = "Swap(address,address,int256,int256,uint160,uint128,int24)"
+        text_sig = "Swap(address indexed sender,address indexed recipient,int256 amount0,int256 amount1,uint160 sqrtPriceX96,uint128 liquidity,int24 tick)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
@@ -308,7 +308,7 @@ class UniswapV3Events(UniswapEvents):
 
     def owner_changed(self) -> Tuple[str, EventHandleFunc]:
         # OwnerChanged(address oldOwner, address newOwner)
-        text_sig = "OwnerChanged(address,address)"
+        text_sig = "OwnerChanged(address indexed oldOwner,address indexed newOwner)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
@@ -334,7 +334,7 @@ class BancorEV3Events(Events):
 
     def tokens_traded(self) -> Tuple[str, EventHandleFunc]:
         # TokensTraded (index_topic_1 bytes32 contextId, index_topic_2 address sourceToken, index_topic_3 address targetToken, uint256 sourceAmount, uint256 targetAmount, uint256 bntAmount, uint256 targetFeeAmount, uint256 bntFeeAmount, address trader)
-        text_sig = "TokensTraded(bytes32,address,address,uint256,uint256,uint256,uint256,uint256,address)"
+        text_sig = "TokensTraded(bytes32 indexed contextId,address indexed sourceToken,address indexed targetToken,uint256 sourceAmount,uint256 targetAmount,uint256 bntAmount,uint256 targetFeeAmount,uint256 bntFeeAmount,address trader)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
@@ -380,7 +380,7 @@ class CurveV2Events(Events):
 
     def token_exchange(self) -> Tuple[str, EventHandleFunc]:
         # TokenExchange (index_topic_1 address buyer, index_topic_2 address receiver, index_topic_3 address pool, address token_sold, address token_bought, uint256 amount_sold, uint256 amount_bought)
-        text_sig = "TokenExchange(address,address,address,address,address,uint256,uint256)"
+        text_sig = "TokenExchange(address indexed buyer,address indexed receiver,address indexed pool,address token_sold,address token_bought,uint256 amount_sold,uint256 amount_bought)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             params = payload["params"]
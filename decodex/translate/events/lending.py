@@ -30,7 +30,7 @@ class AAVEV2Events(Events):
 
     def deposit(self) -> Tuple[str, EventHandleFunc]:
         # Deposit (index_topic_1 address reserve, address user, index_topic_2 address onBehalfOf, uint256 amount, index_topic_3 uint16 referral)
-        text_sign = "Deposit(address,address,address,uint256,uint16)"
+        text_sign = "Deposit(address indexed reserve,address user,address indexed onBehalfOf,uint256 amount,uint16 indexed referral)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -49,7 +49,7 @@ class AAVEV2Events(Events):
 
     def borrow(self) -> Tuple[str, EventHandleFunc]:
         # Borrow (index_topic_1 address reserve, address user, index_topic_2 address onBehalfOf, uint256 amount, uint256 borrowRateMode, uint256 borrowRate, index_topic_3 uint16 referral)
-        text_sign = "Borrow(address,address,address,uint256,uint256,uint256,uint16)"
+        text_sign = "Borrow(address indexed reserve,address user,address indexed onBehalfOf,uint256 amount,uint256 borrowRateMode,uint256 borrowRate,uint16 indexed referral)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -68,7 +68,7 @@ class AAVEV2Events(Events):
 
     def withdraw(self) -> Tuple[str, EventHandleFunc]:
         # Withdraw (index_topic_1 address reserve, index_topic_2 address user, index_topic_3 address to, uint256 amount)
-        text_sign = "Withdraw(address,address,address,uint256)"
+        text_sign = "Withdraw(address indexed reserve,address indexed user,address indexed to,uint256 amount)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -87,7 +87,7 @@ class AAVEV2Events(Events):
 
     def repay(self) -> Tuple[str, EventHandleFunc]:
         # Repay (index_topic_1 address reserve, index_topic_2 address user, index_topic_3 address repayer, uint256 amount)
-        text_sign = "Repay(address,address,address,uint256)"
+        text_sign = "Repay(address indexed reserve,address indexed user,address indexed repayer,uint256 amount)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -106,7 +106,7 @@ class AAVEV2Events(Events):
 
     def flashloan(self) -> Tuple[str, EventHandleFunc]:
         # FlashLoan (index_topic_1 address target, index_topic_2 address initiator, index_topic_3 address asset, uint256 amount, uint256 premium, uint16 referralCode)
-        text_sign = "FlashLoan(address,address,address,uint256,uint256,uint16)"
+        text_sign = "FlashLoan(address indexed target,address indexed initiator,address indexed asset,uint256 amount,uint256 premium,uint16 referralCode)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["asset"]
@@ -134,7 +134,7 @@ class AAVEV3Events(Events):
 
     def supply(self) -> Tuple[str, EventHandleFunc]:
         # Supply (index_topic_1 address reserve, address user, index_topic_2 address onBehalfOf, uint256 amount, index_topic_3 uint16 referralCode)
-        text_sig = "Supply(address,address,address,uint256,uint16)"
+        text_sig = "Supply(address indexed reserve,address user,address indexed onBehalfOf,uint256 amount,uint16 indexed referralCode)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -151,7 +151,7 @@ class AAVEV3Events(Events):
 
     def borrow(self) -> Tuple[str, EventHandleFunc]:
         # Borrow (index_topic_1 address reserve, address user, index_topic_2 address onBehalfOf, uint256 amount, uint8 interestRateMode, uint256 borrowRate, index_topic_3 uint16 referralCode)
-        text_sig = "Borrow(address,address,address,uint256,uint8,uint256,uint16)"
+        text_sig = "Borrow(address indexed reserve,address user,address indexed onBehalfOf,uint256 amount,uint8 interestRateMode,uint256 borrowRate,uint16 indexed referralCode)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -174,7 +174,7 @@ class AAVEV3Events(Events):
 
     def flashloan(self) -> Tuple[str, EventHandleFunc]:
         # FlashLoan(address indexed target, address initiator, address indexed asset, uint256 amount, DataTypes.InterestRateMode interestRateMode, uint256 premium, uint16 indexed referralCode);
-        text_sig = "FlashLoan(address,address,address,uint256,uint8,uint256,uint16)"
+        text_sig = "FlashLoan(address indexed target,address initiator,address indexed asset,uint256 amount,uint8 interestRateMode,uint256 premium,uint16 indexed referralCode)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["asset"]
@@ -191,7 +191,9 @@ class AAVEV3Events(Events):
 
     def repay(self) -> Tuple[str, EventHandleFunc]:
         # event Repay(address indexed reserve, address indexed user, address indexed repayer, uint256 amount, bool useATokens);
-        text_sig = "Repay(address,address,address,uint256,bool)"
+        text_sig = (
+            "Repay(address indexed reserve,address indexed user,address indexed repayer,uint256 amount,bool useATokens)"
+        )
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -208,7 +210,7 @@ class AAVEV3Events(Events):
 
     def reserve_used_as_collateral_enabled(self) -> Tuple[str, EventHandleFunc]:
         # ReserveUsedAsCollateralEnabled (index_topic_1 address reserve, index_topic_2 address user)
-        text_sig = "ReserveUsedAsCollateralEnabled(address,address)"
+        text_sig = "ReserveUsedAsCollateralEnabled(address indexed reserve,address indexed user)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -225,7 +227,7 @@ class AAVEV3Events(Events):
 
     def reserve_used_as_collateral_disabled(self) -> Tuple[str, EventHandleFunc]:
         # ReserveUsedAsCollateralDisabled (index_topic_1 address reserve, index_topic_2 address user)
-        text_sig = "ReserveUsedAsCollateralDisabled(address,address)"
+        text_sig = "ReserveUsedAsCollateralDisabled(address indexed reserve,address indexed user)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["reserve"]
@@ -253,7 +255,7 @@ class CompoundV3Events(Events):
 
     def supply_collateral(self) -> Tuple[str, EventHandleFunc]:
         # SupplyCollateral (index_topic_1 address from, index_topic_2 address dst, index_topic_3 address asset, uint256 amount)
-        text_sig = "SupplyCollateral(address,address,address,uint256)"
+        text_sig = "SupplyCollateral(address indexed from,address indexed dst,address indexed asset,uint256 amount)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["params"]["asset"]
@@ -272,7 +274,7 @@ class CompoundV3Events(Events):
 
     def withdraw(self) -> Tuple[str, EventHandleFunc]:
         # Withdraw (index_topic_1 address src, index_topic_2 address to, uint256 amount)
-        text_sig = "Withdraw(address,address,uint256)"
+        text_sig = "Withdraw(address indexed src,address indexed to,uint256 amount)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["address"]
@@ -294,7 +296,7 @@ class CompoundV3Events(Events):
 
     def supply(self) -> Tuple[str, EventHandleFunc]:
         # Supply (index_topic_1 address from, index_topic_2 address dst, uint256 amount)
-        text_sig = "Supply(address,address,uint256)"
+        text_sig = "Supply(address indexed from,address indexed dst,uint256 amount)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["address"]
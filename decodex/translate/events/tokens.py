@@ -27,7 +27,7 @@ class ERC20Events(Events):
 
     def transfer(self) -> Tuple[str, EventHandleFunc]:
         # Transfer (index_topic_1 address from, index_topic_2 address to, uint256 value)
-        text_sig = "Transfer(address,address,uint256)"
+        text_sig = "Transfer(address indexed from,address indexed to,uint256 value)"
 
         def decoder(payload: EventPayload) -> Optional[Action]:
             token_addr = payload["address"]
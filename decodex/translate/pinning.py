@@ -0,0 +1,76 @@
+from threading import Lock
+from typing import Hashable
+from typing import Iterable
+from typing import Iterator
+from typing import Optional
+from typing import Tuple
+
+from cachetools import LRUCache
+
+
+class CandidatePins:
+    """
+    Remember which candidate ABI actually decoded a selector, so that it is tried first next time.
+
+    A selector may have several colliding candidates in the signature database. Instead of trial decoding
+    them in score order for every log, the winning ABI is pinned under one or more keys, from the most to
+    the least specific, e.g. (selector, contract address) and (selector, number of topics, data length).
+
+    Parameters
+    ----------
+    maxsize : int, optional
+        The maximum number of pinned keys, by default 65536.
+
+    Example
+    -------
+    >>> pins = CandidatePins()
+    >>> keys = ((selector, address), (selector, len(topics), len(data)))
+    >>> for abi, text_sign in pins.order(sig_lookup(selector), keys):
+    ...     if try_decode(abi):
+    ...         pins.pin(abi, keys)
+    ...         break
+    """
+
+    def __init__(self, maxsize: int = 65536) -> None:
+        self._pins: LRUCache = LRUCache(maxsize=maxsize)
+        self._lock = Lock()
+
+    def get(self, keys: Iterable[Hashable]) -> Optional[Tuple[str, str]]:
+        """
+        Get the pinned (abi, text_sign) of the most specific key, or None if nothing is pinned.
+        """
+        with self._lock:
+            for key in keys:
+                pinned = self._pins.get(key)
+                if pinned is not None:
+                    return pinned
+        return None
+
+    def order(
+        self,
+        candidates: Iterable[Tuple[str, str]],
+        keys: Iterable[Hashable],
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Yield the pinned candidate first and then the remaining candidates in their original order.
+
+        The candidates are only consumed once the pinned one has been rejected.
+        """
+        pinned = self.get(keys)
+        if pinned is not None:
+            yield pinned
+        for candidate in candidates:
+            if pinned is None or candidate[0] != pinned[0]:
+                yield candidate
+
+    def pin(self, candidate: Tuple[str, str], keys: Iterable[Hashable]) -> None:
+        """
+        Pin the (abi, text_sign) candidate that decoded successfully under every key.
+        """
+        with self._lock:
+            for key in keys:
+                self._pins[key] = candidate
+
+    def clear(self) -> None:
+        with self._lock:
+            self._pins.clear()
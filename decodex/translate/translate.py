@@ -1,8 +1,8 @@
-import json
 import traceback
 from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from logging import Logger
+from threading import Lock
 from typing import Any
 from typing import Dict
 from typing import Iterable
@@ -14,20 +14,26 @@ from typing import Tuple
 from typing import Union
 
 import pytz
+from cachetools import LRUCache
 from multicall import Call
 from multicall import Multicall
 from web3 import Web3
 
+from decodex.constant import dataset_dir
 from decodex.constant import NULL_ADDRESS_0x0
 from decodex.constant import NULL_ADDRESS_0xF
 from decodex.convert.address import AddrTagger
+from decodex.convert.address import BatchAddrTagger
+from decodex.convert.address import StoreAddrTagger
 from decodex.convert.address import TaggerFactory
 from decodex.convert.signature import SignatureFactory
 from decodex.convert.signature import SignatureLookUp
 from decodex.convert.token import ERC20TokenService
-from decodex.decode import eth_decode_input
-from decodex.decode import eth_decode_log
+from decodex.decode import CompiledEvent
+from decodex.decode import DecoderCache
+from decodex.decode import parse_event_signature
 from decodex.search import SearcherFactory
+from decodex.translate.dispatch import DispatchTable
 from decodex.translate.events import AAVEV2Events
 from decodex.translate.events import AAVEV3Events
 from decodex.translate.events import BancorEV3Events
@@ -36,6 +42,7 @@ from decodex.translate.events import CurveV2Events
 from decodex.translate.events import ERC20Events
 from decodex.translate.events import UniswapV2Events
 from decodex.translate.events import UniswapV3Events
+from decodex.translate.pinning import CandidatePins
 from decodex.type import AccountBalanceChanged
 from decodex.type import Action
 from decodex.type import AssetBalanceChanged
@@ -49,6 +56,10 @@ from decodex.type import UTF8Message
 from decodex.utils import parse_ether
 from decodex.utils import parse_gwei
 from decodex.utils import parse_utf8
+from decodex.utils import to_hex
+
+# Transfer(address indexed from,address indexed to,uint256 value), an ERC20 transfer when it has 3 topics
+_TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
 
 
 class Translator:
@@ -81,9 +92,14 @@ class Translator:
         provider_uri : str
             URI of the Ethereum http provider
         tagger : AddrTagger, optional
-            Address tagger or the `tagger_types` in TaggerFactory, default is "json"
+            Address tagger or the `tagger_types` in TaggerFactory, default is "json", the JSON file loaded in memory.
+            Use "bin" to memory-map the compiled tag database, which `install` compiles (falling back to "json" if
+            it was not compiled, e.g. with `skip_install` on datasets installed before), "compact" to pack the JSON
+            file into a single buffer in memory or "sql" to query a SQLite database.
         sig_lookup : SignatureLookUp, optional
-            Signature lookup or the `sig_lookup_types` in SignatureFactory, default is "csv"
+            Signature lookup or the `fmt` in SignatureFactory, default is "csv".
+            Use "bin" to memory-map the compiled signature database, "compact" to pack the CSV file into a
+            single buffer in memory or "sql" to query a SQLite database instead of indexing the CSV file.
         defis : Union[Iterable[str], Literal["all"]], optional
             List of defi protocols to decode or "all" to decode all supported protocols, default is "all"
             You can get the list of supported protocols by calling `Translator.supported_defis()`
@@ -97,17 +113,19 @@ class Translator:
         if not skip_install:
             self.install()
 
-        self.tagger = TaggerFactory.create(tagger) if isinstance(tagger, str) else tagger
-
-        self.sig_lookup = (
-            SignatureFactory.create(fmt=sig_lookup, chain=chain) if isinstance(sig_lookup, str) else sig_lookup
-        )
+        self._tagger_spec, self._sig_lookup_spec = tagger, sig_lookup
+        self.tagger, self.sig_lookup = self.__stores__(tagger, sig_lookup)
 
         self.searcher = SearcherFactory.create("web3", uri=provider_uri)
         self.mc = Multicall(provider_uri, logger=logger)
-        self.hdlrs: Dict[str, EventHandleFunc] = {}
+        self._defis = defis if defis == "all" else list(defis)
+        self._decoders = DecoderCache()
+        self._pins = CandidatePins()
+        self._misses: LRUCache = LRUCache(maxsize=65536)
+        self._misses_lock = Lock()
+        self._cache_misses = not getattr(self.sig_lookup, "exact_contains", False)
         self.web3 = Web3(Web3.HTTPProvider(provider_uri))
-        self.__register__(self.evt_opts.keys() if defis == "all" else defis)
+        self.__register__(self._defis)
         self._erc_svc = ERC20TokenService(self.mc)
 
         self.verbose = verbose
@@ -116,33 +134,58 @@ class Translator:
 
     def install(self):
         from decodex import installer
-        from decodex import constant
-
-        tags_path = constant.DECODEX_DIR.joinpath(self.chain, "tags.json")
-        if not tags_path.exists():
-            installer.download_github_file(
-                save_path=str(tags_path),
-                org="brianleect",
-                repo="etherscan-labels",
-                branch="main",
-                path="data/etherscan/combined/combinedAllLabels.json",
-                is_lfs=False,
-                verify_ssl=False,
-                use_tempfile=False,
-            )
 
-        signature_path = constant.DECODEX_DIR.joinpath(self.chain, "signatures.csv")
-        if not signature_path.exists():
-            installer.download_github_file(
-                save_path=str(signature_path),
-                org="Solratic",
-                repo="function-signature-registry",
-                branch="main",
-                path="data/ethereum/func_sign.csv.gz",
-                is_lfs=True,
-                verify_ssl=False,
-                use_tempfile=True,
-            )
+        data_dir = dataset_dir(self.chain)
+        if all(data_dir.joinpath(name).exists() for name in installer.DATASETS.get(self.chain, {})):
+            # Missing or stale artifacts are compiled into a new version, under the install lock
+            installer.ensure_artifacts(self.chain)
+        else:
+            installer.install_datasets(self.chain)
+
+    def reload(self, tagger: AddrTagger = None, sig_lookup: SignatureLookUp = None) -> None:
+        """
+        Swap in new address and signature stores without restarting, e.g. after `decodex download`
+        published a new dataset version.
+
+        The new stores are opened before being swapped in, and the old ones stay valid, so translations
+        in flight finish on either store. The event handlers are registered again with the new stores,
+        and the candidate pins, misses and decoders learnt from the old signatures are dropped.
+
+        Parameters
+        ----------
+        tagger : AddrTagger, optional
+            Address tagger or the `tagger_types` in TaggerFactory, by default the one given to the constructor.
+        sig_lookup : SignatureLookUp, optional
+            Signature lookup or the `fmt` in SignatureFactory, by default the one given to the constructor.
+        """
+        tagger = self._tagger_spec if tagger is None else tagger
+        sig_lookup = self._sig_lookup_spec if sig_lookup is None else sig_lookup
+        new_tagger, new_sig_lookup = self.__stores__(tagger, sig_lookup)
+
+        self._tagger_spec, self._sig_lookup_spec = tagger, sig_lookup
+        self.tagger, self.sig_lookup = new_tagger, new_sig_lookup
+        self._cache_misses = not getattr(new_sig_lookup, "exact_contains", False)
+        self.__register__(self._defis)
+
+        self._pins.clear()
+        self._decoders.clear()
+        with self._misses_lock:
+            self._misses.clear()
+
+    def __stores__(
+        self, tagger: Union[AddrTagger, str], sig_lookup: Union[SignatureLookUp, str]
+    ) -> Tuple[AddrTagger, SignatureLookUp]:
+        if tagger == "bin" and not dataset_dir(self.chain).joinpath("tags.bin").exists():
+            # Not compiled, e.g. installed before tags were compiled or for a chain without compiled datasets
+            tagger = "json"
+        tagger = TaggerFactory.create(tagger, chain=self.chain) if isinstance(tagger, str) else tagger
+        if isinstance(tagger, StoreAddrTagger):
+            # Tag stores are queried in batches, see `_process_tx`
+            tagger = BatchAddrTagger(tagger)
+        return (
+            tagger,
+            SignatureFactory.create(fmt=sig_lookup, chain=self.chain) if isinstance(sig_lookup, str) else sig_lookup,
+        )
 
     def translate(self, txhash: str, *, max_workers: int = 10) -> TaggedTx:
         tx: Tx = self.searcher.get_tx(txhash)
@@ -179,14 +222,21 @@ class Translator:
     def supported_defis(cls) -> List[str]:
         return list(cls.evt_opts.keys())
 
-    def __register__(self, defis: Iterable[str]) -> None:
+    def __register__(self, defis: Union[Iterable[str], Literal["all"]]) -> None:
         # ERC20Events must be registered
         opts = self.evt_opts
         opts["erc20"] = ERC20Events
+        if defis == "all":
+            defis = list(opts.keys())
 
+        # Built aside and swapped in at once, so that `reload` does not expose a partial registration
+        hdlrs: Dict[str, EventHandleFunc] = {}
+        events: List[Any] = []
+        dispatch = DispatchTable()
         for defi in defis:
             assert defi in opts, f"defi protocol {defi} is not yet supported"
             cls = opts.get(defi)(self.mc, self.tagger, self.sig_lookup)
+            events.append(cls)
             for attr in dir(cls):
                 if attr.startswith("_"):
                     continue
@@ -194,38 +244,84 @@ class Translator:
                 if not callable(handle_func):
                     continue
                 text_sig, decoder = handle_func()
-                byte_sig = Web3.keccak(text=text_sig).hex()
-                self.hdlrs[byte_sig] = decoder
+                event = CompiledEvent(parse_event_signature(text_sig))
+                byte_sig = Web3.keccak(text=event.text_signature).hex()
+                hdlrs[byte_sig] = decoder
+                # Handlers declaring the parameter names and indexed flags decode with their own ABI,
+                # the others rely on the candidates from the signature lookup
+                dispatch.register(byte_sig, decoder, event if text_sig != event.text_signature else None)
+        self.hdlrs, self._events, self._dispatch = hdlrs, events, dispatch
 
     def _decode_log(self, log: Dict[str, Any]) -> Optional[Action]:
         topics = log.get("topics", [])
         if len(topics) == 0:
             raise ValueError("Log topics is empty")
-        handler = self.hdlrs.get(topics[0], None)
-        if handler is None:
+        # Topics and data may be raw bytes, only the topic hash is converted to look up the handler
+        topic0 = to_hex(topics[0])
+        data = log.get("data", "0x")
+        data_size = (len(data) - 2) // 2 if isinstance(data, str) else len(data)
+        route = self._dispatch.route(topic0, len(topics), data_size)
+        if route is None:
             return None
-        abi_textsign_list = self.sig_lookup(topics[0])
-        for abi, _ in abi_textsign_list:
-            abi = json.loads(abi)
+        handler = route.handler
+
+        if route.event is not None:
+            # The params are decoded as the handler reads them, so decoding errors are raised by the handler.
+            # A log the built-in ABI rejects (e.g. dirty padding) is not retried with the signature lookup:
+            # its candidates for this shape have the same types and names, at best with other indexed flags,
+            # which would only read the words of the log as other parameters.
             try:
-                _, params = eth_decode_log(abi, topics, log.get("data", "0x"))
-                result = handler({"address": log["address"], "params": params})
+                return handler({"address": log["address"], "params": route.event.decode_lazy(topics, data)})
+            except Exception as e:
+                if self.verbose:
+                    traceback.print_exc()
+                    self.logger.error(f"Error when decoding log {log} with its built-in ABI with error {e}")
+                return None
+
+        shape = (topic0, len(topics), data_size)
+        if not self._may_have_candidates(topic0) or not self._may_have_candidates(shape):
+            return None
+        # Try the candidate that decoded this contract, or this shape of log, first
+        pin_keys = ((topic0, log["address"]), shape)
+        abi_textsign_list = self._pins.order(self.sig_lookup(topic0), pin_keys)
+        has_candidates = False
+        for candidate in abi_textsign_list:
+            try:
+                compiled = self._decoders.event(topic0, candidate[0])
+            except ValueError:
+                continue
+            # Skip the candidates with another shape, or other inputs than the handler expects
+            if not self._dispatch.accepts(route, compiled, len(topics), data_size):
+                continue
+            has_candidates = True
+            try:
+                result = handler({"address": log["address"], "params": compiled.decode_lazy(topics, data)})
+                self._pins.pin(candidate, pin_keys)
                 return result
             except Exception as e:
                 if self.verbose:
                     traceback.print_exc()
                     self.logger.error(f"Error when decoding log {log} with error {e}")
+        if not has_candidates:
+            self._remember_miss(shape)
         return None
 
-    def _decode_input(self, data: str) -> str:
-        if not data or len(data) < 10:
+    def _decode_input(self, data: Union[str, bytes]) -> str:
+        data_size = (len(data) - 2) // 2 if isinstance(data, str) else len(data)
+        if not data or data_size < 4:
             return ""
-        func_selector = data[:10]
-        candidates = self.sig_lookup(func_selector)
-        for abi, _ in candidates:
+        func_selector = to_hex(data[:4]) if not isinstance(data, str) else data[:10]
+        if not self._may_have_candidates(func_selector):
+            return func_selector
+        pin_keys = ((func_selector, data_size),)
+        candidates = self._pins.order(self.sig_lookup(func_selector), pin_keys)
+        has_candidates = False
+        for candidate in candidates:
+            has_candidates = True
             try:
-                abi = json.loads(abi)
-                _, params = eth_decode_input(abi, data)
+                compiled = self._decoders.function(func_selector, candidate[0])
+                _, params = compiled.decode(data)
+                abi = compiled.abi
                 func = abi["name"]
                 # Format the output string into funcA(arg1=a, arg2=b)
                 if len(params) > 0:
@@ -239,14 +335,42 @@ class Translator:
                         )
                         + ")"
                     )
+                self._pins.pin(candidate, pin_keys)
                 return func
             except Exception as e:
                 if self.verbose:
                     traceback.print_exc()
-                    self.logger.error(f"Error when decoding input {data} with error {e}")
+                    self.logger.error(f"Error when decoding input {to_hex(data)} with error {e}")
                 continue
+        if not has_candidates:
+            self._remember_miss(func_selector)
         return func_selector
 
+    def _may_have_candidates(self, byte_sign: Union[str, Tuple[str, int, int]]) -> bool:
+        """
+        Reject selectors and topics that are known to be absent from the signature database,
+        before any lookup or ABI work. Absent ones are remembered in a bounded negative cache,
+        which also holds the (topic, number of topics, data size) shapes without a compatible candidate.
+        Selectors and topics are not remembered if the lookup checks them exactly at the cost of
+        a cache probe (see `SignatureLookUp.exact_contains`).
+        """
+        if isinstance(byte_sign, tuple) or self._cache_misses:
+            with self._misses_lock:
+                if byte_sign in self._misses:
+                    return False
+        if isinstance(byte_sign, tuple):
+            return True
+        if byte_sign not in self.sig_lookup:
+            self._remember_miss(byte_sign)
+            return False
+        return True
+
+    def _remember_miss(self, byte_sign: Union[str, Tuple[str, int, int]]) -> None:
+        if isinstance(byte_sign, str) and not self._cache_misses:
+            return
+        with self._misses_lock:
+            self._misses[byte_sign] = True
+
     def _get_erc20_balabce(
         self,
         addr_token_pairs: Iterable[Tuple[str, str]],
@@ -388,7 +512,49 @@ class Translator:
 
         return account_balance_changed_list
 
+    @staticmethod
+    def _tx_addresses(tx: Tx) -> Set[str]:
+        """
+        Collect the addresses a transaction is going to tag: its sender, receiver and created contract,
+        the accounts whose ETH balance changed, the emitters of its logs and their indexed address parameters.
+        """
+        addresses = {tx["from"], tx["to"], tx["contract_created"], *tx["eth_balance_changes"]}
+        for log in tx["logs"]:
+            addresses.add(log["address"])
+            for topic in log["topics"][1:]:
+                topic = to_hex(topic)
+                if len(topic) == 66 and topic.startswith("0x000000000000000000000000"):
+                    addresses.add("0x" + topic[26:])
+        addresses.discard(None)
+        addresses.discard("")
+        return addresses
+
+    @staticmethod
+    def _tx_tokens(tx: Tx) -> List[str]:
+        """
+        Collect the ERC20 tokens a transaction transfers, the emitters of its ERC20 `Transfer` logs.
+        """
+        tokens = {
+            log["address"]
+            for log in tx["logs"]
+            if len(log["topics"]) == 3 and to_hex(log["topics"][0]) == _TRANSFER_TOPIC
+        }
+        return list(tokens)
+
     def _process_tx(self, tx: Tx, max_workers: int) -> TaggedTx:
+        # Tag all the addresses of the transaction in one call, the handlers then hit the tagger cache
+        if isinstance(self.tagger, BatchAddrTagger):
+            self.tagger.get_tags(self._tx_addresses(tx))
+        # Likewise, resolve the transferred tokens in one multicall
+        tokens = self._tx_tokens(tx)
+        if tokens:
+            try:
+                self._erc_svc.batch_get_erc20(tokens, max_workers=max_workers)
+            except Exception as e:
+                # The handlers look the tokens up again, and fail on their own
+                if self.verbose:
+                    self.logger.error(f"Error when resolving the tokens {tokens} with error {e}")
+
         # Decode the events
         with ThreadPoolExecutor(max_workers=max_workers) as executor:
             actions = executor.map(self._decode_log, tx["logs"])
@@ -412,9 +578,9 @@ class Translator:
         blk_time = datetime.fromtimestamp(tx["block_timestamp"], tz=pytz.utc)
 
         # Tag the addresses
-        tx_from = self.tagger(tx["from"])[0]
-        tx_to = self.tagger(tx["to"])[0] if tx["to"] else None
-        tx_contract_created = self.tagger(tx["contract_created"])[0] if tx["contract_created"] else None
+        tx_from, tx_to, tx_contract_created = self.tagger(
+            [tx["from"], tx["to"] or None, tx["contract_created"] or None]
+        )
 
         # Get the method
         method = self._decode_input(tx["input"])
@@ -441,7 +607,7 @@ class Translator:
             "value": parse_ether(tx["value"]),
             "gas_used": tx["gas_used"],
             "gas_price": parse_gwei(tx["gas_price"]),
-            "input": tx["input"],
+            "input": to_hex(tx["input"]),
             "status": tx["status"],
             "reason": tx["reason"],
             "actions": actions,
@@ -3,7 +3,9 @@ from typing import Any
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Sequence
 from typing import TypedDict
+from typing import Union
 
 from .base import Action
 
@@ -12,8 +14,9 @@ Log = TypedDict(
     "Log",
     {
         "address": str,  # contract address, hex string. 0x prefixed.
-        "topics": List[str],  # topics of the log, each is a hex string of 0x prefixed.
-        "data": str,  # data of the log, hex string. 0x prefixed.
+        # topics of the log, each is raw bytes (HexBytes from `Web3Searcher.get_tx`) or a hex string of 0x prefixed.
+        "topics": List[Union[str, bytes]],
+        "data": Union[str, bytes],  # data of the log, raw bytes (HexBytes from `Web3Searcher.get_tx`) or hex string.
     },
 )
 
@@ -23,7 +26,7 @@ TaggedAddr = TypedDict(
     {
         "address": str,  # address or ens name
         "name": str,  # name of the address in our label dataset (e.g., USD Coin (USDC))
-        "labels": List[str],  # label of the address (e.g., ["centre", "stablecoin"])
+        "labels": Sequence[str],  # label of the address (e.g., ("centre", "stablecoin"))
     },
 )
 
@@ -64,7 +67,8 @@ Tx = TypedDict(
         "value": int,  # value of the transaction, in wei.
         "gas_used": int,  # gas used by the transaction, in wei.
         "gas_price": int,  # gas price of the transaction, in wei.
-        "input": str,  # input data of the transaction, hex string. 0x prefixed.
+        # input data of the transaction, raw bytes (HexBytes from `Web3Searcher.get_tx`) or hex string. 0x prefixed.
+        "input": Union[str, bytes],
         "status": int,  # status of the transaction
         "reason": str,  # reason of the transaction if failed
         "logs": List[Log],  # logs of the transaction
@@ -7,6 +7,7 @@ from .utils import parse_ether
 from .utils import parse_gwei
 from .utils import parse_unit
 from .utils import parse_utf8
+from .utils import to_hex
 from .utils import trunc_addr
 
 __all__ = [
@@ -15,6 +16,7 @@ __all__ = [
     "parse_gwei",
     "parse_unit",
     "parse_utf8",
+    "to_hex",
     "fmt_blktime",
     "fmt_addr",
     "fmt_gas",
@@ -0,0 +1,75 @@
+import hashlib
+import math
+import struct
+from typing import Iterable
+from typing import Union
+
+
+class BloomFilter:
+    """
+    A compact, deterministic Bloom filter for selectors and topics.
+
+    Membership tests never give false negatives, and give false positives at about `error_rate`
+    once `capacity` keys have been added. Hashing is deterministic across processes, so a filter
+    can be serialized with `to_bytes` and restored with `from_bytes`.
+
+    Parameters
+    ----------
+    capacity : int
+        The expected number of keys.
+    error_rate : float, optional
+        The expected false positive rate, by default 0.01.
+
+    Example
+    -------
+    >>> bloom = BloomFilter.from_keys(["0xa9059cbb", "0x095ea7b3"])
+    >>> "0xa9059cbb" in bloom
+    True
+    """
+
+    _HEADER = struct.Struct("<QI")
+
+    def __init__(self, capacity: int, error_rate: float = 0.01) -> None:
+        capacity = max(capacity, 1)
+        n_bits = math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))
+        self._n_bits = max(n_bits, 8)
+        self._n_hashes = max(round(self._n_bits / capacity * math.log(2)), 1)
+        self._bits = bytearray((self._n_bits + 7) // 8)
+
+    @classmethod
+    def from_keys(cls, keys: Iterable[Union[str, bytes]], error_rate: float = 0.01) -> "BloomFilter":
+        keys = list(keys)
+        bloom = cls(len(keys), error_rate)
+        for key in keys:
+            bloom.add(key)
+        return bloom
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BloomFilter":
+        n_bits, n_hashes = cls._HEADER.unpack_from(data, 0)
+        bloom = cls.__new__(cls)
+        bloom._n_bits = n_bits
+        bloom._n_hashes = n_hashes
+        bloom._bits = bytearray(data[cls._HEADER.size :])
+        if len(bloom._bits) != (n_bits + 7) // 8:
+            raise ValueError("Bloom filter data is truncated")
+        return bloom
+
+    def to_bytes(self) -> bytes:
+        return self._HEADER.pack(self._n_bits, self._n_hashes) + bytes(self._bits)
+
+    def _positions(self, key: Union[str, bytes]) -> Iterable[int]:
+        if isinstance(key, str):
+            key = key.lower().encode()
+        # Double hashing, the i-th position is h1 + i * h2
+        h1, h2 = struct.unpack("<QQ", hashlib.blake2b(key, digest_size=16).digest())
+        h2 |= 1
+        return ((h1 + i * h2) % self._n_bits for i in range(self._n_hashes))
+
+    def add(self, key: Union[str, bytes]) -> None:
+        for pos in self._positions(key):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: Union[str, bytes]) -> bool:
+        bits = self._bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
@@ -0,0 +1,23 @@
+import mmap
+from typing import Union
+
+
+class KeyView:
+    """
+    A read-only sequence over fixed-width keys in a buffer, to be searched with `bisect`.
+    """
+
+    __slots__ = ("_buf", "_offset", "_width", "_count")
+
+    def __init__(self, buf: Union[bytes, mmap.mmap], offset: int, width: int, count: int) -> None:
+        self._buf = buf
+        self._offset = offset
+        self._width = width
+        self._count = count
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, idx: int) -> bytes:
+        start = self._offset + idx * self._width
+        return self._buf[start : start + self._width]
@@ -11,15 +11,27 @@ def parse_ether(wei: int) -> float:
     return Decimal(wei) / 10**18
 
 
-def parse_utf8(hex: str) -> Optional[str]:
+def to_hex(data: Union[str, bytes]) -> str:
     """
     Parameters
     ----------
-    hex : str
-        Hex string to be decoded. 0x prefixed.
+    data : Union[str, bytes]
+        Raw bytes, or a hex string (0x prefixed) which is returned as it is.
+    """
+    if isinstance(data, str):
+        return data
+    return "0x" + memoryview(data).hex()
+
+
+def parse_utf8(hex: Union[str, bytes]) -> Optional[str]:
+    """
+    Parameters
+    ----------
+    hex : Union[str, bytes]
+        Hex string (0x prefixed) or raw bytes to be decoded.
     """
     try:
-        byte_data = bytes.fromhex(hex[2:])
+        byte_data = bytes.fromhex(hex[2:]) if isinstance(hex, str) else bytes(hex)
         utf8_str = byte_data.decode("utf-8")
         return utf8_str
     except Exception as e:
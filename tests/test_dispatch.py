@@ -0,0 +1,38 @@
+from decodex.decode import CompiledEvent
+from decodex.decode import parse_event_signature
+from decodex.translate.dispatch import DispatchTable
+
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+ERC20_TRANSFER = CompiledEvent(parse_event_signature("Transfer(address indexed from,address indexed to,uint256 value)"))
+ERC721_TRANSFER = CompiledEvent(
+    parse_event_signature("Transfer(address indexed from,address indexed to,uint256 indexed tokenId)")
+)
+
+
+class TestDispatchTable:
+    def handler(self, log):
+        return log
+
+    def test_route_by_shape(self):
+        table = DispatchTable()
+        table.register(TRANSFER_TOPIC, self.handler, ERC20_TRANSFER)
+
+        route = table.route(TRANSFER_TOPIC, 3, 32)
+        assert route.event is ERC20_TRANSFER
+
+        # An ERC721 Transfer has the same topic but another shape
+        route = table.route(TRANSFER_TOPIC, 4, 0)
+        assert route.event is None
+        assert not table.accepts(route, ERC721_TRANSFER, 4, 0)
+        assert not table.accepts(route, ERC20_TRANSFER, 4, 0)
+
+        assert table.route("0x" + "00" * 32, 3, 32) is None
+
+    def test_route_without_builtin_event(self):
+        table = DispatchTable()
+        table.register(TRANSFER_TOPIC, self.handler)
+        route = table.route(TRANSFER_TOPIC, 4, 0)
+        assert route.event is None
+        assert table.accepts(route, ERC721_TRANSFER, 4, 0)
+        assert not table.accepts(route, ERC20_TRANSFER, 4, 0)
@@ -0,0 +1,72 @@
+import pytest
+
+from decodex.constant import NULL_ADDRESS_0x0
+from decodex.convert.token import ERC20TokenService
+
+TOKENS = {f"0x{i:040x}": (f"Token {i}", f"TK{i}", 18) for i in range(1, 41)}
+NOT_ERC20 = "0x" + "ab" * 20
+
+
+class FakeMulticall:
+    """
+    Answer the ERC20 calls of `TOKENS`, counting the `agg` round trips, failing the calls to other addresses.
+    """
+
+    def __init__(self):
+        self.aggs = []
+
+    def agg(self, calls, as_dict=False, ignore_error=False, block_id=None, batch_size=100, max_workers=1):
+        self.aggs.append(len(calls))
+        response = {}
+        for call in calls:
+            address, field = call.request_id.rsplit("-", 1)
+            if address not in TOKENS:
+                if not ignore_error:
+                    raise ValueError({"error": "execution reverted"})
+                response[call.request_id] = None
+                continue
+            response[call.request_id] = dict(zip(("name", "symbol", "decimals"), TOKENS[address]))[field]
+        return response
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(ERC20TokenService, "_instance", None)
+    monkeypatch.setattr(ERC20TokenService, "_initialize", False)
+    ERC20TokenService._lru.clear()
+    mc = FakeMulticall()
+    yield ERC20TokenService(mc, cache_path=str(tmp_path.joinpath("erc20"))), mc
+    ERC20TokenService._lru.clear()
+
+
+class TestERC20TokenService:
+    def test_batch_get_erc20(self, service):
+        svc, mc = service
+        addresses = list(TOKENS) + [NOT_ERC20, NULL_ADDRESS_0x0, next(iter(TOKENS))]
+
+        tokens = svc.batch_get_erc20(addresses)
+        # One aggregate for every miss, the platform token needs no call
+        assert mc.aggs == [3 * (len(TOKENS) + 1)]
+        assert [token["symbol"] for token in tokens[: len(TOKENS)]] == [symbol for _, symbol, _ in TOKENS.values()]
+        assert tokens[len(TOKENS)] is None
+        assert tokens[-2]["symbol"] == "ETH" and tokens[-1] == tokens[0]
+
+        # The in-process cache is filled for `get_erc20` too, only with ERC20 tokens
+        assert svc.get_erc20(addresses[5]) == tokens[5]
+        assert svc.batch_get_erc20(addresses) == tokens
+        assert mc.aggs == [3 * (len(TOKENS) + 1), 3]
+
+        # The disk cache is filled as well, only with ERC20 tokens
+        ERC20TokenService._lru.clear()
+        assert svc.batch_get_erc20(addresses[: len(TOKENS) + 1]) == tokens[: len(TOKENS) + 1]
+        assert mc.aggs == [3 * (len(TOKENS) + 1), 3, 3]
+
+    def test_failures_are_not_cached(self, service):
+        svc, mc = service
+        address = next(iter(TOKENS))
+        agg = mc.agg
+        # A transient failure of the RPC node
+        mc.agg = lambda calls, **kwargs: {call.request_id: None for call in calls}
+        assert svc.batch_get_erc20([address]) == [None]
+        mc.agg = agg
+        assert svc.batch_get_erc20([address])[0]["symbol"] == "TK1"
@@ -1,8 +1,16 @@
 import json
 import os
 
+import pytest
+from eth_abi.exceptions import NonEmptyPaddingBytes
+
+from decodex.decode import cache
+from decodex.decode import CompiledEvent
+from decodex.decode import DecoderCache
 from decodex.decode import eth_decode_input
 from decodex.decode import eth_decode_log
+from decodex.decode import eth_decode_logs
+from decodex.decode import parse_event_signature
 
 
 class TestEthDecode:
@@ -160,6 +168,11 @@ class TestEthDecode:
         ]
         data = "0xb36a7b9f3130afcd380c609708ffc0cd2847358ae16c9018feeebf2c844fec43000000000000000000000000864e3af0d1a532bb92e6da167f67d2bd033af00f00000000000000000000000000000000000000000000000000000000000000800000000000000000000000000000000000000000000000000000000000000120000000000000000000000000000000000000000000000000000000000000000100000000000000000000000000000000000000000000000000000000000000020000000000000000000000003d049adb773faddef681fbe565466c4f9736a0090000000000000000000000000000000000000000000000000000000000000d6a00000000000000000000000000000000000000000000000000000000000000010000000000000000000000000000000000000000000000000000000000000003000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000012901c1cf3900000000000000000000000000004b2c444ba3a88d26825ccc310ab54ad679dc19490000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000007d0e36a8180000000000000000000000000008ca8a587710ceda4232ac33d9da8b7421ffc90be0000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000000007d0e36a8180000000000000000000000000001bad6364b01013ff20193bf6562db1247fe342ed"
         text_sig, params = eth_decode_log(self.abi_orderFulfilled, topics, data)
+        lazy_params = CompiledEvent(self.abi_orderFulfilled).decode_lazy(topics, data)
+        assert lazy_params["offer"] is lazy_params["__idx_4"]
+        assert lazy_params == params
+        raw_topics, raw_data = [bytes.fromhex(t[2:]) for t in topics], memoryview(bytes.fromhex(data[2:]))
+        assert eth_decode_log(self.abi_orderFulfilled, raw_topics, raw_data) == (text_sig, params)
         expected_text_sig = "OrderFulfilled(bytes32,address,address,address,(uint8,address,uint256,uint256)[],(uint8,address,uint256,uint256,address)[])"
         assert text_sig == expected_text_sig
         assert params == {
@@ -224,3 +237,110 @@ class TestEthDecode:
                 },
             ],
         }
+
+    def test_decoder_cache(self):
+        cache = DecoderCache(maxsize=2)
+        abi = json.dumps(self.abi_orderFulfilled)
+        compiled = cache.event("0x9d9af8e3", abi)
+        assert cache.event("0x9d9af8e3", abi) is compiled
+        assert compiled.text_signature.startswith("OrderFulfilled(bytes32,address,address,address,")
+        with pytest.raises(ValueError):
+            cache.function("0x9d9af8e3", abi)
+
+    def test_eth_decode_log_compiles_once(self, monkeypatch):
+        compiled = []
+        init = CompiledEvent.__init__
+
+        def counting_init(event, abi):
+            compiled.append(abi["name"])
+            init(event, abi)
+
+        monkeypatch.setattr(CompiledEvent, "__init__", counting_init)
+        dumps = []
+        monkeypatch.setattr(
+            cache.json, "dumps", lambda obj, **kwargs: dumps.append(obj) or json.JSONEncoder(**kwargs).encode(obj)
+        )
+        abi = parse_event_signature("Approval(address indexed owner,address indexed spender,uint256 value)")
+        topics = [
+            "0x8c5be1e5ebec7d5bd14f71427d1e84f3dd0314c0f7b2291e5b200ac8c7c3b925",
+            "0x" + "00" * 32,
+            "0x" + "00" * 32,
+        ]
+        for value in range(3):
+            _, params = eth_decode_log(abi, topics, "0x" + value.to_bytes(32, "big").hex())
+            assert params["value"] == value
+        assert compiled == ["Approval"]
+        # The same ABI is not serialized again
+        assert len(dumps) == 1
+        # An equal ABI is serialized, but not compiled again
+        eth_decode_log(dict(abi), topics, "0x" + "00" * 32)
+        assert compiled == ["Approval"] and len(dumps) == 2
+
+    def test_parse_event_signature(self):
+        abi = parse_event_signature(
+            "OrderFulfilled(bytes32 orderHash,address indexed offerer,address indexed zone,address recipient,"
+            "(uint8 itemType,address token,uint256 identifier,uint256 amount)[] offer,"
+            "(uint8 itemType,address token,uint256 identifier,uint256 amount,address recipient)[] consideration)"
+        )
+        assert [(inp["name"], inp["type"], inp["indexed"]) for inp in abi["inputs"]] == [
+            (inp["name"], inp["type"], inp["indexed"]) for inp in self.abi_orderFulfilled["inputs"]
+        ]
+        assert parse_event_signature("Transfer(address indexed from, address indexed to, uint value)")["inputs"][2] == {
+            "name": "value",
+            "type": "uint256",
+            "indexed": False,
+        }
+
+    def test_static_event_fast_path(self):
+        event = CompiledEvent(
+            parse_event_signature(
+                "Swap(address indexed sender,int24 indexed tick,uint8 kind,int128 amount,bool exact,bytes4 tag)"
+            )
+        )
+        generic = CompiledEvent(event.abi)
+        generic._word_decoders = None
+
+        topics = ["0x" + "00" * 32, "0x" + "00" * 12 + "ab" * 20, "0x" + "ff" * 29 + "fffffe"]
+        data = "0x" + "".join(
+            [
+                "00" * 31 + "07",
+                "ff" * 16 + "80" + "00" * 15,
+                "00" * 31 + "01",
+                "deadbeef" + "00" * 28,
+            ]
+        )
+        assert event.decode(topics, data) == generic.decode(topics, data)
+        assert event.decode(topics, data)[1]["tick"] == -2
+        assert event.decode_lazy(topics, data) == generic.decode(topics, data)[1]
+        raw_topics = [bytes.fromhex(t[2:]) for t in topics]
+        assert event.decode(raw_topics, bytes.fromhex(data[2:])) == event.decode(topics, data)
+
+        for bad_data in (data[:2] + "01" + data[4:], data[:-2] + "01"):
+            with pytest.raises(NonEmptyPaddingBytes):
+                event.decode(topics, bad_data)
+            with pytest.raises(NonEmptyPaddingBytes):
+                generic.decode(topics, bad_data)
+            with pytest.raises(NonEmptyPaddingBytes):
+                dict(generic.decode_lazy(topics, bad_data))
+
+    def test_eth_decode_logs(self):
+        abi = parse_event_signature("Swap(address indexed sender,int24 indexed tick,int128 amount,uint256 value)")
+        topics, data = [], []
+        for i, (tick, amount, value) in enumerate([(-2, -(2**100), 2**255 + 1), (7, 5, 0), (0, 2**126, 3)]):
+            topics.append(
+                ["0x" + "00" * 32, "0x" + "00" * 12 + f"{i:040x}", "0x" + (tick % 2**256).to_bytes(32, "big").hex()]
+            )
+            data.append("0x" + (amount % 2**256).to_bytes(32, "big").hex() + value.to_bytes(32, "big").hex())
+
+        text_sig, columns = eth_decode_logs(abi, topics, data)
+        assert text_sig == "Swap(address,int24,int128,uint256)"
+        for i in range(len(topics)):
+            _, params = eth_decode_log(abi, topics[i], data[i])
+            assert {k: columns[k][i] for k in params} == params
+
+        _, columns = eth_decode_logs(abi, topics, data, limbs=True)
+        assert columns["value"].shape == (3, 4)
+        assert columns["value"][0].tolist() == [2**63, 0, 0, 1]
+
+        with pytest.raises(ValueError):
+            eth_decode_logs(self.abi_orderFulfilled, [], [])
@@ -0,0 +1,390 @@
+import gzip
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from functools import partial
+from http.server import HTTPServer
+from http.server import SimpleHTTPRequestHandler
+
+import pytest
+
+from decodex.constant import fs
+from decodex.convert.signature import SQLSignatureLookUp
+from decodex.installer import callbacks
+from decodex.installer import compile_datasets
+from decodex.installer import current_version
+from decodex.installer import dataset
+from decodex.installer import download_from_url
+from decodex.installer import download_ranged
+from decodex.installer import ensure_artifacts
+from decodex.installer import installer
+from decodex.installer import prune_versions
+from decodex.installer import publish_version
+from decodex.installer import read_manifest
+from decodex.installer import remove_datasets
+from decodex.installer import stage_version
+from decodex.installer import stale_artifacts
+from decodex.installer import update_datasets
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class RangeHandler(QuietHandler):
+    """
+    Serve files with HTTP Range support, counting the bytes served and failing the ranges
+    starting at or after `fail_from` to simulate an interrupted download.
+    """
+
+    bytes_served = 0
+    fail_from = None
+
+    def do_GET(self):
+        path = self.translate_path(self.path)
+        if not os.path.isfile(path):
+            self.send_error(404)
+            return
+        with open(path, "rb") as f:
+            content = f.read()
+        match = re.fullmatch(r"bytes=(\d+)-(\d+)", self.headers.get("Range", ""))
+        if match is None:
+            start, end, status = 0, len(content) - 1, 200
+        else:
+            start, end, status = int(match.group(1)), min(int(match.group(2)), len(content) - 1), 206
+        if status == 206 and self.fail_from is not None and start >= self.fail_from:
+            self.send_error(500)
+            return
+
+        self.send_response(status)
+        self.send_header("Content-Length", str(end + 1 - start))
+        self.send_header("ETag", '"v1"')
+        if status == 206:
+            self.send_header("Content-Range", f"bytes {start}-{end}/{len(content)}")
+        self.end_headers()
+        self.wfile.write(content[start : end + 1])
+        RangeHandler.bytes_served += end + 1 - start
+
+
+def serve(serve_dir, handler):
+    server = HTTPServer(("127.0.0.1", 0), partial(handler, directory=str(serve_dir)))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def http_dir(tmp_path):
+    """
+    Serve a temporary directory over HTTP, yield (directory, base URL).
+    """
+    serve_dir = tmp_path.joinpath("www")
+    serve_dir.mkdir()
+    server = serve(serve_dir, QuietHandler)
+    yield serve_dir, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def range_http_dir(tmp_path):
+    """
+    Serve a temporary directory over HTTP with range support, yield (directory, base URL).
+    """
+    serve_dir = tmp_path.joinpath("www")
+    serve_dir.mkdir()
+    RangeHandler.bytes_served, RangeHandler.fail_from = 0, None
+    server = serve(serve_dir, RangeHandler)
+    yield serve_dir, f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestInstaller:
+    def test_download_gunzip_and_hash(self, http_dir, tmp_path):
+        serve_dir, base_url = http_dir
+        content = b"byte_sign,abi,text_sign,score\n" + b"0xa9059cbb,{},transfer(address,uint256),1\n" * 100000
+        # Two concatenated gzip members, as produced by appending to a gzip file
+        compressed = gzip.compress(content[:1000]) + gzip.compress(content[1000:])
+        serve_dir.joinpath("func_sign.csv.gz").write_bytes(compressed)
+
+        save_path = tmp_path.joinpath("signatures.csv")
+        checksum = download_from_url(
+            f"{base_url}/func_sign.csv.gz", str(save_path), verify_ssl=False, gunzip=True, hash_algorithm="sha256"
+        )
+        assert save_path.read_bytes() == content
+        assert checksum == hashlib.sha256(compressed).hexdigest()
+
+    def test_download_ranged(self, range_http_dir, tmp_path):
+        serve_dir, base_url = range_http_dir
+        content = os.urandom(100_000)
+        compressed = gzip.compress(content)
+        serve_dir.joinpath("func_sign.csv.gz").write_bytes(compressed)
+        sha256 = hashlib.sha256(compressed).hexdigest()
+
+        save_path = tmp_path.joinpath("signatures.csv")
+        checksum = download_ranged(
+            f"{base_url}/func_sign.csv.gz",
+            str(save_path),
+            verify_ssl=False,
+            segment_size=4096,
+            gunzip=True,
+            expected_sha256=sha256,
+        )
+        assert checksum == sha256
+        assert save_path.read_bytes() == content
+        assert not tmp_path.joinpath("signatures.csv.part").exists()
+
+        with pytest.raises(ValueError):
+            download_ranged(f"{base_url}/func_sign.csv.gz", str(save_path), False, expected_sha256="0" * 64)
+
+    def test_download_ranged_resumes(self, range_http_dir, tmp_path):
+        serve_dir, base_url = range_http_dir
+        content = os.urandom(100_000)
+        serve_dir.joinpath("tags.json").write_bytes(content)
+        save_path = tmp_path.joinpath("tags.json")
+
+        # Interrupted after the first half
+        RangeHandler.fail_from = 50_000
+        with pytest.raises(ValueError):
+            download_ranged(f"{base_url}/tags.json", str(save_path), False, max_workers=1, segment_size=10_000)
+        assert tmp_path.joinpath("tags.json.part.json").exists()
+
+        RangeHandler.bytes_served, RangeHandler.fail_from = 0, None
+        download_ranged(f"{base_url}/tags.json", str(save_path), False, max_workers=1, segment_size=10_000)
+        assert save_path.read_bytes() == content
+        assert RangeHandler.bytes_served < 60_000
+
+    def test_download_ranged_saves_flushed_progress(self, range_http_dir, tmp_path, monkeypatch):
+        serve_dir, base_url = range_http_dir
+        content = os.urandom(100_000)
+        serve_dir.joinpath("tags.json").write_bytes(content)
+        save_path = tmp_path.joinpath("tags.json")
+        part_path = tmp_path.joinpath("tags.json.part")
+
+        # Whenever progress is persisted, every segment it covers is already on disk
+        commit = installer._RangeProgress.commit
+
+        def checked_commit(progress, start, size):
+            commit(progress, start, size)
+            with open(part_path, "rb") as f:
+                for segment, done in dict(progress.done).items():
+                    f.seek(int(segment))
+                    assert f.read(done) == content[int(segment) : int(segment) + done]
+
+        monkeypatch.setattr(installer._RangeProgress, "commit", checked_commit)
+        download_ranged(f"{base_url}/tags.json", str(save_path), False, max_workers=4, segment_size=3_000)
+        assert save_path.read_bytes() == content
+
+    def test_download_ranged_fallback(self, http_dir, tmp_path, monkeypatch):
+        # Servers without range support are downloaded in a single pass
+        serve_dir, base_url = http_dir
+        content = os.urandom(10_000)
+        serve_dir.joinpath("tags.json").write_bytes(content)
+        save_path = tmp_path.joinpath("tags.json")
+        checksum = download_ranged(f"{base_url}/tags.json", str(save_path), False)
+        assert save_path.read_bytes() == content
+        assert checksum == hashlib.sha256(content).hexdigest()
+
+        # A failed download is not moved into place
+        monkeypatch.delenv("PROXY_URL", raising=False)
+        missing_path = tmp_path.joinpath("missing.json")
+        with pytest.raises(ValueError):
+            download_ranged(f"{base_url}/missing.json", str(missing_path), False)
+        assert not missing_path.exists()
+        assert not tmp_path.joinpath("missing.json.tmp").exists()
+
+    def test_raw_file_checksum(self, tmp_path, monkeypatch):
+        class Spec:
+            text = '{"sha": "blob-1"}'
+
+            def raise_for_status(self):
+                pass
+
+        monkeypatch.setattr(callbacks.requests, "request", lambda method, url: Spec())
+        save_path = tmp_path.joinpath("tags.json")
+        spec = dict(org="org", repo="repo", branch="main", path="tags.json")
+        url = callbacks.GithubRawBeforeCallback.before_download(save_path=str(save_path), **spec)
+        assert url == "https://raw.githubusercontent.com/org/repo/main/tags.json"
+        assert tmp_path.joinpath("tags.checksum").read_text() == "blob-1"
+
+        # Downloaded and unchanged, it is not downloaded again
+        save_path.write_text("{}")
+        with pytest.raises(FileExistsError):
+            callbacks.GithubRawBeforeCallback.before_download(save_path=str(save_path), **spec)
+        Spec.text = '{"sha": "blob-2"}'
+        assert callbacks.GithubRawBeforeCallback.before_download(save_path=str(save_path), **spec) == url
+        assert tmp_path.joinpath("tags.checksum").read_text() == "blob-2"
+
+    def test_compile_datasets(self, tmp_path):
+        tmp_path.joinpath("tags.json").write_text('{"0x22ff777ef6fe0690f1f74c6758126909653ad56a": {"name": "a"}}')
+        tmp_path.joinpath("signatures.csv").write_text(
+            "byte_sign,abi,text_sign,score\n0xa9059cbb,{},transfer(address,uint256),1\n"
+        )
+
+        manifest = compile_datasets(str(tmp_path))
+        assert set(manifest) == {"tags.bin", "signatures.bin"}
+        assert read_manifest(str(tmp_path)) == manifest
+        assert tmp_path.joinpath("tags.bin").exists() and tmp_path.joinpath("signatures.bin").exists()
+
+        # Up to date artifacts are not compiled again
+        assert compile_datasets(str(tmp_path)) == manifest
+
+        # A new version of the source is
+        os.utime(tmp_path.joinpath("tags.json"), ns=(0, 0))
+        updated = compile_datasets(str(tmp_path))
+        assert updated["tags.bin"]["source_version"]["mtime_ns"] == 0
+        assert updated["signatures.bin"] == manifest["signatures.bin"]
+
+    def test_dataset_versions(self, tmp_path, monkeypatch):
+        chain_dir = tmp_path.joinpath("ethereum")
+        chain_dir.mkdir()
+        # Installed before versioning
+        chain_dir.joinpath("tags.json").write_text("{}")
+
+        stage_version(str(chain_dir))
+        first = publish_version(str(chain_dir), ["tags.json"])
+        assert current_version(str(chain_dir)) == first.resolve()
+        assert not chain_dir.joinpath("tags.json").exists()
+
+        # Nothing changed, nothing is published
+        stage_version(str(chain_dir))
+        assert publish_version(str(chain_dir), ["tags.json"]) is None
+
+        staging = stage_version(str(chain_dir))
+        staging.joinpath("tags.json.tmp").write_text('{"0x22ff777ef6fe0690f1f74c6758126909653ad56a": {}}')
+        os.replace(staging.joinpath("tags.json.tmp"), staging.joinpath("tags.json"))
+        second = publish_version(str(chain_dir), ["tags.json"])
+        assert current_version(str(chain_dir)) == second.resolve()
+        assert first.joinpath("tags.json").read_text() == "{}"
+
+        # Incomplete downloads are kept to be resumed, not published
+        staging = stage_version(str(chain_dir))
+        staging.joinpath("tags.json.part").write_bytes(b"")
+        assert publish_version(str(chain_dir), ["tags.json"]) is None
+        assert stage_version(str(chain_dir)).joinpath("tags.json.part").exists()
+
+        assert prune_versions(str(chain_dir), keep=1) == [first]
+        # Left over by a crashed publish
+        chain_dir.joinpath("current.1.tmp").symlink_to("versions/missing", target_is_directory=True)
+        chain_dir.joinpath("stray").mkdir()
+        monkeypatch.setattr(dataset, "DECODEX_DIR", tmp_path)
+        assert remove_datasets("ethereum")
+        assert not chain_dir.exists()
+
+    def test_install_lock(self, tmp_path):
+        chain_dir = tmp_path.joinpath("ethereum")
+        events = []
+
+        def install(name):
+            with dataset._locked(chain_dir):
+                events.append(f"{name} start")
+                time.sleep(0.05)
+                events.append(f"{name} end")
+
+        threads = [threading.Thread(target=install, args=(name,)) for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # The installs do not overlap
+        assert events[0].split()[0] == events[1].split()[0] and events[2].split()[0] == events[3].split()[0]
+
+    def test_install_lock_without_fcntl(self, tmp_path, monkeypatch):
+        class FakeMsvcrt:
+            LK_LOCK, LK_UNLCK = 1, 0
+            calls = []
+
+            @classmethod
+            def locking(cls, fd, mode, nbytes):
+                # LK_LOCK gives up when the lock is held for too long
+                if mode == cls.LK_LOCK and not cls.calls:
+                    cls.calls.append("busy")
+                    raise OSError("Resource deadlock avoided")
+                cls.calls.append("lock" if mode == cls.LK_LOCK else "unlock")
+
+        monkeypatch.setattr(dataset, "fcntl", None)
+        monkeypatch.setattr(dataset, "msvcrt", FakeMsvcrt, raising=False)
+        with dataset._locked(tmp_path.joinpath("ethereum")):
+            assert FakeMsvcrt.calls == ["busy", "lock"]
+        assert FakeMsvcrt.calls == ["busy", "lock", "unlock"]
+
+    def test_ensure_artifacts(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fs, "DECODEX_DIR", tmp_path)
+        monkeypatch.setattr(dataset, "DECODEX_DIR", tmp_path)
+        chain_dir = tmp_path.joinpath("ethereum")
+        chain_dir.mkdir()
+        chain_dir.joinpath("signatures.csv").write_text(
+            'byte_sign,abi,text_sign,score\n0xa9059cbb,{},"transfer(address,uint256)",1\n'
+        )
+        stage_version(str(chain_dir))
+        first = publish_version(str(chain_dir))
+        assert not first.joinpath("signatures.bin").exists()
+
+        # The missing artifacts are compiled into a new version, the published one is not modified
+        second = ensure_artifacts("ethereum")
+        assert second != first.resolve() and second.joinpath("signatures.bin").exists()
+        assert not second.joinpath("signatures.db").exists()
+        assert sorted(f.name for f in first.iterdir()) == ["signatures.csv"]
+        assert ensure_artifacts("ethereum") == second
+
+        # Optional artifacts are compiled on demand
+        lookup = SQLSignatureLookUp(chain="ethereum")
+        third = current_version(str(chain_dir))
+        assert third != second and third.joinpath("signatures.db").exists()
+        assert list(lookup("0xa9059cbb")) == [("{}", "transfer(address,uint256)")]
+        assert not second.joinpath("signatures.db").exists()
+
+    def test_update_datasets(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(fs, "DECODEX_DIR", tmp_path)
+        monkeypatch.setattr(dataset, "DECODEX_DIR", tmp_path)
+        chain_dir = tmp_path.joinpath("ethereum")
+        chain_dir.mkdir()
+        chain_dir.joinpath("signatures.csv").write_text(
+            'byte_sign,abi,text_sign,score\n0xa9059cbb,{},"transfer(address,uint256)",1\n'
+        )
+        first = ensure_artifacts("ethereum", ["signatures.db"])
+        delta_path = tmp_path.joinpath("delta.csv")
+        delta_path.write_text('byte_sign,abi,text_sign,score\n0x095ea7b3,{},"approve(address,uint256)",1\n')
+
+        # The updated stores are not compiled again
+        for artifact in ("signatures.bin", "signatures.db"):
+            source, _, version = installer.ARTIFACTS[artifact]
+            monkeypatch.setitem(installer.ARTIFACTS, artifact, (source, None, version))
+        second = update_datasets("ethereum", str(delta_path))
+        assert list(SQLSignatureLookUp(str(second.joinpath("signatures.db")))("0x095ea7b3"))
+        # The published version is not modified
+        assert not list(SQLSignatureLookUp(str(first.joinpath("signatures.db")))("0x095ea7b3"))
+        assert stale_artifacts(str(second), ["signatures.db"]) == []
+        assert read_manifest(str(second))["signatures.db"]["source_version"]["size"] > 0
+
+    def test_update_datasets_from_url(self, http_dir, tmp_path, monkeypatch):
+        serve_dir, base_url = http_dir
+        monkeypatch.setattr(fs, "DECODEX_DIR", tmp_path)
+        monkeypatch.setattr(dataset, "DECODEX_DIR", tmp_path)
+        monkeypatch.delenv("PROXY_URL", raising=False)
+        download_dir = tmp_path.joinpath("downloads")
+        download_dir.mkdir()
+        monkeypatch.setattr(tempfile, "tempdir", str(download_dir))
+        chain_dir = tmp_path.joinpath("ethereum")
+        chain_dir.mkdir()
+        chain_dir.joinpath("signatures.csv").write_text(
+            'byte_sign,abi,text_sign,score\n0xa9059cbb,{},"transfer(address,uint256)",1\n'
+        )
+        first = ensure_artifacts("ethereum")
+
+        # A delta that cannot be downloaded changes nothing
+        assert update_datasets("ethereum", f"{base_url}/missing.csv") is None
+        assert current_version(str(chain_dir)) == first
+
+        serve_dir.joinpath("delta.csv").write_text(
+            'byte_sign,abi,text_sign,score\n0x095ea7b3,{},"approve(address,uint256)",1\n'
+        )
+        second = update_datasets("ethereum", f"{base_url}/delta.csv")
+        assert "0x095ea7b3" in second.joinpath("signatures.csv").read_text()
+        # The downloaded deltas are removed
+        assert list(download_dir.iterdir()) == []
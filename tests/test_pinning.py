@@ -0,0 +1,56 @@
+from decodex.translate.pinning import CandidatePins
+
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+TOKEN = "0x" + "a0" * 20
+OTHER_TOKEN = "0x" + "b0" * 20
+CANDIDATES = [("abi_a", "Transfer(address,address,uint256)"), ("abi_b", "Transfer(address,address,uint256)")]
+
+
+def keys(address: str, n_topics: int = 3, data_size: int = 32):
+    return ((TRANSFER_TOPIC, address), (TRANSFER_TOPIC, n_topics, data_size))
+
+
+class TestCandidatePins:
+    def test_pinned_candidate_first(self):
+        pins = CandidatePins()
+        assert list(pins.order(CANDIDATES, keys(TOKEN))) == CANDIDATES
+
+        pins.pin(CANDIDATES[1], keys(TOKEN))
+        assert list(pins.order(CANDIDATES, keys(TOKEN))) == [CANDIDATES[1], CANDIDATES[0]]
+        # Another contract emitting the same shape of log
+        assert list(pins.order(CANDIDATES, keys(OTHER_TOKEN))) == [CANDIDATES[1], CANDIDATES[0]]
+
+    def test_pins_of_other_keys_do_not_reorder(self):
+        pins = CandidatePins()
+        pins.pin(CANDIDATES[1], keys(TOKEN))
+        # Another contract with another shape of log
+        assert list(pins.order(CANDIDATES, keys(OTHER_TOKEN, 4, 0))) == CANDIDATES
+
+    def test_most_specific_key_wins(self):
+        pins = CandidatePins()
+        pins.pin(CANDIDATES[1], keys(TOKEN))
+        pins.pin(CANDIDATES[0], keys(OTHER_TOKEN))
+        # The shape was last decoded by abi_a, but this contract by abi_b
+        assert pins.get(keys(TOKEN)) == CANDIDATES[1]
+        assert pins.get(keys(OTHER_TOKEN)) == CANDIDATES[0]
+
+    def test_candidates_consumed_lazily(self):
+        pins = CandidatePins()
+        pins.pin(CANDIDATES[1], keys(TOKEN))
+        consumed = []
+
+        def lookup():
+            for candidate in CANDIDATES:
+                consumed.append(candidate)
+                yield candidate
+
+        assert next(pins.order(lookup(), keys(TOKEN))) == CANDIDATES[1]
+        assert consumed == []
+
+    def test_clear(self):
+        pins = CandidatePins()
+        pins.pin(CANDIDATES[1], keys(TOKEN))
+        pins.clear()
+        assert pins.get(keys(TOKEN)) is None
+        assert list(pins.order(CANDIDATES, keys(TOKEN))) == CANDIDATES
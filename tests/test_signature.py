@@ -0,0 +1,149 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from decodex.convert.signature import apply_signature_delta
+from decodex.convert.signature import compile_signature_db
+from decodex.convert.signature import compile_signatures
+from decodex.convert.signature import SignatureFactory
+
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+TRANSFER_SELECTOR = "0xa9059cbb"
+
+TRANSFER_EVENT_ABI = {
+    "name": "Transfer",
+    "type": "event",
+    "inputs": [
+        {"name": "from", "type": "address", "indexed": True},
+        {"name": "to", "type": "address", "indexed": True},
+        {"name": "value", "type": "uint256", "indexed": False},
+    ],
+}
+TRANSFER_NFT_ABI = {
+    "name": "Transfer",
+    "type": "event",
+    "inputs": [
+        {"name": "from", "type": "address", "indexed": True},
+        {"name": "to", "type": "address", "indexed": True},
+        {"name": "tokenId", "type": "uint256", "indexed": True},
+    ],
+}
+TRANSFER_FUNC_ABI = {
+    "name": "transfer",
+    "type": "function",
+    "inputs": [
+        {"name": "to", "type": "address"},
+        {"name": "value", "type": "uint256"},
+    ],
+}
+
+
+@pytest.fixture
+def signature_csv(tmp_path):
+    rows = [
+        (TRANSFER_TOPIC, json.dumps(TRANSFER_NFT_ABI), "Transfer(address,address,uint256)", 1),
+        (TRANSFER_SELECTOR, json.dumps(TRANSFER_FUNC_ABI), "transfer(address,uint256)", 7),
+        (TRANSFER_TOPIC, json.dumps(TRANSFER_EVENT_ABI), "Transfer(address,address,uint256)", 5),
+    ]
+    path = tmp_path.joinpath("signatures.csv")
+    pd.DataFrame(rows, columns=["byte_sign", "abi", "text_sign", "score"]).to_csv(path, index=False)
+    return path
+
+
+class TestSignatureLookUp:
+    def test_csv_candidates_sorted_by_score(self, signature_csv):
+        lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        candidates = list(lookup(TRANSFER_TOPIC))
+        assert [json.loads(abi) for abi, _ in candidates] == [TRANSFER_EVENT_ABI, TRANSFER_NFT_ABI]
+        assert list(lookup(TRANSFER_SELECTOR)) == [(json.dumps(TRANSFER_FUNC_ABI), "transfer(address,uint256)")]
+
+    def test_csv_df(self, signature_csv):
+        lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        assert "df" not in vars(lookup)
+        pd.testing.assert_frame_equal(lookup.df, pd.read_csv(signature_csv))
+        assert lookup.df is lookup.df
+
+        # The dataset version was pruned before `df` was first read
+        lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        expected = pd.read_csv(signature_csv)
+        signature_csv.unlink()
+        pd.testing.assert_frame_equal(lookup.df, expected)
+
+    def test_csv_unknown_selector(self, signature_csv):
+        lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        assert list(lookup("0xdeadbeef")) == []
+
+    def test_bin_matches_csv(self, signature_csv, tmp_path):
+        bin_path = tmp_path.joinpath("signatures.bin")
+        compile_signatures(str(signature_csv), str(bin_path))
+        csv_lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        bin_lookup = SignatureFactory.create("bin", uri=str(bin_path))
+        for byte_sign in (TRANSFER_TOPIC, TRANSFER_SELECTOR, "0xdeadbeef", "0x"):
+            assert list(bin_lookup(byte_sign)) == list(csv_lookup(byte_sign))
+
+    def test_compact_matches_csv(self, signature_csv):
+        csv_lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        compact_lookup = SignatureFactory.create("compact", uri=str(signature_csv))
+        for byte_sign in (TRANSFER_TOPIC, TRANSFER_SELECTOR, "0xdeadbeef", "0x"):
+            assert list(compact_lookup(byte_sign)) == list(csv_lookup(byte_sign))
+            assert (byte_sign in compact_lookup) == (byte_sign in csv_lookup)
+
+    def test_bin_rejects_other_files(self, signature_csv):
+        with pytest.raises(ValueError):
+            SignatureFactory.create("bin", uri=str(signature_csv))
+
+    def test_sql_matches_csv(self, signature_csv, tmp_path):
+        db_path = tmp_path.joinpath("signatures.db")
+        compile_signature_db(str(signature_csv), str(db_path))
+        csv_lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        for cache_size in (0, 1):
+            sql_lookup = SignatureFactory.create("sql", uri=str(db_path), cache_size=cache_size)
+            for byte_sign in (TRANSFER_TOPIC, TRANSFER_SELECTOR, "0xdeadbeef", TRANSFER_TOPIC):
+                assert list(sql_lookup(byte_sign)) == list(csv_lookup(byte_sign))
+
+    def test_sql_reads_removed_file(self, signature_csv, tmp_path):
+        db_path = tmp_path.joinpath("signatures.db")
+        compile_signature_db(str(signature_csv), str(db_path))
+        sql_lookup = SignatureFactory.create("sql", uri=str(db_path))
+        # The dataset version was pruned, new threads still read the opened database
+        db_path.unlink()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(lambda byte_sign: list(sql_lookup(byte_sign)), [TRANSFER_SELECTOR] * 4))
+        assert results == [[(json.dumps(TRANSFER_FUNC_ABI), "transfer(address,uint256)")]] * 4
+
+    def test_contains(self, signature_csv, tmp_path):
+        bin_path, db_path = tmp_path.joinpath("signatures.bin"), tmp_path.joinpath("signatures.db")
+        compile_signatures(str(signature_csv), str(bin_path))
+        compile_signature_db(str(signature_csv), str(db_path))
+        for fmt, uri in (("csv", signature_csv), ("bin", bin_path), ("sql", db_path)):
+            lookup = SignatureFactory.create(fmt, uri=str(uri))
+            assert TRANSFER_TOPIC in lookup
+            assert TRANSFER_SELECTOR in lookup
+            assert "0x" + "ab" * 32 not in lookup
+
+    def test_apply_signature_delta(self, signature_csv, tmp_path):
+        bin_path, db_path = tmp_path.joinpath("signatures.bin"), tmp_path.joinpath("signatures.db")
+        compile_signatures(str(signature_csv), str(bin_path))
+        compile_signature_db(str(signature_csv), str(db_path))
+
+        approve_abi = json.dumps({"name": "approve", "type": "function", "inputs": []})
+        delta_rows = [
+            (TRANSFER_TOPIC, json.dumps(TRANSFER_NFT_ABI), "Transfer(address,address,uint256)", 9),
+            ("0x095ea7b3", approve_abi, "approve()", 1),
+        ]
+        delta_path = tmp_path.joinpath("delta.csv")
+        pd.DataFrame(delta_rows, columns=["byte_sign", "abi", "text_sign", "score"]).to_csv(delta_path, index=False)
+        n_rows = apply_signature_delta(str(delta_path), str(signature_csv), str(bin_path), str(db_path))
+        assert n_rows == 2
+
+        csv_lookup = SignatureFactory.create("csv", uri=str(signature_csv))
+        assert [json.loads(abi) for abi, _ in csv_lookup(TRANSFER_TOPIC)] == [TRANSFER_NFT_ABI, TRANSFER_EVENT_ABI]
+        assert list(csv_lookup("0x095ea7b3")) == [(approve_abi, "approve()")]
+        for fmt, uri in (("bin", bin_path), ("sql", db_path)):
+            lookup = SignatureFactory.create(fmt, uri=str(uri))
+            for byte_sign in (TRANSFER_TOPIC, TRANSFER_SELECTOR, "0x095ea7b3"):
+                assert byte_sign in lookup
+                assert list(lookup(byte_sign)) == list(csv_lookup(byte_sign))
@@ -0,0 +1,193 @@
+import json
+import pickle
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict
+
+import pytest
+
+from decodex.convert.address import BatchAddrTagger
+from decodex.convert.address import BinaryAddrTagger
+from decodex.convert.address import CompactAddrTagger
+from decodex.convert.address import compile_tag_db
+from decodex.convert.address import compile_tags
+from decodex.convert.address import JSONAddrTagger
+from decodex.convert.address import LayeredAddrTagger
+from decodex.convert.address import MemoryAddrTagger
+from decodex.convert.address import SQLAddrTagger
+from decodex.convert.address import TaggerFactory
+from decodex.type.action_type import ContractCreation
+from decodex.type.action_type import TransferAction
+
+TAGS = {
+    "0x22ff777ef6fe0690f1f74c6758126909653ad56a": {"name": "Wallet", "labels": ["exchange", "hot-wallet"]},
+    "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2": {"name": "Wrapped Ether", "labels": ["token-contract"]},
+    "0xdac17f958d2ee523a2206206994597c13d831ec7": {"name": "Tether: USDT Stablecoin", "labels": []},
+    "0x0000000000000000000000000000000000000000": {"name": "Null: 0x000...000", "labels": ["burn"]},
+    "0x1111111254eeb25477b68fb85ed929f73a960582": {"labels": ["dex"]},
+}
+ADDRESSES = list(TAGS) + [
+    "0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2",
+    "0x6b175474e89094c44da98b954eedeac495271d0f",
+    "0x1234",
+    "vitalik.eth",
+    None,
+]
+
+
+def make_files(tmp_path):
+    json_path = tmp_path.joinpath("tags.json")
+    json_path.write_text(json.dumps(TAGS))
+    bin_path = tmp_path.joinpath("tags.bin")
+    compile_tags(str(json_path), str(bin_path))
+    return str(json_path), str(bin_path)
+
+
+class TestAddrTagger:
+    def test_binary_tagger(self, tmp_path):
+        json_path, bin_path = make_files(tmp_path)
+        expected = JSONAddrTagger(json_path)(ADDRESSES)
+        assert BinaryAddrTagger(bin_path)(ADDRESSES) == expected
+
+        token = {"address": "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2", "name": "", "symbol": "WETH", "decimals": 18}
+        (tagged,) = BinaryAddrTagger(bin_path)([dict(token)])
+        assert tagged == JSONAddrTagger(json_path)([dict(token)])[0]
+
+    def test_compact_tagger(self, tmp_path):
+        json_path, _ = make_files(tmp_path)
+        tagger = CompactAddrTagger(json_path)
+        assert tagger(ADDRESSES) == JSONAddrTagger(json_path)(ADDRESSES)
+        # Labels are interned
+        first, second = tagger(["0x22ff777ef6fe0690f1f74c6758126909653ad56a"] * 2)
+        assert first["labels"][0] is second["labels"][0]
+
+    def test_sql_tagger(self, tmp_path):
+        json_path, _ = make_files(tmp_path)
+        db_path = str(tmp_path.joinpath("tags.db"))
+        compile_tag_db(json_path, db_path)
+        tagger = SQLAddrTagger(db_path, cache_size=4)
+        assert tagger(ADDRESSES) == JSONAddrTagger(json_path)(ADDRESSES)
+
+        # Batched lookups over more addresses than a query binds
+        addresses = list(TAGS) + [f"0x{i:040x}" for i in range(1200)]
+        expected = dict.fromkeys(addresses, {})
+        expected.update(
+            {addr: {"name": tag.get("name", ""), "labels": tuple(tag["labels"])} for addr, tag in TAGS.items()}
+        )
+        tags = tagger.get_tags(addresses)
+        assert tags == expected
+        assert tags[addresses[-1]] is not tags[addresses[-2]]
+        assert tagger.get_tag("0xC02aaA39b223FE8D0A0e5C4F27eAD9083C756Cc2")["name"] == "Wrapped Ether"
+
+        # Only the addresses without an interned record are looked up, in one query
+        tagger = SQLAddrTagger(db_path)
+        tagger(list(TAGS)[:2])
+        queries = []
+        query = tagger._query
+        tagger._query = lambda keys: (queries.append(sorted(keys)), query(keys))[1]
+        tagger(list(TAGS)[:3])
+        assert queries == [[list(TAGS)[2]]]
+
+        with pytest.raises(ValueError):
+            SQLAddrTagger(json_path)
+
+    def test_sql_tagger_reads_removed_file(self, tmp_path):
+        json_path, _ = make_files(tmp_path)
+        db_path = tmp_path.joinpath("tags.db")
+        compile_tag_db(json_path, str(db_path))
+        tagger = SQLAddrTagger(str(db_path))
+        # The dataset version was pruned, new threads still read the opened database
+        db_path.unlink()
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = list(executor.map(tagger.get_tag, list(TAGS)[:4]))
+        assert [tag["name"] for tag in results] == [TAGS[addr]["name"] for addr in list(TAGS)[:4]]
+
+    def test_binary_tagger_random(self, tmp_path):
+        rng = random.Random(0)
+        labels = ["exchange", "token-contract", "défi", "", "phish-hack"]
+        tags = {}
+        for _ in range(2000):
+            tag = {"name": rng.choice(["", "Uniswap V2: Router", "合约", None]), "labels": rng.sample(labels, 2)}
+            tags["0x" + bytes(rng.getrandbits(8) for _ in range(20)).hex()] = tag
+        json_path = tmp_path.joinpath("tags.json")
+        json_path.write_text(json.dumps(tags))
+        compile_tags(str(json_path), str(tmp_path.joinpath("tags.bin")))
+
+        addresses = list(tags) + [addr.upper().replace("0X", "0x") for addr in list(tags)[:100]]
+        addresses += ["0x" + bytes(rng.getrandbits(8) for _ in range(20)).hex() for _ in range(100)]
+        addresses += ["0x" + "00" * 20, "0x" + "ff" * 20]
+        # Null names are stored as empty names
+        expected = [{**tag, "name": tag["name"] or ""} for tag in JSONAddrTagger(str(json_path))(addresses)]
+        assert BinaryAddrTagger(str(tmp_path.joinpath("tags.bin")))(addresses) == expected
+
+    def test_batch_tagger(self, tmp_path):
+        json_path, bin_path = make_files(tmp_path)
+        store = BinaryAddrTagger(bin_path)
+        lowered = [addr.lower() for addr in ADDRESSES if addr is not None]
+        assert store.get_tags(lowered) == {addr: store.get_tag(addr) for addr in lowered}
+
+        tagger = BatchAddrTagger(store)
+        tagged = tagger(ADDRESSES * 2)
+        assert tagged == JSONAddrTagger(json_path)(ADDRESSES * 2)
+        # Duplicates share their result
+        assert tagged[0] is tagged[len(ADDRESSES)]
+        # Resolved tags are cached
+        assert tagger(ADDRESSES[0])[0]["labels"] is tagged[0]["labels"]
+
+    def test_records(self, tmp_path):
+        _, bin_path = make_files(tmp_path)
+        tagger = BinaryAddrTagger(bin_path)
+        weth = "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+        (first,) = tagger(weth)
+        (second,) = tagger([weth])
+        assert first is second
+        assert first == {"address": weth, "name": "Wrapped Ether", "labels": ("token-contract",)}
+        with pytest.raises(TypeError):
+            first["name"] = "WETH"
+        assert pickle.loads(pickle.dumps(first)) == first
+        assert json.loads(json.dumps(first))["labels"] == ["token-contract"]
+
+        # Token metadata, e.g. cached by ERC20TokenService, is not modified
+        token = {"address": weth, "name": None, "contract_name": "Wrapped Ether", "decimals": 18, "symbol": "WETH"}
+        (tagged,) = tagger([token])
+        assert token["name"] is None and "labels" not in token
+        assert tagged["name"] == "Wrapped Ether" and tagged["decimals"] == 18
+        assert tagger([dict(token)])[0] is tagged
+
+    def test_records_in_actions(self, tmp_path):
+        _, bin_path = make_files(tmp_path)
+        tagger = BinaryAddrTagger(bin_path)
+        wallet, weth = "0x22ff777ef6fe0690f1f74c6758126909653ad56a", "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+        deployer, contract = tagger([wallet, weth])
+        assert asdict(ContractCreation(deployer=deployer, contract=contract)) == {
+            "deployer": {"address": wallet, "name": "Wallet", "labels": ("exchange", "hot-wallet")},
+            "contract": {"address": weth, "name": "Wrapped Ether", "labels": ("token-contract",)},
+            "action": "contract_creation",
+        }
+
+        token = {"address": weth, "name": None, "contract_name": "Wrapped Ether", "decimals": 18, "symbol": "WETH"}
+        sender, receiver, token = tagger([wallet, weth, token])
+        action = asdict(TransferAction(sender=sender, receiver=receiver, token=token, amount=1.0))
+        assert action["token"] == token and action["token"]["decimals"] == 18
+        with pytest.raises(TypeError):
+            action["token"]["name"] = "WETH"
+
+    def test_layered_tagger(self, tmp_path):
+        _, bin_path = make_files(tmp_path)
+        wallet, weth = "0x22ff777ef6fe0690f1f74c6758126909653ad56a", "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+        overlay = MemoryAddrTagger({wallet: {"name": "Our Hot Wallet", "labels": ["internal"]}})
+        tagger = TaggerFactory.create("bin", uri=bin_path, overlays=[overlay])
+        assert isinstance(tagger, LayeredAddrTagger)
+        batch = BatchAddrTagger(tagger)
+
+        for tag in (tagger, batch):
+            first, second = tag([wallet, weth])
+            assert first["name"] == "Our Hot Wallet" and first["labels"] == ("internal",)
+            assert second["name"] == "Wrapped Ether"
+
+        # Overlays are updated at runtime, the cached results are dropped
+        overlay.set_tag(weth, "WETH", ["mm-inventory"])
+        overlay.remove_tag(wallet)
+        for tag in (tagger, batch):
+            first, second = tag([wallet, weth])
+            assert first["name"] == "Wallet" and second["name"] == "WETH"
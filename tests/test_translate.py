@@ -0,0 +1,210 @@
+import csv
+import json
+import os
+
+import pytest
+
+from decodex.constant import fs
+from decodex.convert.address import BinaryAddrTagger
+from decodex.convert.address import JSONAddrTagger
+from decodex.convert.signature import CSVSignatureLookUp
+from decodex.convert.signature import SignatureLookUp
+from decodex.convert.token import erc20
+from decodex.convert.token import ERC20TokenService
+from decodex.installer import compile_datasets
+from decodex.installer import current_version
+from decodex.installer import dataset
+from decodex.installer import publish_version
+from decodex.installer import stage_version
+from decodex.translate import Translator
+
+TAGS = {"0x22ff777ef6fe0690f1f74c6758126909653ad56a": {"name": "Wallet", "labels": ["exchange"]}}
+SIGNATURES = 'byte_sign,abi,text_sign,score\n0xa9059cbb,{},"transfer(address,uint256)",1\n'
+
+TRANSFER_TOPIC = "0xddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef"
+TOKEN = "0x" + "a0" * 20
+SENDER = "0x22ff777ef6fe0690f1f74c6758126909653ad56a"
+RECEIVER = "0x" + "33" * 20
+
+
+def transfer_log(token: str = TOKEN, receiver: str = RECEIVER, value: int = 10**18) -> dict:
+    return {
+        "address": token,
+        "topics": [TRANSFER_TOPIC, "0x" + SENDER[2:].rjust(64, "0"), "0x" + receiver[2:].rjust(64, "0")],
+        "data": "0x" + value.to_bytes(32, "big").hex(),
+    }
+
+
+def resolve_token(translator: Translator, token: str = TOKEN) -> None:
+    """
+    Put an ERC20 token in the disk cache of the translator, so that its handlers need no RPC.
+    """
+    translator._erc_svc._cache.set(
+        token, {"name": None, "address": token, "contract_name": "Token", "decimals": 18, "symbol": "TK", "labels": []}
+    )
+
+
+ERC721_TRANSFER_ABI = {
+    "name": "Transfer",
+    "type": "event",
+    "inputs": [
+        {"name": "from", "type": "address", "indexed": True},
+        {"name": "to", "type": "address", "indexed": True},
+        {"name": "tokenId", "type": "uint256", "indexed": True},
+    ],
+}
+
+
+class CountingLookUp(SignatureLookUp):
+    """
+    Record the signatures looked up in another signature lookup.
+    """
+
+    def __init__(self, lookup: SignatureLookUp) -> None:
+        super().__init__()
+        self._lookup = lookup
+        self.calls = []
+
+    def __contains__(self, byte_sign: str) -> bool:
+        self.calls.append(("contains", byte_sign))
+        return byte_sign in self._lookup
+
+    def __call__(self, byte_sign: str):
+        self.calls.append(("call", byte_sign))
+        yield from self._lookup(byte_sign)
+
+
+@pytest.fixture
+def chain_dir(tmp_path, monkeypatch):
+    """
+    Install the datasets of "ethereum", without compiled artifacts, in a temporary `DECODEX_DIR`.
+    """
+    for module in (fs, dataset, erc20):
+        monkeypatch.setattr(module, "DECODEX_DIR", tmp_path)
+    monkeypatch.setattr(ERC20TokenService, "_instance", None)
+    monkeypatch.setattr(ERC20TokenService, "_initialize", False)
+    ERC20TokenService._lru.clear()
+    chain_dir = tmp_path.joinpath("ethereum")
+    chain_dir.mkdir()
+    chain_dir.joinpath("tags.json").write_text(json.dumps(TAGS))
+    chain_dir.joinpath("signatures.csv").write_text(SIGNATURES)
+    return chain_dir
+
+
+@pytest.fixture
+def lookup(chain_dir):
+    """
+    The signatures of `chain_dir` with an ERC721 Transfer, counting the lookups.
+    """
+    with chain_dir.joinpath("signatures.csv").open("a", newline="") as f:
+        csv.writer(f).writerow(
+            [TRANSFER_TOPIC, json.dumps(ERC721_TRANSFER_ABI), "Transfer(address,address,uint256)", 1]
+        )
+    return CountingLookUp(CSVSignatureLookUp(chain="ethereum"))
+
+
+class TestTranslator:
+    def test_install_compiles_a_new_version(self, chain_dir):
+        stage_version(str(chain_dir))
+        first = publish_version(str(chain_dir))
+
+        translator = Translator("http://localhost:1")
+        # The published version is not modified, the artifacts are compiled into a new one
+        second = current_version(str(chain_dir))
+        assert second != first.resolve() and second.joinpath("tags.bin").exists()
+        # Optional artifacts are not compiled unless used
+        assert not second.joinpath("tags.db").exists()
+        assert sorted(f.name for f in first.iterdir()) == ["signatures.csv", "tags.json"]
+        assert translator.tagger("0x22ff777ef6fe0690f1f74c6758126909653ad56a")[0]["name"] == "Wallet"
+
+        # Up to date, nothing is published
+        Translator("http://localhost:1")
+        assert current_version(str(chain_dir)) == second
+
+    def test_default_tagger(self, chain_dir):
+        translator = Translator("http://localhost:1")
+        assert isinstance(translator.tagger._store, JSONAddrTagger)
+        assert isinstance(Translator("http://localhost:1", tagger="bin").tagger._store, BinaryAddrTagger)
+
+    def test_bin_tagger_without_compiled_tags(self, chain_dir):
+        # Installed before tags were compiled, and not installed again
+        translator = Translator("http://localhost:1", tagger="bin", skip_install=True)
+        assert isinstance(translator.tagger._store, JSONAddrTagger)
+        assert translator.tagger("0x22ff777ef6fe0690f1f74c6758126909653ad56a")[0]["name"] == "Wallet"
+        assert not chain_dir.joinpath("tags.bin").exists()
+
+    def test_sql_tagger_compiles_on_demand(self, chain_dir):
+        translator = Translator("http://localhost:1", tagger="sql")
+        version = current_version(str(chain_dir))
+        assert version.joinpath("tags.db").exists()
+        assert translator.tagger("0x22ff777ef6fe0690f1f74c6758126909653ad56a")[0]["labels"] == ("exchange",)
+
+    def test_reload_picks_up_a_new_version(self, chain_dir):
+        translator = Translator("http://localhost:1")
+        resolve_token(translator)
+        assert translator._decode_log(transfer_log()).receiver["name"] != "New Wallet"
+
+        # `decodex download` publishes a new version of the tags
+        staging = stage_version(str(chain_dir))
+        staging.joinpath("tags.json.tmp").write_text(json.dumps({**TAGS, RECEIVER: {"name": "New Wallet"}}))
+        os.replace(staging.joinpath("tags.json.tmp"), staging.joinpath("tags.json"))
+        compile_datasets(str(staging))
+        publish_version(str(chain_dir))
+
+        translator.reload()
+        action = translator._decode_log(transfer_log())
+        assert action.receiver["name"] == "New Wallet"
+        assert action.sender["name"] == "Wallet" and action.amount == 1
+
+    def test_builtin_abi_decodes_without_lookup(self, chain_dir, lookup):
+        translator = Translator("http://localhost:1", sig_lookup=lookup, skip_install=True)
+        resolve_token(translator)
+        action = translator._decode_log(transfer_log(value=5 * 10**18))
+        assert action.amount == 5 and action.sender["name"] == "Wallet"
+        assert lookup.calls == []
+
+    def test_erc721_transfer_is_not_an_erc20_transfer(self, chain_dir, lookup):
+        translator = Translator("http://localhost:1", sig_lookup=lookup, skip_install=True)
+        resolve_token(translator)
+        log = transfer_log()
+        log["topics"].append("0x" + "00" * 31 + "07")
+        log["data"] = "0x"
+        # The ERC721 candidate has the shape of the log but not the inputs of the ERC20 handler
+        assert translator._decode_log(log) is None
+        assert ("call", TRANSFER_TOPIC) in lookup.calls
+
+    def test_dirty_padding_is_rejected(self, chain_dir, lookup):
+        translator = Translator("http://localhost:1", sig_lookup=lookup, skip_install=True)
+        resolve_token(translator)
+        log = transfer_log()
+        log["topics"][2] = "0x" + "ff" * 12 + RECEIVER[2:]
+        assert translator._decode_log(log) is None
+        # Not retried with the signature lookup
+        assert lookup.calls == []
+
+    def test_unknown_selectors_and_shapes_are_looked_up_once(self, chain_dir, lookup):
+        # The default `__contains__` of a lookup is not exact, e.g. a Bloom filter
+        translator = Translator("http://localhost:1", sig_lookup=lookup, skip_install=True)
+        erc721_log = transfer_log()
+        erc721_log["topics"].append("0x" + "00" * 31 + "07")
+        erc721_log["data"] = "0x"
+        for _ in range(2):
+            assert translator._decode_input("0xdeadbeef" + "00" * 32) == "0xdeadbeef"
+            assert translator._decode_log(erc721_log) is None
+        assert lookup.calls.count(("contains", "0xdeadbeef")) == 1
+        assert lookup.calls.count(("call", TRANSFER_TOPIC)) == 1
+
+        # The misses are forgotten with the signatures
+        translator.reload(sig_lookup=lookup)
+        translator._decode_input("0xdeadbeef" + "00" * 32)
+        translator._decode_log(erc721_log)
+        assert lookup.calls.count(("contains", "0xdeadbeef")) == 2
+        assert lookup.calls.count(("call", TRANSFER_TOPIC)) == 2
+
+    def test_exact_lookups_are_not_fronted_by_the_miss_cache(self, chain_dir, lookup):
+        lookup.exact_contains = True
+        translator = Translator("http://localhost:1", sig_lookup=lookup, skip_install=True)
+        for _ in range(2):
+            assert translator._decode_input("0xdeadbeef" + "00" * 32) == "0xdeadbeef"
+        assert lookup.calls == [("contains", "0xdeadbeef")] * 2
+        assert "0xdeadbeef" not in translator._misses